@@ -1,8 +1,9 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from src.backend.orchestrator import Orchestrator
+from src.backend.catalog_cache import catalog_cache
 import openai
-from src.constants import OPENAI_API_KEY, MODEL
-import re
+from src.constants import OPENAI_API_KEY
+from src.utils import filter_error_lines, format_sse_event
 import sys
 import os
 
@@ -18,126 +19,110 @@ app = Flask(
 
 # Initialize Orchestrator and OpenAI API
 orch = Orchestrator()
+# load the laptop catalog in the background so the first recommendation does not wait on the database
+catalog_cache.warm_up()
 openai.api_key = OPENAI_API_KEY
 
-def filter_error_lines(text):
-    unwanted_patterns = [
-        r"there was a problem with your input",
-        r"missing required dictionary",
-        r"missing dictionary with required keys",
-        r"expected dictionary keys and values are not present",
-        r"the required dictionary is not present in the input",
-        r"required dictionary structure.*missing"
-    ]
-    lines = text.split('\n')
-    return '\n'.join(
-        line for line in lines
-        if not any(re.search(p, line, re.IGNORECASE) for p in unwanted_patterns)
-    ).strip()
-
 # Your Flask routes (unchanged)
 @app.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/chat', methods=['POST'])
-def chat():
-    try:
-        data = request.get_json()
-        user_message = data.get('message', '').strip()
-        messages = data.get('messages', [])
-        state = data.get('state', 'normal')
-
-        if not messages:
-            system_instruction = orch.initialise_conversation()
-            messages = [system_instruction]
-
-        # GREETING
-        if len(messages) == 1:
-            prompt = (
-                f"Check if the following message is either a greeting or a request for help. "
-                f"Consider possible spelling mistakes or typos. "
-                f"Respond only with 'yes' if it is a greeting/request for help, or 'no' otherwise. "
-                f"Message: '{user_message}'"
-            )
-            response = openai.chat.completions.create(
-                model=MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0
+def open_turn(user_message, messages):
+    """
+    Handles everything that happens before the assistant is asked for a reply:
+    conversation start, greeting, exit and moderation of the user message.
+    Returns the messages and a response payload when the turn ends early, otherwise None.
+    """
+    if not messages:
+        system_instruction = orch.initialise_conversation()
+        messages = [system_instruction]
+
+    # GREETING
+    if len(messages) == 1:
+        greeting_result = orch.greeting_check(user_message)
+        if greeting_result == "yes":
+            assistant_message = (
+                "Hello there! I am here to help you. I am your personal laptop assistant. "
+                "What kind of laptop are you looking for?"
             )
-            greeting_result = response.choices[0].message.content.strip().lower()
-            if greeting_result == "yes":
-                assistant_message = (
-                    "Hello there! I am here to help you. I am your personal laptop assistant. "
-                    "What kind of laptop are you looking for?"
-                )
-                messages.append({'role': 'assistant', 'content': assistant_message})
-                return jsonify({
-                    'message': assistant_message,
-                    'messages': messages,
-                    'state': 'normal'
-                })
-
-        if user_message.lower() in ["exit", "quit"]:
-            return jsonify({
-                'message': "👋 Exiting conversation.",
-                'messages': messages,
-                'state': 'ended'
-            })
-
-        if orch.moderation_check(user_message) == 'flagged':
-            messages = [messages[0]]
-            return jsonify({
-                'message': 'Your conversation has been flagged, restart the conversation.',
+            messages.append({'role': 'assistant', 'content': assistant_message})
+            return messages, {
+                'message': assistant_message,
                 'messages': messages,
                 'state': 'normal'
-            })
+            }
 
-        messages.append({'role': 'user', 'content': user_message})
+    if user_message.lower() in ["exit", "quit"]:
+        return messages, {
+            'message': "👋 Exiting conversation.",
+            'messages': messages,
+            'state': 'ended'
+        }
 
-        assistant_response = orch.get_chat_completion(messages)
-        if orch.moderation_check(assistant_response) == 'flagged':
-            messages = [messages[0]]
-            return jsonify({
-                'message': 'Your conversation has been flagged, restart the conversation.',
-                'messages': messages,
-                'state': 'normal'
-            })
+    if orch.moderation_check(user_message) == 'flagged':
+        messages = [messages[0]]
+        return messages, {
+            'message': 'Your conversation has been flagged, restart the conversation.',
+            'messages': messages,
+            'state': 'normal'
+        }
 
-        assistant_response_filtered = orch.filter_json_from_response(assistant_response)
-        messages.append({'role': 'assistant', 'content': assistant_response})
-
-        check_intent_confirmation = orch.intent_confirmation_check(assistant_response)
-        if isinstance(check_intent_confirmation, dict):
-            result = check_intent_confirmation.get("result", "").lower()
-            if result == "yes":
-                intent_confirmed_text = orch.dictionary_present_check(assistant_response)
-                recommended_product = orch.start_product_recommendation(input_message=intent_confirmed_text)
-                final_message = (
-                    assistant_response_filtered +
-                    ("\n\n" + recommended_product if recommended_product else "") +
-                    "\n\nHope I have solved your request. Did this help you? (yes/no)"
-                )
-                filtered_final_message = filter_error_lines(final_message)
-                return jsonify({
-                    'message': filtered_final_message,
-                    'messages': messages,
-                    'state': 'awaiting_feedback'
-                })
-            elif result == "no":
-                filtered_message = filter_error_lines(assistant_response_filtered)
-                return jsonify({
-                    'message': filtered_message,
-                    'messages': messages,
-                    'state': 'normal'
-                })
-
-        filtered_response = filter_error_lines(assistant_response_filtered)
-        return jsonify({
-            'message': filtered_response,
+    messages.append({'role': 'user', 'content': user_message})
+    return messages, None
+
+def close_turn(assistant_response, messages):
+    """
+    Post-processes the completed assistant reply and builds the response payload.
+    When the user intent is confirmed the payload also carries the 'recommendation' block.
+    """
+    turn_result = orch.run_turn_post_processing(assistant_response)
+    if turn_result['flagged']:
+        messages = [messages[0]]
+        return {
+            'message': 'Your conversation has been flagged, restart the conversation.',
             'messages': messages,
             'state': 'normal'
-        })
+        }
+
+    assistant_response_filtered = turn_result['filtered_response']
+    messages.append({'role': 'assistant', 'content': assistant_response})
+
+    user_profile = turn_result['user_profile']
+    if user_profile:
+        recommended_product = orch.start_product_recommendation(input_message=user_profile)
+        final_message = (
+            assistant_response_filtered +
+            ("\n\n" + recommended_product if recommended_product else "") +
+            "\n\nHope I have solved your request. Did this help you? (yes/no)"
+        )
+        return {
+            'message': filter_error_lines(final_message),
+            'messages': messages,
+            'state': 'awaiting_feedback',
+            'recommendation': recommended_product
+        }
+
+    filtered_response = filter_error_lines(assistant_response_filtered)
+    return {
+        'message': filtered_response,
+        'messages': messages,
+        'state': 'normal'
+    }
+
+@app.route('/chat', methods=['POST'])
+def chat():
+    try:
+        data = request.get_json()
+        user_message = data.get('message', '').strip()
+        messages = data.get('messages', [])
+
+        messages, payload = open_turn(user_message, messages)
+        if payload is None:
+            assistant_response = orch.get_chat_completion(messages)
+            payload = close_turn(assistant_response, messages)
+            payload.pop('recommendation', None)
+        return jsonify(payload)
 
     except Exception as e:
         print(f"Error: {str(e)}")
@@ -147,6 +132,49 @@ def chat():
             'state': 'error'
         }), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Server-Sent-Events variant of /chat. Assistant tokens are sent as 'token' events while
+    they arrive; moderation, JSON filtering and intent confirmation run on the completed text
+    and go out as a trailing 'recommendation' event (when intent is confirmed) and a 'final'
+    event carrying the same payload /chat would have returned.
+    """
+    data = request.get_json()
+    user_message = data.get('message', '').strip()
+    messages = data.get('messages', [])
+
+    def generate():
+        nonlocal messages
+        try:
+            messages, payload = open_turn(user_message, messages)
+            if payload is None:
+                chunks = []
+                for delta in orch.stream_chat_completion(messages):
+                    chunks.append(delta)
+                    yield format_sse_event('token', {'content': delta})
+
+                payload = close_turn(''.join(chunks), messages)
+                recommendation = payload.pop('recommendation', None)
+                if recommendation:
+                    yield format_sse_event('recommendation', {'content': recommendation})
+
+            yield format_sse_event('final', payload)
+
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            yield format_sse_event('error', {
+                'message': f'Error: {str(e)}',
+                'messages': messages,
+                'state': 'error'
+            })
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/feedback', methods=['POST'])
 def feedback():
     try:
@@ -0,0 +1,247 @@
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route, Mount
+from starlette.staticfiles import StaticFiles
+from starlette.templating import Jinja2Templates
+from src.backend.async_orchestrator import AsyncOrchestrator
+from src.backend.catalog_cache import catalog_cache
+from src.utils import filter_error_lines, format_sse_event
+from mangum import Mangum
+import sys
+import os
+
+# Ensure current directory is in sys.path
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+# ASGI variant of app.py: the same conversation flow, but every LLM call is awaited
+# so a single process can hold many concurrent conversations.
+templates = Jinja2Templates(directory='src/frontend/templates')
+# index.html uses Flask's url_for('static', filename=...) signature
+templates.env.globals['url_for'] = lambda endpoint, filename='': f"/{endpoint}/{filename}"
+
+orch = AsyncOrchestrator()
+# load the laptop catalog in the background so the first recommendation does not wait on the database
+catalog_cache.warm_up()
+
+
+def error_response(e: Exception, messages: list) -> JSONResponse:
+    print(f"Error: {str(e)}")
+    return JSONResponse({
+        'message': f'Error: {str(e)}',
+        'messages': messages,
+        'state': 'error'
+    }, status_code=500)
+
+
+async def index(request: Request):
+    return templates.TemplateResponse(request, 'index.html')
+
+
+async def open_turn(user_message: str, messages: list):
+    """
+    Handles conversation start, greeting, exit and moderation of the user message.
+    Returns the messages and a response payload when the turn ends early, otherwise None.
+    """
+    if not messages:
+        system_instruction = orch.initialise_conversation()
+        messages = [system_instruction]
+
+    # GREETING
+    if len(messages) == 1:
+        greeting_result = await orch.greeting_check(user_message)
+        if greeting_result == "yes":
+            assistant_message = (
+                "Hello there! I am here to help you. I am your personal laptop assistant. "
+                "What kind of laptop are you looking for?"
+            )
+            messages.append({'role': 'assistant', 'content': assistant_message})
+            return messages, {
+                'message': assistant_message,
+                'messages': messages,
+                'state': 'normal'
+            }
+
+    if user_message.lower() in ["exit", "quit"]:
+        return messages, {
+            'message': "👋 Exiting conversation.",
+            'messages': messages,
+            'state': 'ended'
+        }
+
+    if await orch.moderation_check(user_message) == 'flagged':
+        messages = [messages[0]]
+        return messages, {
+            'message': 'Your conversation has been flagged, restart the conversation.',
+            'messages': messages,
+            'state': 'normal'
+        }
+
+    messages.append({'role': 'user', 'content': user_message})
+    return messages, None
+
+
+async def close_turn(assistant_response: str, messages: list) -> dict:
+    """
+    Post-processes the completed assistant reply and builds the response payload.
+    When the user intent is confirmed the payload also carries the 'recommendation' block.
+    """
+    turn_result = await orch.run_turn_post_processing(assistant_response)
+    if turn_result['flagged']:
+        messages = [messages[0]]
+        return {
+            'message': 'Your conversation has been flagged, restart the conversation.',
+            'messages': messages,
+            'state': 'normal'
+        }
+
+    assistant_response_filtered = turn_result['filtered_response']
+    messages.append({'role': 'assistant', 'content': assistant_response})
+
+    user_profile = turn_result['user_profile']
+    if user_profile:
+        recommended_product = await orch.start_product_recommendation(input_message=user_profile)
+        final_message = (
+            assistant_response_filtered +
+            ("\n\n" + recommended_product if recommended_product else "") +
+            "\n\nHope I have solved your request. Did this help you? (yes/no)"
+        )
+        return {
+            'message': filter_error_lines(final_message),
+            'messages': messages,
+            'state': 'awaiting_feedback',
+            'recommendation': recommended_product
+        }
+
+    return {
+        'message': filter_error_lines(assistant_response_filtered),
+        'messages': messages,
+        'state': 'normal'
+    }
+
+
+async def chat(request: Request):
+    messages = []
+    try:
+        data = await request.json()
+        user_message = data.get('message', '').strip()
+        messages = data.get('messages', [])
+
+        messages, payload = await open_turn(user_message, messages)
+        if payload is None:
+            assistant_response = await orch.get_chat_completion(messages)
+            payload = await close_turn(assistant_response, messages)
+            payload.pop('recommendation', None)
+        return JSONResponse(payload)
+
+    except Exception as e:
+        return error_response(e, messages)
+
+
+async def chat_stream(request: Request):
+    """
+    Server-Sent-Events variant of /chat, see app.chat_stream for the event protocol.
+    """
+    data = await request.json()
+    user_message = data.get('message', '').strip()
+    messages = data.get('messages', [])
+
+    async def generate():
+        nonlocal messages
+        try:
+            messages, payload = await open_turn(user_message, messages)
+            if payload is None:
+                chunks = []
+                async for delta in orch.stream_chat_completion(messages):
+                    chunks.append(delta)
+                    yield format_sse_event('token', {'content': delta})
+
+                payload = await close_turn(''.join(chunks), messages)
+                recommendation = payload.pop('recommendation', None)
+                if recommendation:
+                    yield format_sse_event('recommendation', {'content': recommendation})
+
+            yield format_sse_event('final', payload)
+
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            yield format_sse_event('error', {
+                'message': f'Error: {str(e)}',
+                'messages': messages,
+                'state': 'error'
+            })
+
+    return StreamingResponse(
+        generate(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+async def feedback(request: Request):
+    messages = []
+    try:
+        data = await request.json()
+        user_message = data.get('message', '').strip()
+        messages = data.get('messages', [])
+
+        messages.append({'role': 'user', 'content': user_message})
+
+        if user_message.strip().lower() in ['yes', 'y', 'yeah', 'yep', 'sure', 'of course', 'thanks']:
+            rating_prompt = (
+                "Thank you for your interest! I'm glad I could assist you.\n"
+                "Would you mind rating my support on a scale of 1 (worst) to 5 (best)?"
+            )
+            messages.append({'role': 'assistant', 'content': rating_prompt})
+            return JSONResponse({
+                'message': rating_prompt,
+                'messages': messages,
+                'state': 'awaiting_rating'
+            })
+
+        assistant_response = await orch.route_to_human_agent(user_message)
+        messages.append({'role': 'assistant', 'content': assistant_response})
+        return JSONResponse({
+            'message': assistant_response,
+            'messages': messages,
+            'state': 'ended'
+        })
+    except Exception as e:
+        return error_response(e, messages)
+
+
+async def rate(request: Request):
+    messages = []
+    try:
+        data = await request.json()
+        user_message = data.get('message', '').strip()
+        messages = data.get('messages', [])
+
+        messages.append({'role': 'user', 'content': user_message})
+
+        chat_ended_message = "Thank you for your valuable feedback! Chat ended."
+        messages.append({'role': 'assistant', 'content': chat_ended_message})
+        return JSONResponse({
+            'message': chat_ended_message,
+            'messages': messages,
+            'state': 'ended'
+        })
+    except Exception as e:
+        return error_response(e, messages)
+
+
+app = Starlette(routes=[
+    Route('/', index),
+    Route('/chat', chat, methods=['POST']),
+    Route('/chat/stream', chat_stream, methods=['POST']),
+    Route('/feedback', feedback, methods=['POST']),
+    Route('/rate', rate, methods=['POST']),
+    Mount('/static', app=StaticFiles(directory='src/frontend/static'), name='static'),
+])
+
+# AWS Lambda entry point for the ASGI app.
+lambda_handler = Mangum(app)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=8000)
@@ -0,0 +1,138 @@
+"""
+Offline accuracy and latency benchmark of the local GreetingClassifier against the LLM greeting check,
+on labelled first messages held out from the classifier's training examples.
+
+Usage (from the repository root):
+    python benchmarks/greeting_classifier_benchmark.py              # local classifier only
+    python benchmarks/greeting_classifier_benchmark.py --llm        # also time the current LLM path
+    python benchmarks/greeting_classifier_benchmark.py --threshold 0.6
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.backend.greeting_classifier import GreetingClassifier
+from src.backend.prompts import GreetingCheck
+from src.constants import MODEL, OPENAI_API_KEY, GREETING_CONFIDENCE_THRESHOLD
+
+# (first message, expected answer of the greeting check). Held out: none of these is one of the classifier's
+# positive_examples / negative_examples, so the accuracy below is not measured on the trigram model's training data.
+LABELLED_MESSAGES = [
+    ('Hello, good day!', 'yes'), ('Hey, good afternoon', 'yes'), ('hi team', 'yes'), ('heyyy there', 'yes'),
+    ('hello, anyone there?', 'yes'), ('good morning sir', 'yes'), ('hiya', 'yes'), ('greetings', 'yes'),
+    ('hey, i need some guidance', 'yes'), ('can you guide me', 'yes'), ('I could use some help', 'yes'),
+    ('please assist', 'yes'), ('hi! could you recommend something?', 'yes'), ('hello, looking for a laptop', 'yes'),
+    ('namaskar', 'yes'), ("yo, what's up", 'yes'), ('hey assistant, help please', 'yes'),
+    ('good evening, can you help', 'yes'), ('hello, i want to buy a laptop', 'yes'), ('need your advice please', 'yes'),
+    ('namste', 'yes'), ('good evning', 'yes'), ('hlep me please', 'yes'), ('halo', 'yes'),
+    ('I mainly use AutoCAD and Revit', 'no'), ('around 70k is my limit', 'no'), ('gaming at 144hz on a budget', 'no'),
+    ('need something for data science with a good GPU', 'no'), ('which one has the best battery backup', 'no'),
+    ('light enough to carry on flights', 'no'), ('I am a software developer', 'no'), ('can it run Photoshop smoothly', 'no'),
+    ('show me lenovo thinkpads', 'no'), ('quit', 'no'), ('under 45000 rupees', 'no'),
+    ('my son needs it for online classes', 'no'), ('16 inch screen with ryzen 7', 'no'), ('hell', 'no'),
+    ('what about apple', 'no'), ('cheap one for netflix', 'no'), ('I stream on twitch', 'no'),
+    ('compare hp and asus', 'no'), ('budget is not a constraint', 'no'), ('need a 2 in 1 touchscreen', 'no'),
+]
+
+
+def training_overlap():
+    """
+    Held-out messages that normalize to one of the classifier's training examples (should be none).
+    """
+    training = {GreetingClassifier.normalize(example)
+                for example in GreetingClassifier.positive_examples + GreetingClassifier.negative_examples}
+    return [message for message, _ in LABELLED_MESSAGES if GreetingClassifier.normalize(message) in training]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def describe_latency(name, seconds):
+    micro = [s * 1e6 for s in seconds]
+    print(f"{name:<28} p50={percentile(micro, 50):>10.1f}us  p95={percentile(micro, 95):>10.1f}us  "
+          f"p99={percentile(micro, 99):>10.1f}us  mean={statistics.mean(micro):>10.1f}us")
+
+
+def run_local(classifier, repeats):
+    latencies, predictions = [], []
+    for message, _ in LABELLED_MESSAGES:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            label, confidence = classifier.classify(message)
+            latencies.append(time.perf_counter() - start)
+        predictions.append((label, confidence))
+    return predictions, latencies
+
+
+def run_llm():
+    import openai
+    openai.api_key = OPENAI_API_KEY
+    latencies, predictions = [], []
+    for message, _ in LABELLED_MESSAGES:
+        start = time.perf_counter()
+        response = openai.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": GreetingCheck.instruction.format(message=message)}],
+            temperature=0
+        )
+        latencies.append(time.perf_counter() - start)
+        predictions.append(response.choices[0].message.content.strip().lower())
+    return predictions, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threshold', type=float, default=GREETING_CONFIDENCE_THRESHOLD)
+    parser.add_argument('--repeats', type=int, default=200, help='timing repetitions per message for the local path')
+    parser.add_argument('--llm', action='store_true', help='also run the current LLM path (needs OPENAI_API_KEY)')
+    args = parser.parse_args()
+
+    classifier = GreetingClassifier(threshold=args.threshold)
+    expected = [label for _, label in LABELLED_MESSAGES]
+    local_predictions, local_latencies = run_local(classifier, args.repeats)
+
+    confident = [i for i, (_, confidence) in enumerate(local_predictions) if classifier.is_confident(confidence)]
+    local_accuracy = sum(local_predictions[i][0] == expected[i] for i in range(len(expected))) / len(expected)
+    confident_accuracy = (
+        sum(local_predictions[i][0] == expected[i] for i in confident) / len(confident) if confident else 0.0
+    )
+
+    overlap = training_overlap()
+    if overlap:
+        sys.exit(f"held-out messages overlap the training examples: {overlap}")
+
+    print(f"held-out messages: {len(expected)}  threshold: {args.threshold}")
+    print(f"local accuracy (all messages):         {local_accuracy:.1%}")
+    print(f"local accuracy (confident messages):   {confident_accuracy:.1%}")
+    print(f"answered locally (no LLM fallback):    {len(confident) / len(expected):.1%}")
+    print(f"LLM fallback rate:                     {1 - len(confident) / len(expected):.1%}")
+    describe_latency('local classifier', local_latencies)
+
+    for i, (message, label) in enumerate(LABELLED_MESSAGES):
+        predicted, confidence = local_predictions[i]
+        if predicted != label and classifier.is_confident(confidence):
+            print(f"  confident miss: {message!r} -> {predicted} ({confidence}), expected {label}")
+
+    if args.llm:
+        llm_predictions, llm_latencies = run_llm()
+        llm_accuracy = sum(p == e for p, e in zip(llm_predictions, expected)) / len(expected)
+        hybrid = [
+            local_predictions[i][0] if i in confident else llm_predictions[i] for i in range(len(expected))
+        ]
+        hybrid_accuracy = sum(p == e for p, e in zip(hybrid, expected)) / len(expected)
+        agreement = sum(local_predictions[i][0] == llm_predictions[i] for i in confident) / len(confident) if confident else 0.0
+        print(f"LLM accuracy:                          {llm_accuracy:.1%}")
+        print(f"hybrid accuracy (local + fallback):    {hybrid_accuracy:.1%}")
+        print(f"local/LLM agreement (confident):       {agreement:.1%}")
+        describe_latency('LLM greeting check', llm_latencies)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Agreement report of the local RuleBasedMapper against the existing mapped_dictionary values
+(the LLM mappings) of a mapped catalog file: rule coverage, per-attribute agreement,
+confusion counts and the raw values no rule recognized.
+
+Usage (from the repository root):
+    python benchmarks/mapping_agreement_report.py
+    python benchmarks/mapping_agreement_report.py --file src/database/laptop_data_mapped.parquet --disagreements disagreements.csv
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.backend.catalog_features import normalize_mapped_dictionary
+from src.backend.rule_mapper import RuleBasedMapper, RULE_COLUMNS
+from src.constants import MAPPED_ATTRIBUTES, MAPPED_COLUMN, MAPPED_DATA_FILE_PATH
+from src.utils import read_structured_file
+
+LEVELS = ['low', 'medium', 'high']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', default=MAPPED_DATA_FILE_PATH, help='mapped catalog (csv / parquet / json) with a mapped_dictionary column')
+    parser.add_argument('--disagreements', help='write the rows where rules and LLM disagree to this csv')
+    args = parser.parse_args()
+
+    data = read_structured_file(args.file)
+    if MAPPED_COLUMN not in data.columns:
+        sys.exit(f"{args.file} has no '{MAPPED_COLUMN}' column to compare against.")
+
+    mapper = RuleBasedMapper()
+    rules = mapper.levels(data)
+    llm = pd.DataFrame(
+        [normalize_mapped_dictionary(value)[0] for value in data[MAPPED_COLUMN]],
+        index=data.index, columns=MAPPED_ATTRIBUTES
+    )
+    covered = rules.notna().all(axis=1)
+    print(f"rows: {len(data)}, fully mapped by rules: {int(covered.sum())} ({covered.mean():.1%}), "
+          f"left for the LLM: {int((~covered).sum())}\n")
+
+    print(f"{'attribute':<18} {'compared':>8} {'agree':>7}  confusion (rows = rules, columns = LLM)")
+    disagreeing = pd.Series(False, index=data.index)
+    for attribute in MAPPED_ATTRIBUTES:
+        both = rules[attribute].notna() & llm[attribute].notna()
+        agree = rules.loc[both, attribute] == llm.loc[both, attribute]
+        disagreeing |= both & (rules[attribute] != llm[attribute])
+        rate = f"{agree.mean():.1%}" if both.any() else '-'
+        print(f"{attribute:<18} {int(both.sum()):>8} {rate:>7}")
+        if both.any():
+            confusion = pd.crosstab(rules.loc[both, attribute], llm.loc[both, attribute]).reindex(index=LEVELS, columns=LEVELS, fill_value=0).rename_axis(index=None, columns=None)
+            for line in confusion.to_string().splitlines():
+                print(f"{'':<36}{line}")
+
+    unrecognized = mapper.unrecognized(data)
+    if unrecognized:
+        print("\nvalues without a rule (mapped by the LLM):")
+        for attribute, values in unrecognized.items():
+            print(f"  {attribute} ({', '.join(RULE_COLUMNS[attribute])}): {values}")
+
+    if args.disagreements:
+        columns = [column for columns in RULE_COLUMNS.values() for column in columns if column in data.columns]
+        report = data.loc[disagreeing, columns].join(rules.loc[disagreeing].add_prefix('rules: ')).join(llm.loc[disagreeing].add_prefix('llm: '))
+        report.to_csv(args.disagreements)
+        print(f"\n{int(disagreeing.sum())} disagreeing rows written to {args.disagreements}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark of the PostgreSQL catalog write paths: executemany INSERT (one statement per row,
+PostgresDataBaseUpdate.insert_rows) against COPY ... FROM STDIN (PostgresDataBaseUpdate.copy_rows),
+on synthetic catalogs of 10k, 100k and 1M rows. Needs the POSTGRES_* environment variables;
+every run writes into a scratch table inside a transaction that is rolled back.
+
+Usage (from the repository root):
+    python benchmarks/postgres_write_benchmark.py
+    python benchmarks/postgres_write_benchmark.py --sizes 10000 100000 --insert-max-rows 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.io.sql import get_schema
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.constants import MAPPED_ATTRIBUTES, MAPPED_COLUMN, MAPPED_LEVEL_COLUMNS, PRICE_VALUE_COLUMN
+from src.database.aiven_posgresql_update import PostgresDataBaseUpdate
+from src.database.postgres_pool import postgres_pool
+
+TABLE_NAME = 'laptops_write_benchmark'
+LEVEL_NAMES = np.array(['low', 'medium', 'high'])
+
+
+def synthetic_catalog(rows, seed=11):
+    rng = np.random.default_rng(seed)
+    levels = rng.integers(1, 4, size=(rows, len(MAPPED_ATTRIBUTES)), dtype=np.int8)
+    prices = rng.integers(20_000, 300_000, size=rows)
+    frame = pd.DataFrame({
+        'Brand': rng.choice(['Dell', 'HP', 'Lenovo', 'Asus', 'Apple'], size=rows),
+        'Model Name': [f"Model {i}" for i in range(rows)],
+        'Core': rng.choice(['i3', 'i5', 'i7', 'Ryzen 5'], size=rows),
+        'RAM Size': rng.choice(['8GB', '16GB', '32GB'], size=rows),
+        'Price': [f"{price:,}" for price in prices],
+        'Description': [f"Synthetic laptop {i} with a description long enough to look like a catalog entry." for i in range(rows)],
+    })
+    frame[MAPPED_COLUMN] = [
+        {attribute: LEVEL_NAMES[level - 1] for attribute, level in zip(MAPPED_ATTRIBUTES, row)} for row in levels
+    ]
+    frame[PRICE_VALUE_COLUMN] = prices
+    for i, column in enumerate(MAPPED_LEVEL_COLUMNS.values()):
+        frame[column] = levels[:, i]
+    return frame
+
+
+def time_write(updater, write, frame):
+    with postgres_pool.connection(statement_timeout_ms=0) as conn:
+        with conn.cursor() as cur:
+            cur.execute(get_schema(frame, TABLE_NAME, con=conn, dtype=updater.column_types(list(frame.columns))))
+            start = time.perf_counter()
+            write(cur, TABLE_NAME, frame)
+            elapsed = time.perf_counter() - start
+            cur.execute(f'SELECT count(*) FROM "{TABLE_NAME}"')
+            written = cur.fetchone()[0]
+        conn.rollback()
+    return elapsed, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--insert-max-rows', type=int, default=100_000,
+                        help='skip the executemany path above this many rows, it is too slow to be useful')
+    args = parser.parse_args()
+
+    updater = PostgresDataBaseUpdate()
+    print(f"{'rows':>10}  {'COPY':>10}  {'rows/s':>10}  {'executemany':>12}  {'rows/s':>10}  {'speedup':>8}")
+    for rows in args.sizes:
+        frame = synthetic_catalog(rows)
+        copy_seconds, written = time_write(updater, updater.copy_rows, frame)
+        assert written == rows, f"COPY wrote {written} of {rows} rows"
+        line = f"{rows:>10}  {copy_seconds:>9.2f}s  {rows / copy_seconds:>10.0f}"
+        if rows > args.insert_max_rows:
+            print(f"{line}  {'skipped':>12}  {'-':>10}  {'-':>8}")
+            continue
+        insert_seconds, written = time_write(updater, updater.insert_rows, frame)
+        assert written == rows, f"executemany wrote {written} of {rows} rows"
+        print(f"{line}  {insert_seconds:>11.2f}s  {rows / insert_seconds:>10.0f}  {insert_seconds / copy_seconds:>7.1f}x")
+    postgres_pool.closeall()
+
+
+if __name__ == '__main__':
+    main()
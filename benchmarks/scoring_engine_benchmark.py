@@ -0,0 +1,87 @@
+"""
+Benchmark of the vectorized ScoringEngine against the previous scoring path
+(to_dict records -> ProductMapper.map_the_score -> per-row data.at write-back -> full sort),
+on synthetic catalogs from 1k to 1M rows.
+
+Usage (from the repository root):
+    python benchmarks/scoring_engine_benchmark.py
+    python benchmarks/scoring_engine_benchmark.py --sizes 1000 10000 --legacy-max-rows 10000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.backend.product_mapper import ProductMapper
+from src.backend.scoring_engine import ScoringEngine
+from src.constants import MAPPED_ATTRIBUTES, MAPPED_LEVEL_COLUMNS, PRICE_VALUE_COLUMN
+
+LEVEL_NAMES = np.array(['low', 'medium', 'high'])
+USER_PROFILE = {'user_req': {
+    'GPU intensity': 'high', 'Display quality': 'medium', 'Portability': 'low',
+    'Multitasking': 'high', 'Processing speed': 'medium', 'Budget': '150000'
+}}
+
+
+def synthetic_catalog(rows, seed=7):
+    rng = np.random.default_rng(seed)
+    levels = rng.integers(1, 4, size=(rows, len(MAPPED_ATTRIBUTES)), dtype=np.int8)
+    frame = pd.DataFrame({column: levels[:, i] for i, column in enumerate(MAPPED_LEVEL_COLUMNS.values())})
+    frame[PRICE_VALUE_COLUMN] = rng.integers(20_000, 300_000, size=rows)
+    # the previous path scored the attribute values of each record as 'low' / 'medium' / 'high' strings
+    for i, attribute in enumerate(MAPPED_ATTRIBUTES):
+        frame[attribute] = LEVEL_NAMES[levels[:, i] - 1]
+    return frame
+
+
+def legacy_rank(data, user_profile, k=10):
+    records = data[MAPPED_ATTRIBUTES].to_dict(orient='records')
+    scored_records = ProductMapper().map_the_score(records, user_profile)
+    data = data.copy()
+    for i, record in enumerate(scored_records):
+        data.at[i, 'score'] = sum(v for v in record.values() if isinstance(v, int))
+    return data.sort_values(by='score', ascending=False).head(k)
+
+
+def time_call(function, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=5, help='timing repetitions per size (median reported)')
+    parser.add_argument('--legacy-max-rows', type=int, default=100_000,
+                        help='skip the previous scoring path above this many rows, it is too slow to be useful')
+    args = parser.parse_args()
+
+    engine = ScoringEngine()
+    print(f"{'rows':>10}  {'vectorized':>12}  {'previous':>12}  {'speedup':>8}  top-k scores agree")
+    for rows in args.sizes:
+        catalog = synthetic_catalog(rows)
+        fast, fast_seconds = time_call(lambda: engine.rank(catalog, USER_PROFILE, k=args.top_k), args.repeats)
+
+        if rows > args.legacy_max_rows:
+            print(f"{rows:>10}  {fast_seconds * 1e3:>10.2f}ms  {'skipped':>12}  {'-':>8}  -")
+            continue
+
+        slow, slow_seconds = time_call(lambda: legacy_rank(catalog, USER_PROFILE, k=args.top_k), max(1, args.repeats // 5))
+        agree = sorted(fast['score'].tolist()) == sorted(int(s) for s in slow['score'].tolist())
+        print(f"{rows:>10}  {fast_seconds * 1e3:>10.2f}ms  {slow_seconds * 1e3:>10.2f}ms  "
+              f"{slow_seconds / fast_seconds:>7.0f}x  {agree}")
+
+
+if __name__ == '__main__':
+    main()
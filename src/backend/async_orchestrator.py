@@ -0,0 +1,336 @@
+from src.backend.prompts import AIToAgentShift, GreetingCheck, TurnAnalyzer
+from src.backend.orchestrator import Orchestrator
+from src.backend.response_sanitizer import sanitize_assistant_response
+from src.backend.profile_detector import AMBIGUOUS
+from src.backend.completion_cache import acached_chat_completion, acached_moderation_flagged
+from src.logging import logging
+from tenacity import retry, wait_random_exponential, stop_after_attempt
+from src.constants import MODEL, MODERATION_MODEL, OPENAI_API_KEY, RESPONSE_FILTER_MODE
+from typing import Union, Optional, Dict, AsyncIterator
+import asyncio
+import openai
+import json
+
+logger = logging()
+
+
+class AsyncOrchestrator(Orchestrator):
+    """
+    Asyncio counterpart of Orchestrator built on the async OpenAI client.
+    The LLM-facing methods are coroutines so an ASGI server can keep many conversations
+    in flight on a single event loop; prompt handling and profile parsing are inherited.
+    """
+    def __init__(self):
+        super().__init__()
+        logger.info("[__init__] AsyncOrchestrator instance created.")
+        self.client = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+    async def greeting_check(self, input_message: str) -> str:
+        """
+        This method checks if the first message is a greeting or a request for help,
+        using the local classifier first and the LLM only for low-confidence inputs.
+        """
+        try:
+            label, confidence = self.greeting_classifier.classify(input_message)
+            if self.greeting_classifier.is_confident(confidence):
+                logger.info(f"[greeting_check] Local classifier result: {label} (confidence={confidence})")
+                return label
+
+            logger.info(f"[greeting_check] Low confidence ({confidence}), falling back to the LLM.")
+            return await self.llm_greeting_check(input_message)
+
+        except Exception as e:
+            logger.error(f"[greeting_check] Error occurred in async greeting_check: {e}")
+            raise
+
+    async def llm_greeting_check(self, input_message: str) -> str:
+        """
+        This method asks the LLM if the message is a greeting or a request for help.
+        """
+        response = await acached_chat_completion(
+            self.client,
+            model=MODEL,
+            messages=[{"role": "user", "content": GreetingCheck.instruction.format(message=input_message)}],
+            temperature=0
+        )
+        return response.strip().lower()
+
+    @retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(6))
+    async def get_chat_completion(self, input_messages: list, json_format: bool = False) -> Union[str, Optional[Dict]]:
+        """
+        This function is used for chat completion.
+        """
+        try:
+            logger.info(f"[get_chat_completion] Entered async get_chat_completion with json_format={json_format} and input_messages={input_messages}")
+            system_message_json_output = "<<. Return the output in JSON format to the key output. >>"
+
+            if json_format:
+                logger.info("[get_chat_completion] Appending JSON instruction to the last user message.")
+                input_messages[-1]['content'] += system_message_json_output
+
+                # the conversation itself is never cached
+                message = await acached_chat_completion(
+                    self.client,
+                    cacheable=False,
+                    model=MODEL,
+                    messages=input_messages,
+                    response_format={'type': 'json_object'},
+                    seed=1234
+                )
+                output = json.loads(message)
+                logger.info(f"[get_chat_completion] Received JSON response: {output}")
+
+            else:
+                output = await acached_chat_completion(
+                    self.client,
+                    cacheable=False,
+                    model=MODEL,
+                    messages=input_messages,
+                    seed=2345
+                )
+                logger.info(f"[get_chat_completion] Received text response: {output}")
+
+            return output
+
+        except Exception as e:
+            logger.error(f"[get_chat_completion] Error occurred in async get_chat_completion: {e}")
+            raise
+
+    async def stream_chat_completion(self, input_messages: list) -> AsyncIterator[str]:
+        """
+        This function streams the chat completion, yielding the text deltas as they arrive.
+        """
+        try:
+            logger.info(f"[stream_chat_completion] Streaming async chat completion for input_messages={input_messages}")
+            # the conversational reply is sampled and carries the user's conversation: never cached
+            stream = await self.client.chat.completions.create(model=MODEL, messages=input_messages, seed=2345, stream=True)
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        except Exception as e:
+            logger.error(f"[stream_chat_completion] Error occurred in async stream_chat_completion: {e}")
+            raise
+
+    async def moderation_check(self, input_message: str) -> str:
+        """
+        This function is used to check for hatefull messages.
+        """
+        try:
+            logger.info(f"[moderation_check] Checking moderation for message: {input_message}")
+            flagged = await acached_moderation_flagged(self.client, MODERATION_MODEL, input_message)
+            flagged_status = 'flagged' if flagged else 'not flagged'
+            logger.info(f"[moderation_check] Moderation result: {flagged_status}")
+            return flagged_status
+        except Exception as e:
+            logger.error(f"[moderation_check] Error occurred in async moderation_check: {e}")
+            raise
+
+    async def run_turn_post_processing(self, assistant_response: str) -> Dict[str, Union[str, bool, Dict, None]]:
+        """
+        This method runs the post-processing of a chat turn concurrently on the event loop.
+        Filtering and profile detection are local; a single analyze_turn call covers the
+        LLM filter mode and ambiguous profiles. If moderation flags the response, it is cancelled.
+        """
+        try:
+            logger.info("[run_turn_post_processing] Gathering moderation, JSON filtering and profile detection.")
+            moderation_task = asyncio.ensure_future(self.moderation_check(assistant_response))
+            outcome, user_profile = self.profile_detector.detect(assistant_response)
+            analysis_task = None
+            if RESPONSE_FILTER_MODE == 'llm' or outcome == AMBIGUOUS:
+                logger.info(f"[run_turn_post_processing] Asking the turn analyzer (filter mode: {RESPONSE_FILTER_MODE}, profile: {outcome}).")
+                analysis_task = asyncio.ensure_future(self.analyze_turn(assistant_response))
+
+            try:
+                flagged = await moderation_task == 'flagged'
+            except Exception:
+                if analysis_task:
+                    await self.cancel_task(analysis_task)
+                raise
+
+            if flagged:
+                logger.info("[run_turn_post_processing] Assistant response flagged, cancelling remaining calls.")
+                if analysis_task:
+                    await self.cancel_task(analysis_task)
+                return {
+                    'flagged': True,
+                    'filtered_response': None,
+                    'user_profile': None
+                }
+
+            analysis = await analysis_task if analysis_task else None
+            result = {
+                'flagged': False,
+                'filtered_response': analysis['display_text'] if analysis and RESPONSE_FILTER_MODE == 'llm' else sanitize_assistant_response(assistant_response),
+                'user_profile': analysis['user_profile'] if analysis and outcome == AMBIGUOUS else user_profile
+            }
+            logger.info(f"[run_turn_post_processing] Post-processing completed: {result}")
+            return result
+
+        except Exception as e:
+            logger.error(f"[run_turn_post_processing] Error occurred in async run_turn_post_processing: {e}")
+            raise
+
+    @staticmethod
+    async def cancel_task(task: asyncio.Future) -> None:
+        """
+        Cancels a side task and waits for it, so it is never left pending and an error it already raised is logged.
+        """
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"[cancel_task] Cancelled task had already failed: {e}")
+
+    async def analyze_turn(self, assistant_response: str) -> Dict[str, Union[str, bool, Dict, None]]:
+        """
+        Single structured call returning the cleaned display text, the intent-confirmed flag and the extracted profile.
+        """
+        logger.info("[analyze_turn] analyze_turn method called.")
+        try:
+            messages = [
+                {'role': 'system', 'content': self.turn_analyzer},
+                {'role': 'user', 'content': assistant_response}
+            ]
+            response = await acached_chat_completion(
+                self.client,
+                model=MODEL,
+                messages=messages,
+                temperature=0,
+                seed=1234,
+                response_format={'type': 'json_schema', 'json_schema': TurnAnalyzer.json_schema}
+            )
+            logger.info(f"[analyze_turn] Raw response received from OpenAI API: {response}")
+            return self.parse_turn_analysis(response, assistant_response)
+
+        except Exception as e:
+            logger.error(f"[analyze_turn] Error occurred in async analyze_turn: {e}")
+            raise
+
+    async def intent_confirmation_check(self, input_message: str) -> Dict[str, Union[str, int, bool]]:
+        """
+        This function takes the assistant's response and evaluates if the chatbot has captured the user's profile clearly.
+        """
+        logger.info(f"[intent_confirmation_check] Input message received for intent confirmation: {input_message}")
+        try:
+            messages = [
+                {"role": "system", "content": self.intent_confirmation},
+                {"role": "user", "content": input_message}
+            ]
+            response = await acached_chat_completion(
+                self.client,
+                model=MODEL,
+                messages=messages,
+                response_format={'type': 'json_object'},
+                temperature=0,
+                seed=1234
+            )
+            response = json.loads(response)
+            logger.info(f"[intent_confirmation_check] Parsed JSON response: {response}")
+            return response
+
+        except Exception as e:
+            logger.error(f"[intent_confirmation_check] Error occurred in async intent_confirmation_check: {e}")
+            raise
+
+    async def dictionary_present_check(self, input_message: str) -> Dict[str, Union[str, int, bool]]:
+        """
+        This method is used to check if the dictionary is present in the ai generated content.
+        """
+        logger.info("[dictionary_present_check] async dictionary_present method called.")
+        try:
+            messages = [
+                {'role': 'system', 'content': self.dictionary_present},
+                {'role': 'user', 'content': input_message}
+            ]
+            response = await acached_chat_completion(
+                self.client,
+                model=MODEL,
+                messages=messages,
+                temperature=0,
+                seed=1234,
+                response_format={'type': 'json_object'}
+            )
+            parsed = json.loads(response)
+            logger.info(f"[dictionary_present_check] Parsed JSON response from dictionary check: {parsed}")
+            return parsed
+
+        except Exception as e:
+            logger.error(f"[dictionary_present_check] Error in async dictionary_present_check: {e}")
+            raise
+
+    async def start_product_recommendation(self, input_message: str) -> str:
+        """
+        This method runs the blocking product recommendation pipeline in a worker thread
+        so the event loop keeps serving other conversations.
+        """
+        try:
+            logger.info("[start_product_recommendation] Offloading product recommendation to a worker thread.")
+            return await asyncio.to_thread(super().start_product_recommendation, input_message)
+        except Exception as e:
+            logger.error(f"[start_product_recommendation] Error during async product recommendation: {e}")
+            raise
+
+    async def route_to_human_agent(self, input_message: str = 'yes') -> str:
+        """
+        This method redirects user to Human-Agent if the user is not satisfied with the response
+        """
+        try:
+            logger.info("[route_to_human_agent] async route_to_human_agent method called.")
+            messages = [
+                {'role': 'system', 'content': AIToAgentShift.system_instruction},
+                {'role': 'user', 'content': input_message}
+            ]
+            response = await acached_chat_completion(
+                self.client,
+                messages=messages,
+                model=MODEL,
+                temperature=0
+            )
+
+            ai_reply = response.strip().lower()
+            logger.info(f"[route_to_human_agent] AI reply received: {ai_reply}")
+
+            if ai_reply == "yes":
+                return (
+                    "Thank you for your interest! I'm glad I could assist you.\n"
+                    "Would you mind rating my support on a scale of 1 (worst) to 5 (best)?"
+                )
+            return (
+                "I’m sorry I couldn’t fully address your query.\n"
+                "Let me connect you with one of our sales team agents for further assistance."
+            )
+
+        except Exception as e:
+            logger.error(f"[route_to_human_agent] Error occurred in async route_to_human_agent: {e}")
+            raise
+
+    async def filter_json_from_response(self, input_message: str = None) -> str:
+        """
+        This method removes unwanted json response from the assistance response.
+        """
+        try:
+            logger.info("Entered async [filter_response_from_json] method, checking for unwanted charecters.")
+            if RESPONSE_FILTER_MODE != 'llm':
+                response = sanitize_assistant_response(input_message)
+                logger.info(f"Filtered message: {response}")
+                return response
+
+            messages = [
+                {'role': 'system', 'content': self.filter_json},
+                {'role': 'user', 'content': input_message}
+            ]
+            response = await acached_chat_completion(
+                self.client,
+                messages=messages,
+                model=MODEL,
+                temperature=0
+            )
+            logger.info(f"Filtered message: {response}")
+            return response
+
+        except Exception as e:
+            logger.error(f"[filter_response_from_json] error occured Error: {e}")
+            raise
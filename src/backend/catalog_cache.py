@@ -0,0 +1,118 @@
+from src.backend.catalog_features import build_catalog_frame
+from src.database.load_from_database import LoadFromDatabase
+from src.constants import CATALOG_VERSION_CHECK_SECONDS
+from src.logging import logging
+from pandas import DataFrame
+from typing import Dict, Optional, Union
+import threading
+import time
+
+logger = logging()
+
+class CatalogCache:
+    """
+    Process-wide cache of the query-engine catalog with the derived price and level columns.
+    The cached frame is served as-is (callers must not mutate it). At most every check_interval
+    seconds a background thread compares the catalog version stamped by PostgresDataBaseUpdate
+    and reloads the frame when it changed, so requests never wait on the database once the
+    catalog is loaded. Only the very first load, or an explicit refresh, blocks.
+    """
+    def __init__(self, loader: Optional[LoadFromDatabase] = None, check_interval: float = CATALOG_VERSION_CHECK_SECONDS):
+        logger.info(f"CatalogCache instance created with check_interval={check_interval}s.")
+        self.loader = loader or LoadFromDatabase()
+        self.check_interval = check_interval
+        self._frame = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        # held by whichever thread is currently (re)loading the catalog
+        self._refresh_lock = threading.Lock()
+        self._loads = 0
+        self._version_checks = 0
+        self._refresh_errors = 0
+
+    def get(self) -> DataFrame:
+        """
+        Returns the cached catalog frame, loading it on first use and scheduling a background version check when due.
+        """
+        frame = self._frame
+        if frame is None:
+            with self._refresh_lock:
+                if self._frame is None:
+                    self._reload(force=True)
+                return self._frame
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._schedule_refresh()
+        return frame
+
+    def refresh(self, force: bool = False) -> DataFrame:
+        """
+        Checks the catalog version now and reloads when it changed (always when force=True). Blocks the caller.
+        """
+        with self._refresh_lock:
+            self._reload(force=force)
+            return self._frame
+
+    def invalidate(self) -> None:
+        """
+        Makes the next get() check the catalog version instead of waiting for the interval.
+        """
+        self._checked_at = 0.0
+
+    def warm_up(self) -> None:
+        """
+        Loads the catalog in the background so the first recommendation does not wait on the database.
+        """
+        if self._frame is None:
+            self._schedule_refresh()
+
+    def _schedule_refresh(self) -> None:
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            threading.Thread(target=self._background_refresh, name='catalog-refresh', daemon=True).start()
+        except Exception:
+            self._refresh_lock.release()
+            raise
+
+    def _background_refresh(self) -> None:
+        try:
+            self._reload(force=self._frame is None)
+        except Exception as e:
+            # keep serving the stale catalog, the next interval retries
+            self._refresh_errors += 1
+            self._checked_at = time.monotonic()
+            logger.warning(f"[CatalogCache] Background refresh failed, serving the cached catalog: {e}")
+        finally:
+            self._refresh_lock.release()
+
+    def _reload(self, force: bool) -> None:
+        version = self.loader.fetch_catalog_version()
+        self._version_checks += 1
+        self._checked_at = time.monotonic()
+        if not force and self._frame is not None and version == self._version:
+            return
+
+        frame = build_catalog_frame(self.loader.fetch_query_engine_data())
+        with self._lock:
+            self._frame, self._version = frame, version
+            self._loads += 1
+        logger.info(f"[CatalogCache] Catalog loaded: {len(frame)} rows, version {version}.")
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._version
+
+    def stats(self) -> Dict[str, Union[int, float, str, None]]:
+        with self._lock:
+            return {
+                'version': self._version,
+                'rows': 0 if self._frame is None else len(self._frame),
+                'loads': self._loads,
+                'version_checks': self._version_checks,
+                'refresh_errors': self._refresh_errors,
+                'seconds_since_check': round(time.monotonic() - self._checked_at, 1) if self._checked_at else None
+            }
+
+
+catalog_cache = CatalogCache()
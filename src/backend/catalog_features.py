@@ -0,0 +1,197 @@
+from src.constants import BUDGET_COLUMN, MAPPED_COLUMN, PRICE_VALUE_COLUMN, MAPPED_ATTRIBUTES, MAPPED_LEVEL_COLUMNS, LEVEL_SCORES
+from src.constants import SUMMARY_COLUMN, PRODUCT_KEY_COLUMN, CONTENT_HASH_COLUMN, PRODUCT_KEY_SOURCE_COLUMNS
+from src.logging import logging
+from pandas import DataFrame, Series
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import ast
+import re
+
+logger = logging()
+
+# frame.attrs flag set on catalog frames whose rows are in ascending PRICE_VALUE_COLUMN order
+PRICE_SORTED_ATTR = 'price_sorted'
+# columns written by the ingestion pipeline itself, everything else comes from the supplier file
+DERIVED_COLUMNS = [MAPPED_COLUMN, SUMMARY_COLUMN, PRICE_VALUE_COLUMN, *MAPPED_LEVEL_COLUMNS.values(), PRODUCT_KEY_COLUMN, CONTENT_HASH_COLUMN]
+
+
+def _key_token(key) -> str:
+    return re.sub(r"[^a-z]", "", str(key).lower())
+
+
+# 'GPU Intensity', 'gpu_intensity' and 'GPU intensity' all name the same ProductMapLayer attribute
+MAPPED_KEY_TOKENS = {_key_token(attribute): attribute for attribute in MAPPED_ATTRIBUTES}
+
+
+def _cell_text(value) -> str:
+    # 55000 and 55000.0 are the same value: one missing cell turns a whole int64 column into float64
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def normalize_price(prices: Series) -> Series:
+    """
+    Cleans a raw price column ('35,000', 'Rs. 1,20,000', 55000.0) into integers, unparseable prices become 0.
+    """
+    if pd.api.types.is_numeric_dtype(prices):
+        return pd.to_numeric(prices, errors='coerce').fillna(0).astype(np.int64)
+    digits = prices.astype(str).str.replace(r"\.\d*$", "", regex=True).str.replace(r"[^0-9]", "", regex=True)
+    return pd.to_numeric(digits, errors='coerce').fillna(0).astype(np.int64)
+
+
+def parse_mapped_dictionary(value) -> Dict:
+    """
+    Returns the mapped dictionary of a row whether it is stored as a dict, a JSON string or a Python literal.
+    """
+    if isinstance(value, dict):
+        return value
+    if not isinstance(value, str) or not value.strip():
+        return {}
+    for parser in (json.loads, ast.literal_eval):
+        try:
+            parsed = parser(value)
+            if isinstance(parsed, dict):
+                return parsed
+        except (ValueError, SyntaxError, TypeError):
+            continue
+    return {}
+
+
+def normalize_mapped_dictionary(value) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Validates one mapped dictionary against the ProductMapLayer attributes. Returns the dictionary with
+    canonical key names and lowercase levels, keeping only valid entries, and the list of problems found.
+    """
+    normalized, problems, seen = {}, [], set()
+    for key, level in parse_mapped_dictionary(value).items():
+        attribute = MAPPED_KEY_TOKENS.get(_key_token(key))
+        if attribute is None:
+            problems.append(f"unknown key {key!r}")
+            continue
+        seen.add(attribute)
+        level_name = str(level).strip().lower()
+        if level_name not in LEVEL_SCORES:
+            problems.append(f"invalid level {level!r} for {attribute!r}")
+            continue
+        normalized[attribute] = level_name
+    problems.extend(f"missing key {attribute!r}" for attribute in MAPPED_ATTRIBUTES if attribute not in seen)
+    return normalized, problems
+
+
+def raw_mapped_value(value):
+    """
+    Returns the mapper output of a row in a form the JSONB column accepts, without touching its content:
+    dicts and lists as they are, JSON / Python literal strings parsed, missing values as None and any other
+    text as a JSON string.
+    """
+    if isinstance(value, (dict, list)):
+        return value
+    if not isinstance(value, str):
+        return None if pd.isna(value) else value
+    if not value.strip():
+        return None
+    for parser in (json.loads, ast.literal_eval):
+        try:
+            parsed = parser(value)
+            if isinstance(parsed, (dict, list)):
+                return parsed
+        except (ValueError, SyntaxError, TypeError):
+            continue
+    return json.dumps(value)
+
+
+def validate_mapped_column(mapped: Series) -> Series:
+    """
+    Validates every mapped dictionary of the column (see normalize_mapped_dictionary) and logs a summary of
+    the rows the mapping prompt got wrong. Returns the raw mapper output (see raw_mapped_value) for the JSONB
+    column; only the typed level columns use the normalized values, where invalid attributes become level 0.
+    """
+    results = mapped.map(normalize_mapped_dictionary)
+    invalid = [(index, problems) for index, (_, problems) in results.items() if problems]
+    if invalid:
+        logger.warning(f"{len(invalid)} of {len(mapped)} mapped dictionaries failed validation, e.g. row {invalid[0][0]}: {invalid[0][1]}")
+    else:
+        logger.info(f"All {len(mapped)} mapped dictionaries are valid.")
+    return mapped.map(raw_mapped_value)
+
+
+def mapped_levels(mapped: Series) -> DataFrame:
+    """
+    Expands the mapped dictionaries into one int8 column per attribute (low/medium/high -> 1/2/3, invalid -> 0).
+    """
+    dictionaries = mapped.map(lambda value: normalize_mapped_dictionary(value)[0])
+    levels = {}
+    for attribute, column in MAPPED_LEVEL_COLUMNS.items():
+        levels[column] = dictionaries.map(lambda mapping: LEVEL_SCORES.get(mapping.get(attribute), 0)).astype(np.int8)
+    return DataFrame(levels, index=mapped.index)
+
+
+def add_derived_columns(data: DataFrame, price_column: Optional[str] = BUDGET_COLUMN) -> DataFrame:
+    """
+    Returns a copy of the frame with the integer price and the per-attribute level columns added.
+    Derived columns that are already present (written at ingestion) are kept as they are.
+    """
+    frame = data.reset_index(drop=True).copy()
+    if PRICE_VALUE_COLUMN not in frame.columns and price_column in frame.columns:
+        frame[PRICE_VALUE_COLUMN] = normalize_price(frame[price_column])
+    missing_levels = [column for column in MAPPED_LEVEL_COLUMNS.values() if column not in frame.columns]
+    if missing_levels and MAPPED_COLUMN in frame.columns:
+        levels = mapped_levels(frame[MAPPED_COLUMN])
+        for column in missing_levels:
+            frame[column] = levels[column]
+    for column in MAPPED_LEVEL_COLUMNS.values():
+        # SMALLINT columns read back from PostgreSQL arrive as int64
+        if column in frame.columns and frame[column].dtype != np.int8:
+            frame[column] = frame[column].fillna(0).astype(np.int8)
+    return frame
+
+
+def build_catalog_frame(data: DataFrame, price_column: Optional[str] = BUDGET_COLUMN) -> DataFrame:
+    """
+    Returns the serving copy of the query-engine frame: derived columns added (see add_derived_columns)
+    and rows sorted by ascending price so budget cuts are a binary search (see QueryEngine.filter_budget).
+    """
+    frame = add_derived_columns(data, price_column)
+    if PRICE_VALUE_COLUMN in frame.columns:
+        frame[PRICE_VALUE_COLUMN] = frame[PRICE_VALUE_COLUMN].fillna(0).astype(np.int64)
+        frame = frame.sort_values(PRICE_VALUE_COLUMN, kind='stable').reset_index(drop=True)
+        frame.attrs[PRICE_SORTED_ATTR] = True
+    logger.info(f"Catalog frame built with {len(frame)} rows.")
+    return frame
+
+
+def source_columns(columns: List[str]) -> List[str]:
+    return [column for column in columns if column not in DERIVED_COLUMNS]
+
+
+def add_product_keys(data: DataFrame, seen_keys: Optional[Dict[str, int]] = None) -> DataFrame:
+    """
+    Returns a copy of the frame with the stable product key (normalized Brand + Model Name, numbered when the
+    same product appears twice) and the sha256 of the row's source columns, used to find changed products.
+    When the frame is one chunk of a larger file, seen_keys carries the key counts of the earlier chunks
+    (and is updated), so repeats are numbered exactly as in the whole file.
+    """
+    frame = data.reset_index(drop=True).copy()
+    key_parts = [column for column in PRODUCT_KEY_SOURCE_COLUMNS if column in frame.columns]
+    if key_parts:
+        keys = frame[key_parts].map(_cell_text).apply(lambda column: column.str.strip().str.lower()).agg('|'.join, axis=1)
+    else:
+        keys = pd.Series('product', index=frame.index)
+    occurrence = keys.groupby(keys).cumcount()
+    if seen_keys is not None:
+        occurrence += keys.map(seen_keys).fillna(0).astype(int)
+        for key, count in keys.value_counts().items():
+            seen_keys[key] = seen_keys.get(key, 0) + int(count)
+    frame[PRODUCT_KEY_COLUMN] = keys.where(occurrence == 0, keys + '#' + (occurrence + 1).astype(str))
+
+    # sorted column names, so reordering the supplier file does not count as a change
+    # cell by cell rather than astype(str): missing values hash as 'nan' / 'None' on every pandas version and
+    # whole-number floats as integers, so a NaN appearing in a numeric column only changes its own row
+    columns = sorted(source_columns(list(data.columns)))
+    rows = frame[columns].map(_cell_text).agg('\x1f'.join, axis=1) if columns else pd.Series('', index=frame.index)
+    frame[CONTENT_HASH_COLUMN] = rows.map(lambda row: hashlib.sha256(row.encode('utf-8')).hexdigest())
+    return frame
@@ -0,0 +1,242 @@
+from src.database.sqlite_cache_store import SQLiteCacheStore
+from src.logging import logging
+from src.constants import (
+    OPENAI_API_KEY,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_DB_PATH,
+    LLM_CACHE_TTL_SECONDS,
+    MODERATION_CACHE_TTL_SECONDS
+)
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+import threading
+import asyncio
+import time
+import hashlib
+import openai
+import json
+
+logger = logging()
+openai.api_key = OPENAI_API_KEY
+
+class CompletionCache:
+    """
+    Two-tier cache for deterministic LLM responses: an in-process LRU in front of a
+    pluggable persistent store (SQLiteCacheStore by default, anything with get/set works).
+    Entries of the LRU expire after ttl_seconds like the ones of the store.
+    """
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, store: Optional[Any] = None, enabled: bool = LLM_CACHE_ENABLED,
+                 ttl_seconds: Optional[int] = None):
+        self.max_entries = max_entries
+        self.store = store
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'store_hits': 0, 'misses': 0, 'writes': 0, 'bypassed': 0}
+        logger.info(f"CompletionCache instance created (enabled={enabled}, max_entries={max_entries}, store={type(store).__name__}).")
+
+    @staticmethod
+    def make_key(namespace: str, **params) -> str:
+        """
+        Canonical sha256 of the request parameters, independent of dict ordering.
+        """
+        canonical = json.dumps({'namespace': namespace, **params}, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        return self._store_result(key, self.store.get(key) if self.store is not None else None)
+
+    def set(self, key: str, value: str) -> None:
+        self._memory_set(key, value)
+        if self.store is not None:
+            self.store.set(key, value)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """
+        get() for the event loop: the LRU is read inline, the store (a disk read) in a worker thread.
+        """
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        stored = await asyncio.to_thread(self.store.get, key) if self.store is not None else None
+        return self._store_result(key, stored)
+
+    async def aset(self, key: str, value: str) -> None:
+        """
+        set() for the event loop: the store write runs in a worker thread.
+        """
+        self._memory_set(key, value)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.set, key, value)
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._stats['bypassed'] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['store_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['store_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        """
+        Empties both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+        if self.store is not None and hasattr(self.store, 'clear'):
+            self.store.clear()
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                value, stored_at = self._memory[key]
+                if self.ttl_seconds is None or time.time() - stored_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+        return None
+
+    def _store_result(self, key: str, value: Optional[str]) -> Optional[str]:
+        with self._lock:
+            if value is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['store_hits'] += 1
+            self._remember(key, value)
+        return value
+
+    def _memory_set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._stats['writes'] += 1
+            self._remember(key, value)
+
+    def _remember(self, key: str, value: str) -> None:
+        self._memory[key] = (value, time.time())
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+completion_cache = CompletionCache(
+    store=SQLiteCacheStore(LLM_CACHE_DB_PATH, table_name='llm_completions', ttl_seconds=LLM_CACHE_TTL_SECONDS) if LLM_CACHE_DB_PATH else None,
+    ttl_seconds=LLM_CACHE_TTL_SECONDS
+)
+# moderation verdicts only, keyed on the sha256 of the checked text and kept for a short time
+moderation_cache = CompletionCache(
+    store=SQLiteCacheStore(LLM_CACHE_DB_PATH, table_name='moderations', ttl_seconds=MODERATION_CACHE_TTL_SECONDS) if LLM_CACHE_DB_PATH else None,
+    ttl_seconds=MODERATION_CACHE_TTL_SECONDS
+)
+
+
+def is_deterministic_request(request: Dict[str, Any]) -> bool:
+    """
+    Only temperature 0 requests (the classification / extraction calls) are cached. A seed alone does not make
+    a sampled reply repeatable, and the conversational completion must never be stored.
+    """
+    return request.get('temperature') == 0
+
+
+def completion_cache_key(request: Dict[str, Any]) -> str:
+    return CompletionCache.make_key(
+        'chat.completions',
+        model=request.get('model'),
+        messages=request.get('messages'),
+        response_format=request.get('response_format'),
+        seed=request.get('seed'),
+        temperature=request.get('temperature')
+    )
+
+
+def cached_chat_completion(cacheable: bool = True, **request) -> str:
+    """
+    Drop-in for openai.chat.completions.create(...).choices[0].message.content
+    that serves deterministic requests from the completion cache. cacheable=False always calls the API
+    (the conversational completion, which carries the user's conversation).
+    """
+    if not cacheable or not completion_cache.enabled or not is_deterministic_request(request):
+        completion_cache.record_bypass()
+        response = openai.chat.completions.create(**request)
+        return response.choices[0].message.content
+
+    key = completion_cache_key(request)
+    content = completion_cache.get(key)
+    if content is not None:
+        logger.info(f"[cached_chat_completion] Cache hit for model={request.get('model')}.")
+        return content
+
+    response = openai.chat.completions.create(**request)
+    content = response.choices[0].message.content
+    if content is not None:
+        completion_cache.set(key, content)
+    return content
+
+
+async def acached_chat_completion(client: openai.AsyncOpenAI, cacheable: bool = True, **request) -> str:
+    """
+    Async counterpart of cached_chat_completion for the AsyncOpenAI client.
+    """
+    if not cacheable or not completion_cache.enabled or not is_deterministic_request(request):
+        completion_cache.record_bypass()
+        response = await client.chat.completions.create(**request)
+        return response.choices[0].message.content
+
+    key = completion_cache_key(request)
+    content = await completion_cache.aget(key)
+    if content is not None:
+        logger.info(f"[acached_chat_completion] Cache hit for model={request.get('model')}.")
+        return content
+
+    response = await client.chat.completions.create(**request)
+    content = response.choices[0].message.content
+    if content is not None:
+        await completion_cache.aset(key, content)
+    return content
+
+
+def moderation_cache_key(model: str, input_message: str) -> str:
+    # the checked text itself is never part of a stored key
+    input_hash = hashlib.sha256(str(input_message).encode('utf-8')).hexdigest()
+    return CompletionCache.make_key('moderations', model=model, input_sha256=input_hash)
+
+
+def cached_moderation_flagged(model: str, input_message: str) -> bool:
+    """
+    Returns the moderation verdict for input_message, cached on (model, sha256 of the input)
+    for MODERATION_CACHE_TTL_SECONDS.
+    """
+    key = moderation_cache_key(model, input_message)
+    cached = moderation_cache.get(key) if moderation_cache.enabled else None
+    if cached is not None:
+        return cached == 'flagged'
+
+    response = openai.moderations.create(model=model, input=input_message)
+    flagged = response.results[0].flagged
+    if moderation_cache.enabled:
+        moderation_cache.set(key, 'flagged' if flagged else 'not flagged')
+    return flagged
+
+
+async def acached_moderation_flagged(client: openai.AsyncOpenAI, model: str, input_message: str) -> bool:
+    """
+    Async counterpart of cached_moderation_flagged.
+    """
+    key = moderation_cache_key(model, input_message)
+    cached = await moderation_cache.aget(key) if moderation_cache.enabled else None
+    if cached is not None:
+        return cached == 'flagged'
+
+    response = await client.moderations.create(model=model, input=input_message)
+    flagged = response.results[0].flagged
+    if moderation_cache.enabled:
+        await moderation_cache.aset(key, 'flagged' if flagged else 'not flagged')
+    return flagged
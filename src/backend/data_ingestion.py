@@ -2,10 +2,16 @@ import pandas as pd
 import os
 from src.database.aws_s3_connection import AWSConnection
 from src.database.aiven_posgresql_update import PostgresDataBaseUpdate
-from src.constants import S3_FILE_NAME
+from src.database.load_from_database import LoadFromDatabase
+from src.constants import S3_FILE_NAME, MAPPED_COLUMN, RANKING_TABLE_FILE_PATH, RANKING_TABLE_MAX_ROWS, PRODUCT_SUMMARY_ENABLED, PRODUCT_SUMMARY_DB_PATH
+from src.constants import INGESTION_MODE, PRODUCT_KEY_COLUMN, CONTENT_HASH_COLUMN, INGESTION_CHUNK_ROWS, INGESTION_STREAMING_MIN_BYTES
+from src.backend.catalog_features import add_derived_columns, validate_mapped_column, build_catalog_frame, add_product_keys, source_columns
+from src.backend.ranking_table import RankingTable
 from src.logging import logging
 from src.backend.product_mapper import ProductMapper
-from src.utils import read_structured_file
+from src.backend.product_summarizer import ProductSummarizer
+from src.database.sqlite_cache_store import SQLiteCacheStore
+from src.utils import read_structured_file, iter_structured_file
 
 logger = logging()
 
@@ -14,7 +20,119 @@ class DataIngestion():
         self.aws_connection = AWSConnection()
         self.product_mapper = ProductMapper()
         self.update_postgres_database = PostgresDataBaseUpdate()
+        self._product_summarizer = None
+        self.load_from_database = LoadFromDatabase()
+
+    @property
+    def product_summarizer(self) -> ProductSummarizer:
+        # built on first use, so the summary store is only opened when summaries are enabled
+        if self._product_summarizer is None:
+            store = SQLiteCacheStore(PRODUCT_SUMMARY_DB_PATH, table_name='product_summaries') if PRODUCT_SUMMARY_DB_PATH else None
+            self._product_summarizer = ProductSummarizer(store=store)
+        return self._product_summarizer
     
+    def build_ranking_table(self, df: pd.DataFrame, catalog_version: str = None) -> None:
+        """
+        Builds the RankingTable of the ingested catalog and saves it to RANKING_TABLE_FILE_PATH.
+        A failure is logged only: serving rebuilds the table in memory when the saved one does not match.
+        """
+        try:
+            if len(df) > RANKING_TABLE_MAX_ROWS:
+                logger.info(f"Catalog has {len(df)} rows, above RANKING_TABLE_MAX_ROWS; no ranking table built.")
+                return
+            logger.info("Building the ranking table for all attribute profiles.")
+            RankingTable.build(build_catalog_frame(df), version=catalog_version).save(RANKING_TABLE_FILE_PATH)
+            logger.info(f"Ranking table saved to {RANKING_TABLE_FILE_PATH}.")
+        except Exception as e:
+            logger.warning(f"Could not build the ranking table, serving will rank on demand: {e}")
+
+    def prepare_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Maps the product descriptions and adds the validated mapping, the derived price / level columns
+        and the summary blurbs, everything the catalog table stores besides the supplier columns.
+        """
+        # Map the product descriptions
+        logger.info("Starting product mapping.")
+        df = self.product_mapper.start_dataframe_product_mapping(df)
+        logger.info("Product mapping has been achieved successfully.")
+        
+        # Validate the mapped key names and levels (the JSONB column keeps the raw mapper output), then derive
+        # the integer price and the normalized attribute levels once, so serving never parses JSON or re-cleans the Price column
+        df[MAPPED_COLUMN] = validate_mapped_column(df[MAPPED_COLUMN])
+        df = add_derived_columns(df)
+        logger.info("Derived price and attribute level columns added.")
+        
+        # Write the per-product summary blurbs the recommendations are rendered from
+        if PRODUCT_SUMMARY_ENABLED:
+            df = self.product_summarizer.add_summaries(df)
+            logger.info("Product summaries added.")
+        return df
+
+    def incremental_ingestion(self, df: pd.DataFrame) -> bool:
+        """
+        Diffs the keyed DataFrame against the table on the product key and content hash, maps only the new and
+        changed products and upserts / deletes them in one transaction. Returns False when the table cannot be
+        updated incrementally (missing, written before product keys, or with different supplier columns).
+        """
+        state = self.load_from_database.fetch_product_hashes()
+        if state is None:
+            logger.info("No keyed catalog table yet, running a full load.")
+            return False
+        stored_hashes, table_columns = state
+        if sorted(source_columns(table_columns)) != sorted(source_columns(list(df.columns))):
+            logger.info("Supplier columns changed since the last upload, running a full load.")
+            return False
+
+        changed = df[df[PRODUCT_KEY_COLUMN].map(stored_hashes) != df[CONTENT_HASH_COLUMN]]
+        deleted_keys = sorted(set(stored_hashes) - set(df[PRODUCT_KEY_COLUMN]))
+        logger.info(f"Incremental ingestion: {len(changed)} new or changed and {len(deleted_keys)} deleted "
+                    f"of {len(df)} products ({len(stored_hashes)} in the table).")
+        if changed.empty and not deleted_keys:
+            logger.info("Catalog unchanged, nothing to write.")
+            return True
+
+        changed = self.prepare_rows(changed.copy()) if not changed.empty else changed
+        if not set(changed.columns) <= set(table_columns):
+            logger.info(f"Rows carry columns the table lacks ({sorted(set(changed.columns) - set(table_columns))}), running a full load.")
+            return False
+        catalog_version = self.update_postgres_database.upsert_to_postgres_database(changed, deleted_keys)
+        self.build_ranking_table(self.load_from_database.fetch_query_engine_data(), catalog_version)
+        return True
+
+    def use_streaming(self, local_file_path: str) -> bool:
+        if INGESTION_MODE == 'streaming':
+            return True
+        if INGESTION_STREAMING_MIN_BYTES and os.path.getsize(local_file_path) >= INGESTION_STREAMING_MIN_BYTES:
+            logger.info(f"'{local_file_path}' is at least {INGESTION_STREAMING_MIN_BYTES} bytes, streaming it.")
+            return True
+        return False
+
+    def streaming_ingestion(self, local_file_path: str) -> None:
+        """
+        Full load that reads, maps and writes the file INGESTION_CHUNK_ROWS rows at a time, so memory stays
+        flat whatever the file size: only the current chunk (and the product key counts) is held.
+        Unchanged products still cost no LLM call thanks to the mapping (and, when enabled, summary) caches.
+        """
+        seen_keys = {}
+        totals = {'chunks': 0, 'rows': 0}
+
+        def prepared_chunks():
+            for chunk in iter_structured_file(local_file_path, chunk_rows=INGESTION_CHUNK_ROWS):
+                chunk = self.prepare_rows(add_product_keys(chunk, seen_keys))
+                totals['chunks'] += 1
+                totals['rows'] += len(chunk)
+                logger.info(f"Chunk {totals['chunks']} prepared: {len(chunk)} rows ({totals['rows']} so far).")
+                yield chunk
+
+        logger.info(f"Streaming '{local_file_path}' into the database in chunks of {INGESTION_CHUNK_ROWS} rows.")
+        catalog_version = self.update_postgres_database.stream_to_postgres_database(prepared_chunks())
+        logger.info(f"Streamed {totals['rows']} rows in {totals['chunks']} chunks.")
+
+        if totals['rows'] > RANKING_TABLE_MAX_ROWS:
+            logger.info(f"Catalog has {totals['rows']} rows, above RANKING_TABLE_MAX_ROWS; no ranking table built.")
+            return
+        self.build_ranking_table(self.load_from_database.fetch_query_engine_data(), catalog_version)
+
     # --- Start of Fix ---
     # The method signature now correctly accepts both 'local_file_path' and 's3_file_name'
     def start_data_ingestion(self, local_file_path: str, s3_file_name: str = S3_FILE_NAME):
@@ -29,21 +147,34 @@ class DataIngestion():
             self.aws_connection.upload_file_to_s3(local_file_path=local_file_path, s3_file_name=s3_file_name)
             logger.info("File uploaded successfully to S3.")
             
+            # Streaming mode: read, map and write chunk by chunk instead of loading the whole file
+            if self.use_streaming(local_file_path):
+                self.streaming_ingestion(local_file_path)
+                logger.info("Data ingestion process completed successfully.")
+                return
+
             # 2. Read the local file into a DataFrame
             logger.info(f"Reading '{local_file_path}' into DataFrame.")
             df = read_structured_file(local_file_path)
             logger.info("CSV file loaded into DataFrame successfully.")
             
-            # 3. Map the product descriptions
-            logger.info("Starting product mapping.")
-            df = self.product_mapper.start_dataframe_product_mapping(df)
-            logger.info("Product mapping has been achieved successfully.")
+            # 3. Incremental mode: map and write only the new / changed products
+            df = add_product_keys(df)
+            if INGESTION_MODE == 'incremental' and self.incremental_ingestion(df):
+                logger.info("Data ingestion process completed successfully.")
+                return
+            
+            # 4. Map, validate and derive the columns of every row
+            df = self.prepare_rows(df)
             
-            # 4. Update the D1 Database
+            # 5. Update the D1 Database
             logger.info("Updating D1 database with data from DataFrame.")
-            self.update_postgres_database.update_to_postgres_database(df=df)
+            catalog_version = self.update_postgres_database.update_to_postgres_database(df=df)
             logger.info("D1 database updated successfully.")
             
+            # 6. Precompute the catalog orderings for all 243 attribute profiles
+            self.build_ranking_table(df, catalog_version)
+            
             logger.info("Data ingestion process completed successfully.")
             
         except Exception as e:
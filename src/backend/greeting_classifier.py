@@ -0,0 +1,182 @@
+from src.logging import logging
+from src.constants import GREETING_CONFIDENCE_THRESHOLD
+from collections import Counter
+from typing import Dict, Tuple
+import math
+import re
+
+logger = logging()
+
+class GreetingClassifier:
+    """
+    Local, deterministic replacement for the LLM greeting check on the first message.
+    Tokens are matched against a greeting/help lexicon and the whole message is scored by a
+    character-trigram model trained on the examples below. Tokens of at least FUZZY_MIN_LENGTH
+    characters also fuzzy-match (bounded edit distance); a message that looks like a greeting only
+    through fuzzy matches or trigrams ("hell", "namste") stays below the threshold.
+    classify() returns ('yes' | 'no', confidence); callers fall back to the LLM when the
+    confidence is below the configured threshold.
+    """
+    FUZZY_MIN_LENGTH = 5
+    greeting_words = {
+        'hi', 'hii', 'hey', 'heya', 'hello', 'helo', 'hallo', 'hola', 'howdy', 'greetings',
+        'namaste', 'namaskar', 'yo', 'sup', 'hiya', 'morning', 'afternoon', 'evening'
+    }
+    help_words = {
+        'help', 'assist', 'assistance', 'support', 'guide', 'guidance', 'suggest',
+        'suggestion', 'recommend', 'recommendation', 'advice', 'advise'
+    }
+    # Words that may surround a greeting or a help request without adding any requirement.
+    filler_words = {
+        'i', 'me', 'my', 'you', 'u', 'can', 'could', 'would', 'will', 'please', 'pls', 'plz',
+        'there', 'good', 'a', 'an', 'the', 'to', 'with', 'for', 'need', 'want', 'some', 'someone',
+        'is', 'are', 'am', 'anyone', 'buddy', 'friend', 'bot', 'assistant', 'team', 'dear', 'sir',
+        'madam', 'how', 'doing', 'whats', 'up', 'what', 'do', 'looking', 'get', 'find', 'be',
+        'laptop', 'laptops', 'buying', 'buy', 'choose', 'choosing', 'one', 'new', 'im', 'it',
+        'and', 'thanks', 'thank', 'ok', 'okay', 'hope', 'well', 'day', 'all', 'everyone', 'gud'
+    }
+
+    positive_examples = [
+        'hi', 'hello', 'hey', 'hey there', 'hello there', 'hi there', 'good morning', 'good evening',
+        'good afternoon', 'namaste', 'hola', 'howdy', 'hii', 'helo', 'hey buddy', 'hi can you help me',
+        'i need help', 'help me', 'can you help me', 'please help', 'i need some assistance',
+        'can you assist me', 'help me choose a laptop', 'i need help buying a laptop',
+        'hello i need help', 'hey can you recommend a laptop', 'could you suggest a laptop',
+        'i need advice', 'hi how are you', 'whats up'
+    ]
+    negative_examples = [
+        'i want a gaming laptop under 80000', 'my budget is 50000', 'i am a video editor',
+        'i need 16gb ram', 'i do programming and travel a lot', 'i work with after effects',
+        'something lightweight with good battery', 'budget around 1 lakh',
+        'i want a laptop with rtx graphics', 'mostly office work and browsing', 'i am a student',
+        'high performance for machine learning', 'a thin laptop with 4k display',
+        'what is the price of dell inspiron', 'i play valorant and gta',
+        'portable one under 60k for college', 'do you have macbooks',
+        'i edit photos in lightroom', 'need i7 processor and 32 gb ram', 'exit'
+    ]
+
+    def __init__(self, threshold: float = GREETING_CONFIDENCE_THRESHOLD):
+        logger.info(f"GreetingClassifier instance created with threshold={threshold}.")
+        self.threshold = threshold
+        self.lexicon = {word: 'greeting' for word in self.greeting_words}
+        self.lexicon.update({word: 'help' for word in self.help_words})
+        self.lexicon.update({word: 'filler' for word in self.filler_words})
+        self.fuzzy_candidates = {}
+        for word, category in self.lexicon.items():
+            if category != 'filler' and len(word) >= 4:
+                self.fuzzy_candidates.setdefault(len(word), []).append((word, category))
+        self._token_cache = {}
+        self.positive_centroid = self._centroid(self.positive_examples)
+        self.negative_centroid = self._centroid(self.negative_examples)
+
+    @staticmethod
+    def normalize(message: str) -> str:
+        text = re.sub(r"[^a-z0-9\s]", " ", (message or '').lower())
+        # collapse stretched letters: "heyyyy" -> "heyy", "hiiiii" -> "hii"
+        text = re.sub(r"(.)\1{2,}", r"\1\1", text)
+        return re.sub(r"\s+", " ", text).strip()
+
+    @staticmethod
+    def _trigrams(text: str) -> Counter:
+        grams = Counter()
+        for word in text.split():
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                grams[padded[i:i + 3]] += 1
+        return grams
+
+    def _centroid(self, examples) -> Dict[str, float]:
+        centroid = Counter()
+        for example in examples:
+            centroid.update(self._trigrams(self.normalize(example)))
+        norm = math.sqrt(sum(v * v for v in centroid.values())) or 1.0
+        return {gram: v / norm for gram, v in centroid.items()}
+
+    @staticmethod
+    def _cosine(grams: Counter, centroid: Dict[str, float]) -> float:
+        norm = math.sqrt(sum(v * v for v in grams.values()))
+        if not norm:
+            return 0.0
+        return sum(v * centroid.get(gram, 0.0) for gram, v in grams.items()) / norm
+
+    @staticmethod
+    def _within_edit_distance(a: str, b: str, max_distance: int) -> bool:
+        if abs(len(a) - len(b)) > max_distance:
+            return False
+        previous = list(range(len(b) + 1))
+        for i, char_a in enumerate(a, 1):
+            current = [i]
+            for j, char_b in enumerate(b, 1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+            if min(current) > max_distance:
+                return False
+            previous = current
+        return previous[-1] <= max_distance
+
+    def token_category(self, token: str) -> str:
+        category = self._token_cache.get(token)
+        if category is None:
+            category = self._match_token(token)
+            if len(self._token_cache) < 10000:
+                self._token_cache[token] = category
+        return category
+
+    def _match_token(self, token: str) -> str:
+        if token in self.lexicon:
+            return self.lexicon[token]
+        # short tokens are only trusted on an exact match: "hell" is one edit away from "hello"
+        if len(token) < self.FUZZY_MIN_LENGTH or token.isdigit():
+            return 'other'
+        max_distance = 1 if len(token) < 8 else 2
+        for length in range(len(token) - max_distance, len(token) + max_distance + 1):
+            for word, _ in self.fuzzy_candidates.get(length, ()):
+                if self._within_edit_distance(token, word, max_distance):
+                    return 'fuzzy'
+        return 'other'
+
+    def classify(self, message: str) -> Tuple[str, float]:
+        """
+        Returns ('yes', confidence) when the message is a greeting or a request for help, otherwise ('no', confidence).
+        """
+        text = self.normalize(message)
+        tokens = text.split()
+        if not tokens:
+            return 'no', 1.0
+
+        categories = [self.token_category(token) for token in tokens]
+        signal_count = sum(category in ('greeting', 'help') for category in categories)
+        fuzzy_count = categories.count('fuzzy')
+        other_count = categories.count('other')
+        coverage = 1 - other_count / len(tokens)
+
+        grams = self._trigrams(text)
+        positive = self._cosine(grams, self.positive_centroid)
+        negative = self._cosine(grams, self.negative_centroid)
+        ngram_probability = positive / (positive + negative) if positive + negative else 0.5
+
+        if signal_count:
+            label = 'yes'
+            confidence = 0.6 * coverage + 0.4 * ngram_probability
+        elif other_count >= 2:
+            label = 'no'
+            confidence = 0.7 + 0.3 * (1 - ngram_probability)
+        elif fuzzy_count:
+            # a misspelt greeting word is the only evidence: leave the decision to the LLM
+            label = 'yes'
+            confidence = min(0.6 * coverage + 0.4 * ngram_probability, self.uncertain_confidence)
+        else:
+            label = 'yes' if ngram_probability >= 0.5 else 'no'
+            confidence = 0.8 * abs(ngram_probability - 0.5) * 2
+            if label == 'yes':
+                # trigram similarity alone ("hell" vs "hello") is not enough to answer with the canned greeting
+                confidence = min(confidence, self.uncertain_confidence)
+
+        return label, round(min(max(confidence, 0.0), 1.0), 4)
+
+    @property
+    def uncertain_confidence(self) -> float:
+        # highest confidence that still falls back to the LLM
+        return max(0.0, round(self.threshold - 0.05, 4))
+
+    def is_confident(self, confidence: float) -> bool:
+        return confidence >= self.threshold
@@ -0,0 +1,64 @@
+from src.backend.prompts import ProductMapLayer
+from src.backend.completion_cache import CompletionCache
+from src.backend.catalog_features import normalize_mapped_dictionary
+from src.database.sqlite_cache_store import SQLiteCacheStore
+from src.constants import MODEL, MAPPING_CACHE_DB_PATH
+from typing import Any, Dict, List
+from src.logging import logging
+import hashlib
+import json
+
+logger = logging()
+
+# changes whenever the mapping prompt text changes, which retires every mapping made with the old prompt
+MAPPING_PROMPT_VERSION = hashlib.sha256(ProductMapLayer.product_map_layer.encode('utf-8')).hexdigest()[:16]
+
+
+class MappingCache:
+    """
+    Content-addressed store of product mappings: the key is the sha256 of the description, the
+    mapping prompt version and the model, so an unchanged product is never sent to the LLM twice
+    and editing ProductMapLayer invalidates every entry automatically.
+    """
+    def __init__(self, store: Any, model: str = MODEL, prompt_version: str = MAPPING_PROMPT_VERSION):
+        logger.info(f"MappingCache instance created (prompt version {prompt_version}, model {model}).")
+        self.store = store
+        self.model = model
+        self.prompt_version = prompt_version
+
+    def key(self, description: str) -> str:
+        return CompletionCache.make_key(
+            'product.mapping',
+            description=str(description).strip(),
+            prompt_version=self.prompt_version,
+            model=self.model
+        )
+
+    def lookup(self, descriptions: List[str]) -> Dict[int, Dict[str, str]]:
+        """
+        Returns the cached mappings by position in descriptions.
+        """
+        keys = [self.key(description) for description in descriptions]
+        stored = self.store.get_many(list(set(keys)))
+        mappings = {}
+        for position, key in enumerate(keys):
+            if key in stored:
+                mappings[position] = json.loads(stored[key])
+        logger.info(f"[MappingCache.lookup] {len(mappings)} of {len(descriptions)} descriptions served from the mapping cache.")
+        return mappings
+
+    def store_mappings(self, descriptions: List[str], mappings: List[Dict]) -> None:
+        """
+        Stores the mappings that pass validation, as the mapper returned them; invalid ones are mapped again
+        on the next ingestion.
+        """
+        entries = {}
+        for description, mapping in zip(descriptions, mappings):
+            _, problems = normalize_mapped_dictionary(mapping)
+            if not problems:
+                entries[self.key(description)] = json.dumps(mapping)
+        self.store.set_many(entries)
+        logger.info(f"[MappingCache.store_mappings] {len(entries)} of {len(descriptions)} new mappings cached.")
+
+
+mapping_cache = MappingCache(SQLiteCacheStore(MAPPING_CACHE_DB_PATH, table_name='product_mappings')) if MAPPING_CACHE_DB_PATH else None
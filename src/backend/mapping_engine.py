@@ -0,0 +1,176 @@
+from src.constants import (
+    MAPPING_MAX_WORKERS,
+    MAPPING_REQUESTS_PER_MINUTE,
+    MAPPING_TOKENS_PER_MINUTE,
+    MAPPING_MAX_RETRIES,
+    MAPPING_BACKOFF_SECONDS
+)
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+from src.logging import logging
+import threading
+import random
+import openai
+import time
+
+logger = logging()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count (about 4 characters per token), good enough to pace requests against a tokens/min limit.
+    """
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at per_minute / 60 units per second.
+    It holds at most burst_seconds worth of units, so a fresh bucket cannot fire a whole minute of requests at once.
+    """
+    def __init__(self, per_minute: int, burst_seconds: float = 10.0):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """
+        Blocks until amount units are available and takes them. Returns the seconds spent waiting.
+        """
+        # a single request larger than the bucket would wait forever, it waits for a full bucket instead
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    """
+    Paces calls against both OpenAI limits of the key (requests/min and tokens/min). pause() holds every
+    worker back after a 429 so the pool backs off together instead of hammering the limit thread by thread.
+    """
+    def __init__(self, requests_per_minute: int = MAPPING_REQUESTS_PER_MINUTE, tokens_per_minute: int = MAPPING_TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens: int) -> float:
+        with self._lock:
+            paused_for = self._paused_until - time.monotonic()
+        waited = 0.0
+        if paused_for > 0:
+            time.sleep(paused_for)
+            waited += paused_for
+        waited += self.requests.acquire(1)
+        waited += self.tokens.acquire(tokens)
+        return waited
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        value = headers.get('retry-after')
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class MappingEngine:
+    """
+    Runs one LLM call per item on a bounded worker pool, paced by a RateLimiter, and returns the results
+    in input order. Rate-limited calls (HTTP 429) are retried with exponential backoff and jitter, honouring
+    the retry-after header; any other error aborts the run as the sequential mapping did.
+    """
+    def __init__(self,
+                 map_function: Callable[[Any], Any],
+                 token_estimator: Callable[[Any], int] = lambda item: estimate_tokens(str(item)),
+                 max_workers: int = MAPPING_MAX_WORKERS,
+                 limiter: Optional[RateLimiter] = None,
+                 max_retries: int = MAPPING_MAX_RETRIES,
+                 backoff_seconds: float = MAPPING_BACKOFF_SECONDS):
+        self.map_function = map_function
+        self.token_estimator = token_estimator
+        self.max_workers = max(1, max_workers)
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._stats_lock = threading.Lock()
+        self._started = time.monotonic()
+        self.stats = {}
+
+    def _count(self, key: str, amount: Union[int, float] = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _call(self, item: Any) -> Any:
+        tokens = self.token_estimator(item)
+        for attempt in range(self.max_retries + 1):
+            self._count('throttled_seconds', self.limiter.acquire(tokens))
+            self._count('requests')
+            try:
+                result = self.map_function(item)
+                self._count('tokens_estimated', tokens)
+                return result
+            except openai.RateLimitError as e:
+                self._count('rate_limited')
+                if attempt == self.max_retries:
+                    logger.error(f"[MappingEngine] Still rate limited after {self.max_retries} retries.")
+                    raise
+                delay = retry_after_seconds(e) or self.backoff_seconds * 2 ** attempt
+                delay *= 1 + random.random() * 0.25
+                logger.warning(f"[MappingEngine] Rate limited (429), retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries}).")
+                self.limiter.pause(delay)
+
+    def _run(self, item: Any) -> Any:
+        result = self._call(item)
+        with self._stats_lock:
+            self.stats['completed'] += 1
+            completed, total = self.stats['completed'], self.stats['items']
+        if completed % max(1, total // 10) == 0 or completed == total:
+            elapsed = time.monotonic() - self._started
+            logger.info(f"[MappingEngine] {completed}/{total} mapped, {completed / elapsed if elapsed else 0.0:.1f} rows/s.")
+        return result
+
+    def map_all(self, items: List[Any]) -> List[Any]:
+        """
+        Maps every item and returns the results in the order of items. The run is summarized in self.stats.
+        """
+        self.stats = {'items': len(items), 'completed': 0, 'requests': 0, 'rate_limited': 0,
+                      'tokens_estimated': 0, 'throttled_seconds': 0.0}
+        self._started = time.monotonic()
+        results = []
+        if items:
+            executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(items)))
+            try:
+                futures = [executor.submit(self._run, item) for item in items]
+                results = [future.result() for future in futures]
+            finally:
+                # a failed item stops the run without mapping the rows still queued
+                executor.shutdown(wait=True, cancel_futures=True)
+        elapsed = time.monotonic() - self._started
+        self.stats['elapsed_seconds'] = round(elapsed, 3)
+        self.stats['rows_per_second'] = round(len(items) / elapsed, 3) if elapsed else 0.0
+        self.stats['throttled_seconds'] = round(self.stats['throttled_seconds'], 3)
+        logger.info(f"[MappingEngine] Run finished: {self.throughput()}")
+        return results
+
+    def throughput(self) -> Dict[str, Union[int, float]]:
+        with self._stats_lock:
+            return dict(self.stats)
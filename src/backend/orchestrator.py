@@ -1,20 +1,30 @@
 from src.backend.prompts import *
 from src.backend.data_ingestion import DataIngestion
 from src.backend.product_recommender import ProductRecommendation
+from src.backend.catalog_cache import catalog_cache
+from src.backend.greeting_classifier import GreetingClassifier
+from src.backend.response_sanitizer import sanitize_assistant_response
+from src.backend.profile_detector import ProfileDetector, AMBIGUOUS, CONFIRMED
+from src.backend.completion_cache import cached_chat_completion, cached_moderation_flagged
 from src.logging import logging
+from src.utils import validate_json_schema, filter_error_lines
 from tenacity import retry, wait_random_exponential, stop_after_attempt
-from src.constants import MODEL, MODERATION_MODEL, OPENAI_API_KEY
+from src.constants import MODEL, MODERATION_MODEL, OPENAI_API_KEY, CHAT_TURN_MAX_WORKERS, RESPONSE_FILTER_MODE
 from src.constants import PRODUCT_DETAIL_FILE, S3_FILE_NAME
 from src.database.load_from_database import LoadFromDatabase
 from pandas import DataFrame
+from concurrent.futures import ThreadPoolExecutor
 import openai
 import json
-from typing import Union, Optional, Dict
+from typing import Union, Optional, Dict, Iterator
 import re, ast
 
 logger = logging()
 openai.api_key = OPENAI_API_KEY
 
+# Shared by every Orchestrator so the number of in-flight OpenAI calls stays bounded per process.
+turn_executor = ThreadPoolExecutor(max_workers=CHAT_TURN_MAX_WORKERS, thread_name_prefix='chat-turn')
+
 class Orchestrator:
     def __init__(self):
         logger.info("[__init__] Orchestrator instance created.")
@@ -23,6 +33,9 @@ class Orchestrator:
         self.intent_confirmation = IntentConfirmation.intent_confirmation
         self.dictionary_present = DictionaryPresent.dictionary_present
         self.filter_json = FilterJson.system_instruction
+        self.turn_analyzer = TurnAnalyzer.system_instruction
+        self.greeting_classifier = GreetingClassifier()
+        self.profile_detector = ProfileDetector()
         self.load_from_db = LoadFromDatabase()
         self.data_ingestor = DataIngestion()
 
@@ -43,6 +56,36 @@ class Orchestrator:
             logger.error(f"[initialise_conversation] Exception in initialise_conversation: {e}")
             raise e
     
+    def greeting_check(self, input_message: str) -> str:
+        """
+        This method checks if the first message is a greeting or a request for help.
+        The local GreetingClassifier answers on its own when it is confident enough,
+        otherwise the decision falls back to the LLM. Returns 'yes' or 'no'.
+        """
+        try:
+            label, confidence = self.greeting_classifier.classify(input_message)
+            if self.greeting_classifier.is_confident(confidence):
+                logger.info(f"[greeting_check] Local classifier result: {label} (confidence={confidence})")
+                return label
+
+            logger.info(f"[greeting_check] Low confidence ({confidence}), falling back to the LLM.")
+            return self.llm_greeting_check(input_message)
+
+        except Exception as e:
+            logger.error(f"[greeting_check] Error occurred in greeting_check: {e}")
+            raise
+
+    def llm_greeting_check(self, input_message: str) -> str:
+        """
+        This method asks the LLM if the message is a greeting or a request for help.
+        """
+        response = cached_chat_completion(
+            model=MODEL,
+            messages=[{"role": "user", "content": GreetingCheck.instruction.format(message=input_message)}],
+            temperature=0
+        )
+        return response.strip().lower()
+
     @retry(wait=wait_random_exponential(min=1, max=20), stop=stop_after_attempt(6))
     def get_chat_completion(self, input_messages: list, json_format: bool = False) -> Union[str, Optional[Dict]]:
         """ 
@@ -57,23 +100,25 @@ class Orchestrator:
                 input_messages[-1]['content'] += system_message_json_output
 
                 logger.info("[get_chat_completion] Sending request to OpenAI API with JSON format.")
-                message = openai.chat.completions.create(
+                # the conversation itself is never cached
+                message = cached_chat_completion(
+                    cacheable=False,
                     model=MODEL,
                     messages=input_messages,
                     response_format={'type': 'json_object'},
                     seed=1234
                 )
-                output = json.loads(message.choices[0].message.content)
+                output = json.loads(message)
                 logger.info(f"[get_chat_completion] Received JSON response: {output}")
 
             else:
                 logger.info("[get_chat_completion] Sending request to OpenAI API for normal text response.")
-                message = openai.chat.completions.create(
+                output = cached_chat_completion(
+                    cacheable=False,
                     model=MODEL,
                     messages=input_messages,
                     seed=2345
                 )
-                output = message.choices[0].message.content
                 logger.info(f"[get_chat_completion] Received text response: {output}")
 
             logger.info("[get_chat_completion] get_chat_completion executed successfully.")
@@ -83,20 +128,141 @@ class Orchestrator:
             logger.error(f"[get_chat_completion] Error occurred in get_chat_completion: {e}")
             raise
                 
+    def stream_chat_completion(self, input_messages: list) -> Iterator[str]:
+        """
+        This function streams the chat completion, yielding the text deltas as they arrive.
+        """
+        try:
+            logger.info(f"[stream_chat_completion] Streaming chat completion for input_messages={input_messages}")
+            # the conversational reply is sampled and carries the user's conversation: never cached
+            stream = openai.chat.completions.create(model=MODEL, messages=input_messages, seed=2345, stream=True)
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            logger.info("[stream_chat_completion] Stream completed successfully.")
+
+        except Exception as e:
+            logger.error(f"[stream_chat_completion] Error occurred in stream_chat_completion: {e}")
+            raise
+
     def moderation_check(self, input_message: str) -> str:
         """ 
         This function is used to check for hatefull messages.
         """
         try:
             logger.info(f"[moderation_check] Checking moderation for message: {input_message}")
-            response = openai.moderations.create(model=MODERATION_MODEL, input=input_message)
-            flagged_status = 'flagged' if response.results[0].flagged else 'not flagged'
+            flagged = cached_moderation_flagged(MODERATION_MODEL, input_message)
+            flagged_status = 'flagged' if flagged else 'not flagged'
             logger.info(f"[moderation_check] Moderation result: {flagged_status}")
             return flagged_status
         except Exception as e:
             logger.error(f"[moderation_check] Error occurred in moderation_check: {e}")
             raise
     
+    def run_turn_post_processing(self, assistant_response: str) -> Dict[str, Union[str, bool, Dict, None]]:
+        """
+        This method runs the post-processing of a chat turn: moderation, JSON filtering and
+        detection of the confirmed user profile. Filtering and profile detection are local; when
+        the LLM is still needed (RESPONSE_FILTER_MODE=llm or an ambiguous profile) a single
+        analyze_turn call replaces the separate filter, intent and dictionary calls. LLM work is
+        fanned out on the shared turn executor and joined here. If moderation flags the response,
+        the remaining call is cancelled and its result discarded.
+        """
+        try:
+            logger.info("[run_turn_post_processing] Fanning out moderation, JSON filtering and profile detection.")
+            moderation_future = turn_executor.submit(self.moderation_check, assistant_response)
+            outcome, user_profile = self.profile_detector.detect(assistant_response)
+            analysis_future = None
+            if RESPONSE_FILTER_MODE == 'llm' or outcome == AMBIGUOUS:
+                logger.info(f"[run_turn_post_processing] Asking the turn analyzer (filter mode: {RESPONSE_FILTER_MODE}, profile: {outcome}).")
+                analysis_future = turn_executor.submit(self.analyze_turn, assistant_response)
+
+            try:
+                flagged = moderation_future.result() == 'flagged'
+            except Exception:
+                if analysis_future:
+                    analysis_future.cancel()
+                raise
+
+            if flagged:
+                logger.info("[run_turn_post_processing] Assistant response flagged, discarding remaining calls.")
+                if analysis_future:
+                    analysis_future.cancel()
+                return {
+                    'flagged': True,
+                    'filtered_response': None,
+                    'user_profile': None
+                }
+
+            analysis = analysis_future.result() if analysis_future else None
+            result = {
+                'flagged': False,
+                'filtered_response': analysis['display_text'] if analysis and RESPONSE_FILTER_MODE == 'llm' else sanitize_assistant_response(assistant_response),
+                'user_profile': analysis['user_profile'] if analysis and outcome == AMBIGUOUS else user_profile
+            }
+            logger.info(f"[run_turn_post_processing] Post-processing completed: {result}")
+            return result
+
+        except Exception as e:
+            logger.error(f"[run_turn_post_processing] Error occurred in run_turn_post_processing: {e}")
+            raise
+
+    def parse_turn_analysis(self, response: str, assistant_response: str) -> Dict[str, Union[str, bool, Dict, None]]:
+        """
+        Validates the turn analyzer output against TurnAnalyzer.json_schema and normalizes the profile
+        to the {'user_req': {...}} structure. Invalid output falls back to the local sanitizer and no profile.
+        """
+        try:
+            parsed = json.loads(response)
+        except (TypeError, ValueError) as e:
+            parsed, errors = None, [f"invalid JSON: {e}"]
+        else:
+            errors = validate_json_schema(parsed, TurnAnalyzer.json_schema['schema'])
+        if errors:
+            logger.warning(f"[parse_turn_analysis] Turn analysis rejected by the schema: {errors}")
+            return {
+                'display_text': sanitize_assistant_response(assistant_response),
+                'intent_confirmed': False,
+                'user_profile': None
+            }
+
+        user_profile = None
+        if parsed['intent_confirmed'] and parsed['user_profile']:
+            outcome, user_profile = self.profile_detector.validate(parsed['user_profile'])
+            if outcome != CONFIRMED:
+                logger.warning(f"[parse_turn_analysis] Turn analysis profile not valid: {parsed['user_profile']}")
+        return {
+            'display_text': filter_error_lines(parsed['display_text']),
+            'intent_confirmed': user_profile is not None,
+            'user_profile': user_profile
+        }
+
+    def analyze_turn(self, assistant_response: str) -> Dict[str, Union[str, bool, Dict, None]]:
+        """
+        Single structured call returning the cleaned display text, the intent-confirmed flag and
+        the extracted profile together, in place of the FilterJson, IntentConfirmation and
+        DictionaryPresent calls.
+        """
+        logger.info("[analyze_turn] analyze_turn method called.")
+        try:
+            messages = [
+                {'role': 'system', 'content': self.turn_analyzer},
+                {'role': 'user', 'content': assistant_response}
+            ]
+            response = cached_chat_completion(
+                model=MODEL,
+                messages=messages,
+                temperature=0,
+                seed=1234,
+                response_format={'type': 'json_schema', 'json_schema': TurnAnalyzer.json_schema}
+            )
+            logger.info(f"[analyze_turn] Raw response received from OpenAI API: {response}")
+            return self.parse_turn_analysis(response, assistant_response)
+
+        except Exception as e:
+            logger.error(f"[analyze_turn] Error occurred in analyze_turn: {e}")
+            raise
+
     def intent_confirmation_check(self, input_message: str) -> Dict[str, Union[str, int, bool]]:
         """ 
         This function takes the assistant's response and evaluates if the chatbot has captured the user's profile clearly. 
@@ -118,15 +284,16 @@ class Orchestrator:
             logger.info(f"[intent_confirmation_check] Constructed messages list: {messages}")
             logger.info("[intent_confirmation_check] Sending intent confirmation request to OpenAI API.")
             
-            response = openai.chat.completions.create(
+            response = cached_chat_completion(
                 model=MODEL,
                 messages=messages,
                 response_format={'type': 'json_object'},
+                temperature=0,
                 seed=1234
             )
             logger.info(f"[intent_confirmation_check] Raw response received from OpenAI API: {response}")
             
-            response = json.loads(response.choices[0].message.content)
+            response = json.loads(response)
             logger.info(f"[intent_confirmation_check] Parsed JSON response: {response}")
                             
             return response
@@ -193,7 +360,7 @@ class Orchestrator:
                 {'role': 'user', 'content': input_message}
             ]
             logger.info(f"[dictionary_present_check] Constructed messages list for dictionary check: {messages}")
-            response = openai.chat.completions.create(
+            response = cached_chat_completion(
                 model=MODEL,
                 messages=messages,
                 temperature=0,
@@ -202,7 +369,7 @@ class Orchestrator:
             )
             logger.info(f"[dictionary_present_check] Raw response received from OpenAI API: {response}")
 
-            parsed = json.loads(response.choices[0].message.content)
+            parsed = json.loads(response)
             logger.info(f"[dictionary_present_check] Parsed JSON response from dictionary check: {parsed}")
             return parsed
         
@@ -219,6 +386,8 @@ class Orchestrator:
             logger.info("[start_internal_data_ingestion] start_internal_data_ingestion method called.")
             self.data_ingestor.start_data_ingestion(local_file_path=local_file_path, 
                                                     s3_file_name=s3_file_name)
+            # the new catalog version is picked up on the next recommendation
+            catalog_cache.invalidate()
             logger.info("[start_internal_data_ingestion] Data ingestion completed successfully.")
         except Exception as e:
             logger.error(f"[start_internal_data_ingestion] Error occurred in start_internal_data_ingestion: {e}")
@@ -226,13 +395,14 @@ class Orchestrator:
     
     def get_laptop_lists(self) -> DataFrame:
         """ 
-        This method loads mapped data from PostgreSQL database for querying best laptop to the user.
+        This method returns the mapped laptop catalog for querying best laptop to the user,
+        served from the process-wide catalog cache.
         """
         try:
             logger.info("[get_laptop_lists] get_laptop_lists method called.")
-            data_from_db = self.load_from_db.fetch_query_engine_data()
-            logger.info("[get_laptop_lists] Data loaded from database successfully.")
-            return data_from_db
+            catalog = catalog_cache.get()
+            logger.info("[get_laptop_lists] Catalog served from cache successfully.")
+            return catalog
         except Exception as e:
             logger.error(f"[get_laptop_lists] Error occurred in get_laptop_lists: {e}")
             raise
@@ -251,13 +421,13 @@ class Orchestrator:
             ]
             
             logger.info(f"[route_to_human_agent] Sending messages to OpenAI API: {messages}")
-            response = openai.chat.completions.create(
+            response = cached_chat_completion(
                 messages=messages,
                 model=MODEL,
                 temperature=0
             )
             
-            ai_reply = response.choices[0].message.content.strip().lower()
+            ai_reply = response.strip().lower()
             logger.info(f"[route_to_human_agent] AI reply received: {ai_reply}")
 
             if ai_reply == "yes":
@@ -281,21 +451,26 @@ class Orchestrator:
     def filter_json_from_response(self, input_message: str = None) -> str:
         """ 
         This method removes unwanted json response from the assistance response.
+        By default the local sanitizer strips dict literals, code blocks and echoed error lines;
+        set RESPONSE_FILTER_MODE=llm to use the FilterJson prompt instead.
         """
         try:
             logger.info("Entered [filter_response_from_json] method, checking for unwanted charecters.")
+            if RESPONSE_FILTER_MODE != 'llm':
+                response = sanitize_assistant_response(input_message)
+                logger.info(f"Filtered message: {response}")
+                return response
+
             messages = [
                 {'role': 'system', 'content': self.filter_json},
                 {'role': 'user', 'content': input_message}
             ]
             
-            response = openai.chat.completions.create(
+            response = cached_chat_completion(
                 messages=messages,
                 model=MODEL,
                 temperature=0
             )
-            
-            response = response.choices[0].message.content
             logger.info(f"Filtered message: {response}")
             return response
             
@@ -1,9 +1,14 @@
 from src.backend.prompts import ProductMapLayer
-from src.constants import MODEL, OPENAI_API_KEY, PRODUCT_DETAIL_FILE, DESCRIPTION_COLUMN, MAPPED_COLUMN, MAPPED_DATA_FILE_PATH
+from src.backend.completion_cache import cached_chat_completion
+from src.backend.mapping_engine import MappingEngine, RateLimiter, estimate_tokens
+from src.backend.catalog_features import normalize_mapped_dictionary
+from src.backend.mapping_cache import mapping_cache as default_mapping_cache, MappingCache
+from src.backend.rule_mapper import RuleBasedMapper
+from src.constants import MODEL, OPENAI_API_KEY, PRODUCT_DETAIL_FILE, DESCRIPTION_COLUMN, MAPPED_COLUMN, MAPPED_DATA_FILE_PATH, MAPPING_BATCH_SIZE, MAPPING_MODE
 from src.utils import read_structured_file, write_structured_data
 import openai
 import json
-from typing import Union, Dict, List
+from typing import Union, Dict, List, Tuple, Optional
 from src.logging import logging
 from pandas import DataFrame
 import pandas as pd
@@ -11,9 +16,29 @@ import pandas as pd
 logger = logging()
 openai.api_key = OPENAI_API_KEY
 
+# expected size of one mapping reply, counted against the tokens/min limit with the prompt
+MAPPING_COMPLETION_TOKENS = 60
+
 class ProductMapper:
-    def __init__(self):
+    def __init__(self, batch_size: int = MAPPING_BATCH_SIZE, mapping_cache: Optional[MappingCache] = default_mapping_cache):
         logger.info("ProductMapper object instansiated.")
+        self.batch_size = max(1, batch_size)
+        self.mapping_cache = mapping_cache
+        self.rule_mapper = RuleBasedMapper() if MAPPING_MODE == 'rules' else None
+        # single and batched requests count against the same OpenAI limits
+        rate_limiter = RateLimiter()
+        self.mapping_engine = MappingEngine(
+            map_function=self.do_product_mapping,
+            token_estimator=lambda description: estimate_tokens(ProductMapLayer.product_map_layer + str(description)) + MAPPING_COMPLETION_TOKENS,
+            limiter=rate_limiter
+        )
+        self.batch_mapping_engine = MappingEngine(
+            map_function=self.do_batch_product_mapping,
+            token_estimator=lambda batch: estimate_tokens(
+                ProductMapLayer.product_map_layer + ProductMapLayer.batch_instruction + ''.join(description for _, description in batch)
+            ) + MAPPING_COMPLETION_TOKENS * len(batch),
+            limiter=rate_limiter
+        )
     
     def do_product_mapping(self, laptop_description: str = '') -> Dict[str, Union[str, int, bool]]:
         """
@@ -21,29 +46,137 @@ class ProductMapper:
         """
         try:
             logger.info("do_product_mapping called with provided laptop description.")
-            ProductMapLayer.laptop_description = laptop_description
             product_mapper_prompt = ProductMapLayer.product_map_layer
             
             messages = [
-                {'role': 'system', 'content': product_mapper_prompt}
+                {'role': 'system', 'content': product_mapper_prompt},
+                {'role': 'user', 'content': str(laptop_description)}
             ]
             
             logger.info(f"Constructed messages for API request: {messages}")
             logger.info("Sending product mapping request to OpenAI API.")
-            response = openai.chat.completions.create(
+            response = cached_chat_completion(
                 model=MODEL,
                 messages=messages,
                 seed=5678,
                 temperature=0,
                 response_format={'type': 'json_object'}
             )
-            parsed = json.loads(response.choices[0].message.content)
+            parsed = json.loads(response)
             logger.info(f"Parsed response received from OpenAI API: {parsed}")
             return parsed
         except Exception as e:
             logger.error(f"Error in do_product_mapping: {e}")
             raise
         
+    def do_batch_product_mapping(self, batch: List[Tuple[int, str]]) -> Dict[int, Dict[str, str]]:
+        """
+        Maps several (row_id, description) pairs with one request. Returns the valid mappings by row_id;
+        row ids missing from the reply or with a malformed mapping are left out for the caller to re-queue.
+        """
+        try:
+            logger.info(f"do_batch_product_mapping called with {len(batch)} laptop descriptions.")
+            messages = [
+                {'role': 'system', 'content': ProductMapLayer.product_map_layer + ProductMapLayer.batch_instruction},
+                {'role': 'user', 'content': json.dumps([{'row_id': row_id, 'description': str(description)} for row_id, description in batch], ensure_ascii=False)}
+            ]
+            response = cached_chat_completion(
+                model=MODEL,
+                messages=messages,
+                seed=5678,
+                temperature=0,
+                response_format={'type': 'json_object'}
+            )
+        except Exception as e:
+            logger.error(f"Error in do_batch_product_mapping: {e}")
+            raise
+
+        expected = {str(row_id): row_id for row_id, _ in batch}
+        mappings = {}
+        try:
+            items = json.loads(response).get('mappings', [])
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"[do_batch_product_mapping] Malformed batch reply, re-queueing {len(batch)} rows: {e}")
+            return mappings
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict) or str(item.get('row_id')) not in expected:
+                continue
+            mapping, problems = normalize_mapped_dictionary(item.get('mapping'))
+            if not problems:
+                mappings[expected[str(item.get('row_id'))]] = mapping
+        return mappings
+
+    def map_descriptions(self, descriptions: List[str]) -> List[Dict[str, Union[str, int, bool]]]:
+        """
+        Maps the descriptions in order. Descriptions already in the mapping cache (same text, prompt
+        version and model) are served from it, only the others are sent to the LLM and cached afterwards.
+        """
+        if self.mapping_cache is None:
+            return self.map_with_llm(descriptions)
+
+        mappings = self.mapping_cache.lookup(descriptions)
+        pending = [position for position in range(len(descriptions)) if position not in mappings]
+        if pending:
+            pending_descriptions = [descriptions[position] for position in pending]
+            new_mappings = self.map_with_llm(pending_descriptions)
+            self.mapping_cache.store_mappings(pending_descriptions, new_mappings)
+            mappings.update(zip(pending, new_mappings))
+        return [mappings[position] for position in range(len(descriptions))]
+
+    def map_with_llm(self, descriptions: List[str]) -> List[Dict[str, Union[str, int, bool]]]:
+        """
+        Maps the descriptions in order with the LLM. With batch_size > 1 they are sent batch_size per request
+        and every description the batch reply missed or got wrong is mapped again on its own.
+        """
+        if self.batch_size == 1:
+            return self.mapping_engine.map_all(descriptions)
+
+        items = list(enumerate(descriptions))
+        batches = [items[start:start + self.batch_size] for start in range(0, len(items), self.batch_size)]
+        mappings = {}
+        for batch_mappings in self.batch_mapping_engine.map_all(batches):
+            mappings.update(batch_mappings)
+
+        requeued = [row_id for row_id in range(len(descriptions)) if row_id not in mappings]
+        logger.info(f"[map_with_llm] {len(descriptions)} descriptions in {len(batches)} batch requests, "
+                    f"{len(requeued)} re-queued individually.")
+        if requeued:
+            for row_id, mapping in zip(requeued, self.mapping_engine.map_all([descriptions[row_id] for row_id in requeued])):
+                mappings[row_id] = mapping
+        return [mappings[row_id] for row_id in range(len(descriptions))]
+
+    @staticmethod
+    def is_mapped(value) -> bool:
+        if isinstance(value, (dict, list)):
+            return True
+        return bool(pd.notnull(value) and value != "")
+
+    def map_missing_rows(self, data: DataFrame) -> DataFrame:
+        """
+        Fills MAPPED_COLUMN for the rows that have no mapping yet (all rows when the column is absent).
+        With MAPPING_MODE=rules the structured catalog columns are mapped locally first (RuleBasedMapper);
+        the remaining rows go through the LLM concurrently (and batched, see map_descriptions). Rows keep their order.
+        """
+        if MAPPED_COLUMN in data.columns:
+            missing = ~data[MAPPED_COLUMN].map(self.is_mapped)
+        else:
+            data[MAPPED_COLUMN] = None
+            missing = pd.Series(True, index=data.index)
+        missing_index = data.index[missing.to_numpy(dtype=bool)]
+        logger.info(f"[map_missing_rows] {len(missing_index)} of {len(data)} rows need mapping.")
+        data[MAPPED_COLUMN] = data[MAPPED_COLUMN].astype(object)
+        if len(missing_index) and self.rule_mapper is not None:
+            rule_mappings = self.rule_mapper.map_frame(data.loc[missing_index])
+            for index, mapping in rule_mappings.dropna().items():
+                data.at[index, MAPPED_COLUMN] = mapping
+            missing_index = rule_mappings.index[rule_mappings.isna().to_numpy()]
+            logger.info(f"[map_missing_rows] {len(missing_index)} rows left for the LLM after the rule-based mapping.")
+        if len(missing_index):
+            mappings = self.map_descriptions(data.loc[missing_index, DESCRIPTION_COLUMN].tolist())
+            for index, mapping in zip(missing_index, mappings):
+                data.at[index, MAPPED_COLUMN] = mapping
+        return data
+
     def read_data(self, file_path: str = None) -> DataFrame:
         """ 
         This function is used to read the structured file / dataset for mapping.
@@ -83,14 +216,7 @@ class ProductMapper:
             data = self.read_data(file_dir)
             logger.info("File reading was successful in start_product_mapping module.")
 
-            if MAPPED_COLUMN in data.columns:
-                data[MAPPED_COLUMN] = data.apply(
-                    lambda row: row[MAPPED_COLUMN] if pd.notnull(row[MAPPED_COLUMN]) and row[MAPPED_COLUMN] != "" 
-                    else self.do_product_mapping(row[DESCRIPTION_COLUMN]),
-                    axis=1
-                )
-            else:
-                data[MAPPED_COLUMN] = data[DESCRIPTION_COLUMN].map(lambda val: self.do_product_mapping(val))
+            data = self.map_missing_rows(data)
             logger.info("Mapping applied successfully to DESCRIPTION_COLUMN.")
 
             self.write_data(data, MAPPED_DATA_FILE_PATH)
@@ -113,15 +239,8 @@ class ProductMapper:
             else:
                 logger.info("[start_dataframe_product_mapping] DataFrame provided directly for mapping.")
 
-            if MAPPED_COLUMN in df.columns:
-                df[MAPPED_COLUMN] = df.apply(
-                    lambda row: row[MAPPED_COLUMN] if pd.notnull(row[MAPPED_COLUMN]) and row[MAPPED_COLUMN] != ""
-                    else self.do_product_mapping(row[DESCRIPTION_COLUMN]),
-                    axis=1
-                )
-            else:
-                df[MAPPED_COLUMN] = df[DESCRIPTION_COLUMN].map(lambda val: self.do_product_mapping(val))
-                logger.info("Mapping applied successfully to DESCRIPTION_COLUMN in DataFrame.")
+            df = self.map_missing_rows(df)
+            logger.info("Mapping applied successfully to DESCRIPTION_COLUMN in DataFrame.")
 
             return df
 
@@ -1,10 +1,15 @@
 from src.backend.product_mapper import ProductMapper
 from src.backend.query_engine import QueryEngine
 from src.backend.prompts import ProductRecommender
+from src.backend.completion_cache import cached_chat_completion
+from src.backend.catalog_cache import catalog_cache
+from src.backend.ranking_table import ranking_table_store
+from src.backend.scoring_engine import SCORE_COLUMN
+from src.backend.recommendation_renderer import render_recommendations
 from src.database.load_from_database import LoadFromDatabase
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Optional, Tuple
 from src.logging import logging
-from src.constants import DESCRIPTION_COLUMN, BUDGET_COLUMN, OPENAI_API_KEY, MODEL
+from src.constants import DESCRIPTION_COLUMN, BUDGET_COLUMN, OPENAI_API_KEY, MODEL, QUERY_MODE, MAPPED_LEVEL_COLUMNS, RECOMMENDATION_RENDER_MODE
 import openai
 from pandas import DataFrame
 
@@ -20,13 +25,15 @@ class ProductRecommendation():
     
     def get_laptop_lists(self) -> DataFrame:
         """ 
-        This method loads mapped data from PostgreSQL database for querying best laptop to the user.
+        This method returns the mapped laptop catalog for querying best laptop to the user.
+        It is served from the process-wide catalog cache, which reloads from PostgreSQL only
+        when the catalog version changes. The returned frame is shared and must not be modified.
         """
         try:
             logger.info("[get_laptop_lists] get_laptop_lists method called.")
-            data_from_db = self.load_from_db.fetch_query_engine_data()
-            logger.info("[get_laptop_lists] Data loaded from database successfully.")
-            return data_from_db
+            catalog = catalog_cache.get()
+            logger.info("[get_laptop_lists] Catalog served from cache successfully.")
+            return catalog
         except Exception as e:
             logger.error(f"[get_laptop_lists] Error occurred in get_laptop_lists: {e}")
             raise
@@ -45,36 +52,95 @@ class ProductRecommendation():
             logger.error(f"[calculate_score] Error occurred in calculate_score: {e}")
             raise
         
+    def select_in_database(self, user_profile: Dict[str, Union[str, int]], budget: str, count: int = 3) -> Optional[Tuple[DataFrame, bool]]:
+        """
+        SQL query mode: the budget filter and the scoring run in PostgreSQL and only the top rows come back.
+        Returns None when the table was written before the typed columns existed.
+        """
+        user_levels = self.query_engine.scoring_engine.user_levels(user_profile)
+        levels = {
+            column: int(level) if level in (1, 2, 3) else None
+            for column, level in zip(MAPPED_LEVEL_COLUMNS.values(), user_levels)
+        }
+        budget_value = self.query_engine.parse_budget_criteria(budget)
+        top_products = self.load_from_db.fetch_top_matches(levels, budget_value, k=count)
+        if top_products is None:
+            return None
+        if not top_products.empty:
+            return top_products, False
+        logger.info("[select_in_database] Nothing fits the budget, using the nearest alternatives above it.")
+        return self.load_from_db.fetch_top_matches(levels, budget_value, k=count, above_budget_count=10), True
+
+    def select_in_memory(self, user_profile: Dict[str, Union[str, int]], budget: str, count: int = 3) -> Tuple[DataFrame, bool]:
+        """
+        Ranks the cached catalog in-process: a lookup in the precomputed ranking table plus a budget cut,
+        or, without a matching table, a searchsorted budget cut followed by vectorized scoring.
+        """
+        database_data = self.get_laptop_lists()
+        ranking_table = ranking_table_store.get(database_data)
+        budget_value = self.query_engine.parse_budget_criteria(budget)
+        if ranking_table is not None and budget_value is not None:
+            ranked = ranking_table.lookup(self.query_engine.scoring_engine.user_levels(user_profile), budget_value, k=count)
+            if ranked is not None and len(ranked[0]):
+                positions, scores = ranked
+                return database_data.iloc[positions].assign(**{SCORE_COLUMN: scores}), False
+
+        filtered_data_by_budget = self.query_engine.filter_budget(data=database_data, 
+                                                                  criteria=budget)
+        above_budget = filtered_data_by_budget.empty
+        if above_budget:
+            logger.info("[select_in_memory] Nothing fits the budget, using the nearest alternatives above it.")
+            filtered_data_by_budget = self.query_engine.nearest_above_budget(data=database_data,
+                                                                             criteria=budget)
+        mapped_data_by_score = self.query_engine.filter_by_user_score(data=filtered_data_by_budget,
+                                                                      user_profile=user_profile)
+        return mapped_data_by_score.head(count), above_budget
+
     def recommend_product(self, user_profile: Dict[str, Union[str, int]]) -> str:
         """ 
         This method is used to extract data from the database and map with respect to score, budget 
-        and later recommend the top three product
+        and later recommend the top three product. QUERY_MODE=sql ranks inside PostgreSQL,
+        otherwise (or when the table lacks the typed columns) the cached catalog is ranked in memory.
+        RECOMMENDATION_RENDER_MODE=summary / template render the list locally (from the stored summary blurbs or the
+        spec columns), llm formats it with the ProductRecommender prompt.
         """
         try:
             logger.info("[recommend_product] recommend_product method called.")
-            database_data = self.get_laptop_lists()
             logger.info(f"User Profile = {user_profile}")
             budget = user_profile['user_req']['Budget']
-            filtered_data_by_budget = self.query_engine.filter_budget(data=database_data, 
-                                                                      criteria=budget)
-            mapped_data_by_score = self.query_engine.filter_by_user_score(data=filtered_data_by_budget,
-                                                                          user_profile=user_profile)
+            selection = None
+            if QUERY_MODE == 'sql':
+                selection = self.select_in_database(user_profile, budget)
+            if selection is None:
+                selection = self.select_in_memory(user_profile, budget)
+            top_products, above_budget = selection
+
+            if RECOMMENDATION_RENDER_MODE != 'llm':
+                recommended_products = render_recommendations(top_products.head(3), budget=budget, above_budget=above_budget,
+                                                              use_summaries=RECOMMENDATION_RENDER_MODE == 'summary')
+                logger.info(f"[recommend_product] Product recommendation rendered locally ({RECOMMENDATION_RENDER_MODE}).")
+                return recommended_products
             
-            top_3_product = mapped_data_by_score[[DESCRIPTION_COLUMN, BUDGET_COLUMN]].head(3)
+            top_3_product = top_products[[DESCRIPTION_COLUMN, BUDGET_COLUMN]].head(3)
             
+            if above_budget:
+                user_content = (f"No laptop fits within the budget of {budget}. "
+                                f"Here are the 3 closest alternatives just above it:\n{top_3_product}")
+            else:
+                user_content = f"Here are the top 3 recommended laptops:\n{top_3_product}"
             recommendation_message = [
                 {'role': 'system', 'content': self.system_message},
-                {'role': 'user', 'content': f"Here are the top 3 recommended laptops:\n{top_3_product}"}
+                {'role': 'user', 'content': user_content}
             ]
             
-            recommended_products = openai.chat.completions.create(
+            recommended_products = cached_chat_completion(
                 messages=recommendation_message,
                 model=MODEL,
                 temperature=0,
             )
             
             logger.info("[recommend_product] Product recommendation completed successfully.")
-            return recommended_products.choices[0].message.content
+            return recommended_products
             
         except Exception as e:
             logger.error(f"[recommend_product] Error occurred in recommend_product: {e}")
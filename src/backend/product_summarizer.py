@@ -0,0 +1,100 @@
+from src.backend.prompts import ProductSummary, delimiter
+from src.backend.completion_cache import CompletionCache
+from src.constants import (
+    MODEL,
+    OPENAI_API_KEY,
+    DESCRIPTION_COLUMN,
+    SUMMARY_COLUMN,
+    PRODUCT_SUMMARY_MAX_WORKERS
+)
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any
+from src.logging import logging
+from pandas import DataFrame
+import openai
+
+logger = logging()
+openai.api_key = OPENAI_API_KEY
+
+# failures worth leaving a product without a blurb for; anything else (auth, quota, bad request) fails the ingestion
+TRANSIENT_ERRORS = (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+
+def is_transient_error(error: Exception) -> bool:
+    # an exhausted quota is reported as a 429 too, but retrying the next product will not fix it
+    return isinstance(error, TRANSIENT_ERRORS) and getattr(error, 'code', None) != 'insufficient_quota'
+
+class ProductSummarizer:
+    """
+    Writes a one-sentence specs summary per product at ingestion time so recommendations can be
+    rendered without an LLM call. Summaries are kept in a store keyed by the hash of the description
+    (and of the prompt and model), so re-ingesting an unchanged product never summarizes it again.
+    """
+    def __init__(self, store: Optional[Any] = None, max_workers: int = PRODUCT_SUMMARY_MAX_WORKERS):
+        logger.info("ProductSummarizer instance created.")
+        self.store = store
+        self.max_workers = max_workers
+
+    @staticmethod
+    def summary_key(description: str) -> str:
+        return CompletionCache.make_key(
+            'product.summary',
+            model=MODEL,
+            prompt=ProductSummary.system_message,
+            description=description.strip()
+        )
+
+    def summarize(self, description: str) -> Optional[str]:
+        """
+        Returns the stored summary of the description, generating and storing it on a miss.
+        Empty descriptions give an empty summary (rendered from the spec columns instead), a transient API
+        failure gives None; any other API error (authentication, quota, ...) is raised.
+        """
+        if not isinstance(description, str) or not description.strip():
+            return ''
+        key = self.summary_key(description)
+        stored = self.store.get(key) if self.store is not None else None
+        if stored is not None:
+            return stored
+        try:
+            response = openai.chat.completions.create(
+                model=MODEL,
+                messages=[
+                    {'role': 'system', 'content': ProductSummary.system_message},
+                    {'role': 'user', 'content': f"{delimiter}{description.strip()}{delimiter}"}
+                ],
+                temperature=0,
+                seed=2468
+            )
+            summary = ' '.join(response.choices[0].message.content.split())
+        except Exception as e:
+            if not is_transient_error(e):
+                logger.error(f"[summarize] Summary request failed: {e}")
+                raise
+            logger.error(f"[summarize] Could not summarize a product, leaving it empty: {e}")
+            return None
+        if summary and self.store is not None:
+            self.store.set(key, summary)
+        return summary
+
+    def add_summaries(self, df: DataFrame) -> DataFrame:
+        """
+        Returns a copy of the frame with SUMMARY_COLUMN filled for every row.
+        """
+        try:
+            logger.info(f"[add_summaries] Summarizing {len(df)} products.")
+            descriptions = df[DESCRIPTION_COLUMN].tolist()
+            with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+                summaries = list(executor.map(self.summarize, descriptions))
+            failed = sum(1 for summary in summaries if summary is None)
+            frame = df.copy()
+            frame[SUMMARY_COLUMN] = [summary or '' for summary in summaries]
+            missing = sum(1 for summary in summaries if not summary)
+            if failed:
+                logger.error(f"[add_summaries] {failed} of {len(summaries)} summary requests failed.")
+            logger.info(f"[add_summaries] Summaries ready, {missing} of {len(summaries)} products left without one.")
+            return frame
+        except Exception as e:
+            logger.error(f"[add_summaries] Error occurred in add_summaries: {e}")
+            raise
+
@@ -0,0 +1,133 @@
+from src.backend.prompts import IntentConfirmation
+from src.backend.response_sanitizer import scan_structured_spans
+from src.logging import logging
+from typing import Dict, Optional, Tuple, Union
+import json
+import ast
+import re
+
+logger = logging()
+
+PROFILE_KEYS = ['GPU intensity', 'Display quality', 'Portability', 'Multitasking', 'Processing speed']
+BUDGET_KEY = 'Budget'
+
+# Outcomes of ProfileDetector.detect
+CONFIRMED = 'confirmed'
+NOT_CONFIRMED = 'not_confirmed'
+AMBIGUOUS = 'ambiguous'
+
+
+class ProfileDetector:
+    """
+    Local replacement for the IntentConfirmation and DictionaryPresent LLM calls.
+    Finds the user profile the assistant writes out (a dict literal, JSON, or 'key: value'
+    lines), validates it against IntentConfirmation.allowed_values plus a numeric Budget and
+    returns the normalized {'user_req': {...}} structure. Text that clearly holds a profile
+    but cannot be parsed is reported as ambiguous so the caller can ask the LLM instead.
+    """
+    budget_multipliers = {'k': 1_000, 'thousand': 1_000, 'lakh': 100_000, 'lakhs': 100_000, 'lac': 100_000, 'l': 100_000, 'crore': 10_000_000, 'cr': 10_000_000}
+
+    def __init__(self):
+        logger.info("ProfileDetector instance created.")
+        self.allowed_values = {value.lower() for value in IntentConfirmation.allowed_values}
+        self.canonical_keys = {self._key_token(key): key for key in PROFILE_KEYS + [BUDGET_KEY]}
+        key_alternation = '|'.join(re.escape(key).replace(r'\ ', r'[\s_]+') for key in PROFILE_KEYS + [BUDGET_KEY])
+        # "GPU intensity: high", "- **Budget**: 50,000 INR", "'Portability' = 'low'", "... low - Display quality: high - ..."
+        self.key_value_pattern = re.compile(
+            rf"(?P<key>{key_alternation})[\s*_'\"`]*[:=\-]+[\s*'\"`]*(?P<value>(?:[^,\n'\"`}}*]|,(?=\d))+?)"
+            rf"(?=\s+-\s|\s*,(?!\d)|\s*[\n'\"`}}*]|\s*$)",
+            re.IGNORECASE
+        )
+
+    @staticmethod
+    def _key_token(key: str) -> str:
+        return re.sub(r"[^a-z]", "", str(key).lower())
+
+    def parse_budget(self, value: Union[str, int, float, None]) -> Optional[str]:
+        """
+        Returns the budget as a string of digits, e.g. '150000' for '1.5 lakh' or 'Rs. 1,50,000'.
+        """
+        if isinstance(value, bool) or value is None:
+            return None
+        if isinstance(value, (int, float)):
+            return str(int(value)) if value > 0 else None
+        text = str(value).lower().replace(',', '')
+        match = re.search(r"(\d+(?:\.\d+)?)\s*(thousand|lakhs|lakh|lac|crore|cr|k|l)?\b", text)
+        if not match:
+            return None
+        amount = float(match.group(1)) * self.budget_multipliers.get(match.group(2), 1)
+        return str(int(amount)) if amount > 0 else None
+
+    def validate(self, candidate: Dict) -> Tuple[str, Optional[Dict]]:
+        """
+        Validates a parsed dictionary and returns (outcome, {'user_req': profile} or None).
+        """
+        if isinstance(candidate.get('user_req'), dict):
+            candidate = candidate['user_req']
+
+        normalized = {}
+        for key, value in candidate.items():
+            canonical = self.canonical_keys.get(self._key_token(key))
+            if canonical:
+                normalized[canonical] = value
+
+        if len(normalized) < len(PROFILE_KEYS) + 1:
+            return NOT_CONFIRMED, None
+
+        profile = {}
+        for key in PROFILE_KEYS:
+            value = str(normalized[key]).strip(" .;").lower()
+            if value not in self.allowed_values:
+                return NOT_CONFIRMED, None
+            profile[key] = value
+
+        budget = self.parse_budget(normalized[BUDGET_KEY])
+        if budget is None:
+            # placeholders such as '_' or 'values' mean the profile is not complete yet
+            return (NOT_CONFIRMED if not re.search(r"\d", str(normalized[BUDGET_KEY])) else AMBIGUOUS), None
+        profile[BUDGET_KEY] = budget
+        return CONFIRMED, {'user_req': profile}
+
+    def _parse_literal(self, literal: str) -> Optional[Dict]:
+        for parser in (ast.literal_eval, json.loads):
+            try:
+                parsed = parser(literal)
+                if isinstance(parsed, dict):
+                    return parsed
+            except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+                continue
+        return None
+
+    def detect(self, text: str) -> Tuple[str, Optional[Dict]]:
+        """
+        Returns (outcome, profile) where outcome is 'confirmed', 'not_confirmed' or 'ambiguous'
+        and profile is the normalized {'user_req': {...}} structure when confirmed.
+        """
+        if not text:
+            return NOT_CONFIRMED, None
+
+        unparsed_profile_literal = False
+        dict_spans = [(start, end) for start, end, kind in scan_structured_spans(text) if kind == 'dict']
+        # the profile is written at the end of the conversation, so the last literal wins
+        for start, end in reversed(dict_spans):
+            literal = text[start:end]
+            parsed = self._parse_literal(literal)
+            if parsed is None:
+                if any(token in self._key_token(literal) for token in self.canonical_keys):
+                    unparsed_profile_literal = True
+                continue
+            outcome, profile = self.validate(parsed)
+            if outcome != NOT_CONFIRMED or any(self.canonical_keys.get(self._key_token(k)) for k in parsed):
+                logger.info(f"[ProfileDetector.detect] Dictionary literal outcome: {outcome}")
+                return outcome, profile
+
+        pairs = {}
+        for match in self.key_value_pattern.finditer(text):
+            pairs[match.group('key')] = match.group('value').strip()
+        if pairs:
+            outcome, profile = self.validate(pairs)
+            if outcome == CONFIRMED or not unparsed_profile_literal:
+                logger.info(f"[ProfileDetector.detect] Key/value outcome: {outcome}")
+                return outcome, profile
+
+        return (AMBIGUOUS if unparsed_profile_literal else NOT_CONFIRMED), None
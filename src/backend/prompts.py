@@ -85,9 +85,21 @@ class SystemInstruction:
     """
     
 
+@dataclass
+class GreetingCheck:
+    # formatted with the user's first message at call time
+    instruction: str = (
+        "Check if the following message is either a greeting or a request for help. "
+        "Consider possible spelling mistakes or typos. "
+        "Respond only with 'yes' if it is a greeting/request for help, or 'no' otherwise. "
+        "Message: '{message}'"
+    )
+
+
 @dataclass
 class IntentConfirmation:
-    allowed_values = {'low','medium','high'}
+    # a list, not a set: set order changes between processes and would change the prompt text (and its cache keys)
+    allowed_values = ['low', 'medium', 'high']
     
     intent_confirmation: str = f""" 
     You are a senior evaluator who has an eye for detail. The input text will contain user requirements captured through 6 keys, possibly with additional text.
@@ -165,8 +177,6 @@ class DictionaryPresent:
     
 @dataclass
 class ProductMapLayer:
-    laptop_description: str = ''
-
     lap_spec = {
         "GPU intensity":"(Type of the Graphics Processor)",
         "Display quality":"(Display Type, Screen Resolution, Display Size)",
@@ -175,12 +185,12 @@ class ProductMapLayer:
         "Processing speed":"(CPU Type, Core, Clock Speed)"
     }
 
-    values = {'low','medium','high'}
+    values = ['low', 'medium', 'high']
 
     product_map_layer: str =f"""
     You are a Laptop Specifications Classifier whose job is to extract the key features of laptops and classify them as per their requirements.
     To analyze each laptop, perform the following steps:
-    Step 1: Extract the laptop's primary features from the description {laptop_description}
+    Step 1: Extract the laptop's primary features from the laptop description in the user message
     Step 2: Store the extracted features in {lap_spec} \
     Step 3: Classify each of the items in {lap_spec} into {values} based on the following rules: \
     {delimiter}
@@ -218,6 +228,15 @@ class ProductMapLayer:
     {delimiter}
     ### Strictly don't keep any other text in the values of the JSON dictionary other than low or medium or high ###
     """
+
+    batch_instruction: str = f"""
+    {delimiter}
+    The user message is a JSON list of laptops, each with a "row_id" and a "description".
+    Classify every laptop separately with the rules above and return a single JSON object of the form
+    {{"mappings": [{{"row_id": <row_id of the laptop>, "mapping": <dictionary of the laptop as in output 1>}}]}}
+    with exactly one entry for every row_id of the user message.
+    {delimiter}
+    """
     
     
 @dataclass
@@ -234,6 +253,69 @@ class ProductRecommender:
     """
     
 
+@dataclass
+class ProductSummary:
+    system_message = f"""
+    You are a laptop gadget expert writing catalogue blurbs.
+    The user message is the description of one laptop delimited by {delimiter}.
+    Summarize its major specifications in a single sentence of at most 25 words: processor, RAM, storage,
+    display, graphics and weight when they are mentioned. Do not mention the price.
+    Reply with the sentence only.
+    """
+
+
+@dataclass
+class TurnAnalyzer:
+    profile_levels = ['low', 'medium', 'high']
+    profile_properties = ['gpu_intensity', 'display_quality', 'portability', 'multitasking', 'processing_speed', 'budget']
+
+    system_instruction: str = f"""
+    You analyse one reply written by a laptop shopping assistant and return a single JSON object.
+
+    {delimiter}
+    1. display_text: the reply as the user should see it. Remove every dictionary, JSON object and code block,
+       keep the natural text (sentences, bullets, paragraphs) unchanged and do not mention that anything was removed.
+    2. intent_confirmed: true only if the reply contains a user profile with all of these keys:
+       'GPU intensity', 'Display quality', 'Portability', 'Multitasking', 'Processing speed' with values from {profile_levels},
+       and 'Budget' with a numerical value. Otherwise false.
+    3. user_profile: when intent_confirmed is true, the profile with keys {profile_properties},
+       levels in lowercase and the budget as digits only (e.g. '150000'). Otherwise null.
+    {delimiter}
+    """
+
+    json_schema = {
+        'name': 'turn_analysis',
+        'strict': True,
+        'schema': {
+            'type': 'object',
+            'properties': {
+                'display_text': {'type': 'string'},
+                'intent_confirmed': {'type': 'boolean'},
+                'user_profile': {
+                    'anyOf': [
+                        {'type': 'null'},
+                        {
+                            'type': 'object',
+                            'properties': {
+                                'gpu_intensity': {'type': 'string', 'enum': profile_levels},
+                                'display_quality': {'type': 'string', 'enum': profile_levels},
+                                'portability': {'type': 'string', 'enum': profile_levels},
+                                'multitasking': {'type': 'string', 'enum': profile_levels},
+                                'processing_speed': {'type': 'string', 'enum': profile_levels},
+                                'budget': {'type': 'string'}
+                            },
+                            'required': profile_properties,
+                            'additionalProperties': False
+                        }
+                    ]
+                }
+            },
+            'required': ['display_text', 'intent_confirmed', 'user_profile'],
+            'additionalProperties': False
+        }
+    }
+
+
 @dataclass
 class AIToAgentShift:
     system_instruction = f"""
@@ -1,85 +1,107 @@
 from src.logging import logging
 from pandas import DataFrame
-from src.constants import BUDGET_COLUMN
-from src.backend.product_mapper import ProductMapper
-from typing import List, Dict
+from src.constants import BUDGET_COLUMN, PRICE_VALUE_COLUMN
+from src.backend.catalog_features import normalize_price, PRICE_SORTED_ATTR
+from src.backend.scoring_engine import ScoringEngine
+from typing import List, Dict, Optional, Tuple
+import numpy as np
 import re
-import pandas as pd
 
 logger = logging()
 
 class QueryEngine():
     def __init__(self):
         logger.info("QueryEngine instance created.")
+        self.scoring_engine = ScoringEngine()
+
+    @staticmethod
+    def parse_budget_criteria(criteria: str = None) -> Optional[int]:
+        """
+        Returns the budget written in the criteria ('150000', 'Price <= 55,000'), or None when there is none.
+        """
+        match = re.search(r"\d[\d,]*", str(criteria)) if criteria else None
+        if not match:
+            return None
+        budget = int(match.group().replace(",", ""))
+        logger.info(f"Extracted budget from criteria: {budget}")
+        return budget
+
+    def resolve_budget(self, data: DataFrame, criteria: str = None) -> Tuple[np.ndarray, int, bool]:
+        """
+        Returns (prices, budget, prices_sorted) for the frame: the integer price array (normalized at
+        ingestion, recomputed only for frames without it) and the budget from the criteria, or the median price.
+        """
+        if PRICE_VALUE_COLUMN in data.columns:
+            prices = data[PRICE_VALUE_COLUMN].to_numpy()
+        else:
+            prices = normalize_price(data[BUDGET_COLUMN]).to_numpy()
+        prices_sorted = bool(data.attrs.get(PRICE_SORTED_ATTR)) and PRICE_VALUE_COLUMN in data.columns
+
+        budget = self.parse_budget_criteria(criteria)
+        if budget is None:
+            budget = int(np.median(prices)) if len(prices) else 0
+            logger.info(f"No budget found in criteria, using median: {budget}")
+        return prices, budget, prices_sorted
 
     def filter_budget(self, data: DataFrame = None, criteria: str = None) -> DataFrame:
         """ 
         This method is responsible to filter out large dataset into smaller for easier processing.
+        The input frame is not modified (it may be the shared catalog cache). On the price-sorted
+        catalog the cut is a searchsorted slice, other frames fall back to a boolean mask.
         Args:
             criteria = This is the filter option, example Price <= 55000;
         """
         try:
             logger.info(f"filter_budget called with criteria {criteria}")
-            budget = 0
-            if criteria:
-                match = re.search(r"\d[\d,]*", criteria)
-                if match:
-                    budget = int(match.group().replace(",", ""))
-                    logger.info(f"Extracted budget from criteria: {budget}")
-                else:
-                    budget = data[BUDGET_COLUMN].median()
-                    logger.info(f"No budget found in criteria, using median: {budget}")
-            else:
-                budget = data[BUDGET_COLUMN].median()
-                logger.info(f"No criteria provided, using median: {budget}")
-
-            # Clean budget column (remove non-digits) and convert to integers
-            data[BUDGET_COLUMN] = (
-                data[BUDGET_COLUMN]
-                .astype(str)
-                .str.replace(r"[^0-9]", "", regex=True)
-            )
-            data[BUDGET_COLUMN] = pd.to_numeric(data[BUDGET_COLUMN], errors="coerce").fillna(0).astype(int)
+            prices, budget, prices_sorted = self.resolve_budget(data, criteria)
 
             logger.info(f"Starting budget filtering with budget: {budget}")
-            
-            data = data[data[BUDGET_COLUMN] <= int(budget)]
+            if prices_sorted:
+                data = data.iloc[:int(np.searchsorted(prices, budget, side='right'))]
+            else:
+                data = data[prices <= budget]
             logger.info(f"Budget filtering completed successfully. Filtered rows: {len(data)}")
             return data
 
         except Exception as e:
             logger.error(f"Error during budget filtering: {e}")
             raise
+
+    def nearest_above_budget(self, data: DataFrame = None, criteria: str = None, count: int = 10) -> DataFrame:
+        """
+        Returns the count cheapest laptops priced above the budget, used when nothing fits within it.
+        On the price-sorted catalog these are simply the rows right after the budget cut.
+        """
+        try:
+            logger.info(f"nearest_above_budget called with criteria {criteria}")
+            prices, budget, prices_sorted = self.resolve_budget(data, criteria)
+            if prices_sorted:
+                cut = int(np.searchsorted(prices, budget, side='right'))
+                data = data.iloc[cut:cut + count]
+            else:
+                above = np.flatnonzero(prices > budget)
+                data = data.iloc[above[np.argsort(prices[above], kind='stable')][:count]]
+            logger.info(f"Found {len(data)} alternatives above the budget of {budget}.")
+            return data
+
+        except Exception as e:
+            logger.error(f"Error in nearest_above_budget: {e}")
+            raise
         
-    def filter_by_user_score(self, data: DataFrame = None, user_profile: List[Dict] = None) -> DataFrame:
+    def filter_by_user_score(self, data: DataFrame = None, user_profile: List[Dict] = None, top_k: int = 10) -> DataFrame:
         """ 
         This method is used to filter the dataset by comparing laptop attributes with user profile.
-        A new 'score' column is added to indicate how well each record matches the user profile.
-        The dataframe is then sorted by this score in descending order and limited to top results.
+        A new 'score' column is added to indicate how well each record matches the user profile
+        (number of attributes where the laptop meets the requested level). Scoring is vectorized
+        by ScoringEngine and only the top_k records are kept, best score first, then higher price.
         """
         try:
             logger.info("Starting filter_by_user_score.")
-            product_mapper = ProductMapper()
-
-            # Convert dataframe rows to list of dicts
-            records = data.to_dict(orient="records")
-
-            # Get mapped scores (list of dicts with 0/1 values)
-            scored_records = product_mapper.map_the_score(records, user_profile)
-
-            # Add score back to dataframe
-            for i, record in enumerate(scored_records):
-                score = sum(v for v in record.values() if isinstance(v, int))
-                data.at[i, "score"] = score
-
-            logger.info("Score column added to dataframe.")
-
-            # Sort by score descending and limit results
-            data = data.sort_values(by="score", ascending=False).head(10)
+            data = self.scoring_engine.rank(data, user_profile, k=top_k)
             logger.info("filter_by_user_score completed successfully. Returning top results.")
 
             return data
 
         except Exception as e:
             logger.error(f"Error in filter_by_user_score: {e}")
-            raise
\ No newline at end of file
+            raise
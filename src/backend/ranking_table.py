@@ -0,0 +1,173 @@
+from src.constants import PRICE_VALUE_COLUMN, MAPPED_LEVEL_COLUMNS, RANKING_TABLE_FILE_PATH, RANKING_TABLE_MAX_ROWS
+from src.logging import logging
+from pandas import DataFrame
+from typing import Optional, Tuple
+import numpy as np
+import threading
+import hashlib
+import os
+
+logger = logging()
+
+LEVELS_PER_ATTRIBUTE = 3
+PROFILE_COUNT = LEVELS_PER_ATTRIBUTE ** len(MAPPED_LEVEL_COLUMNS)
+MAX_SCORE = len(MAPPED_LEVEL_COLUMNS)
+
+
+def catalog_fingerprint(catalog: DataFrame) -> str:
+    """
+    Hash of the price and level columns in catalog row order. A ranking table built for one
+    catalog is only valid for a catalog with the same fingerprint.
+    """
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(catalog[PRICE_VALUE_COLUMN].to_numpy(dtype=np.int64)).tobytes())
+    digest.update(np.ascontiguousarray(catalog[list(MAPPED_LEVEL_COLUMNS.values())].to_numpy(dtype=np.int8)).tobytes())
+    return digest.hexdigest()
+
+
+def profile_index(user_levels: np.ndarray) -> Optional[int]:
+    """
+    Position of a user level vector (1/2/3 per attribute) among the 3^5 profiles, None if a level is unknown.
+    """
+    if any(level not in (1, 2, 3) for level in user_levels):
+        return None
+    index = 0
+    for level in user_levels:
+        index = index * LEVELS_PER_ATTRIBUTE + (int(level) - 1)
+    return index
+
+
+class RankingTable:
+    """
+    Precomputed catalog orderings for all 3^5 = 243 attribute profiles of the price-sorted catalog.
+    orderings[p] lists the catalog row positions by match score (best tier first) and by ascending
+    price inside each tier; tier_offsets[p][s]:tier_offsets[p][s + 1] is the slice of tier MAX_SCORE - s.
+    A recommendation is then a table lookup plus one searchsorted budget cut per tier.
+    """
+    def __init__(self, orderings: np.ndarray, tier_offsets: np.ndarray, prices: np.ndarray, fingerprint: str, version: Optional[str] = None):
+        self.orderings = orderings
+        self.tier_offsets = tier_offsets
+        self.prices = prices
+        self.fingerprint = fingerprint
+        self.version = version
+
+    @classmethod
+    def build(cls, catalog: DataFrame, version: Optional[str] = None) -> 'RankingTable':
+        """
+        Builds the table for a price-sorted catalog frame (see build_catalog_frame).
+        """
+        levels = catalog[list(MAPPED_LEVEL_COLUMNS.values())].to_numpy(dtype=np.int8)
+        prices = catalog[PRICE_VALUE_COLUMN].to_numpy(dtype=np.int64)
+        rows = len(catalog)
+        orderings = np.empty((PROFILE_COUNT, rows), dtype=np.int32)
+        tier_offsets = np.empty((PROFILE_COUNT, MAX_SCORE + 2), dtype=np.int32)
+        # rows are already in price order, a stable sort on the score keeps it inside each tier
+        price_order = np.argsort(prices, kind='stable')
+        levels = levels[price_order]
+
+        for index in range(PROFILE_COUNT):
+            user_levels = np.array([
+                index // LEVELS_PER_ATTRIBUTE ** power % LEVELS_PER_ATTRIBUTE + 1
+                for power in reversed(range(len(MAPPED_LEVEL_COLUMNS)))
+            ], dtype=np.int8)
+            scores = (levels >= user_levels).sum(axis=1)
+            order = np.argsort(MAX_SCORE - scores, kind='stable')
+            orderings[index] = price_order[order]
+            counts = np.bincount(MAX_SCORE - scores, minlength=MAX_SCORE + 1)
+            tier_offsets[index] = np.concatenate(([0], np.cumsum(counts)))
+
+        logger.info(f"RankingTable built for {rows} rows and {PROFILE_COUNT} profiles.")
+        return cls(orderings, tier_offsets, prices, catalog_fingerprint(catalog), version)
+
+    def lookup(self, user_levels: np.ndarray, budget: int, k: int = 3) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns (row positions, scores) of the k best rows priced within the budget, best score first and
+        the most expensive first inside a tier (as ScoringEngine ranks them). None if the profile has an unknown level.
+        """
+        index = profile_index(user_levels)
+        if index is None:
+            return None
+        ordering, offsets = self.orderings[index], self.tier_offsets[index]
+        positions, scores = [], []
+        for tier in range(MAX_SCORE + 1):
+            if len(positions) >= k:
+                break
+            segment = ordering[offsets[tier]:offsets[tier + 1]]
+            cut = int(np.searchsorted(self.prices[segment], budget, side='right'))
+            chosen = segment[:cut][::-1][:k - len(positions)]
+            positions.extend(chosen.tolist())
+            scores.extend([MAX_SCORE - tier] * len(chosen))
+        return np.array(positions, dtype=np.intp), np.array(scores, dtype=np.int8)
+
+    def save(self, file_path: str = RANKING_TABLE_FILE_PATH) -> None:
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(
+            file_path,
+            orderings=self.orderings,
+            tier_offsets=self.tier_offsets,
+            prices=self.prices,
+            fingerprint=np.array(self.fingerprint),
+            version=np.array(self.version or '')
+        )
+        logger.info(f"RankingTable saved to {file_path}.")
+
+    @classmethod
+    def load(cls, file_path: str = RANKING_TABLE_FILE_PATH) -> Optional['RankingTable']:
+        if not os.path.exists(file_path):
+            return None
+        with np.load(file_path) as stored:
+            table = cls(
+                stored['orderings'],
+                stored['tier_offsets'],
+                stored['prices'],
+                str(stored['fingerprint']),
+                str(stored['version']) or None
+            )
+        logger.info(f"RankingTable loaded from {file_path} (catalog version {table.version}).")
+        return table
+
+
+class RankingTableStore:
+    """
+    Holds the ranking table matching the catalog currently served. The persisted table is used when its
+    fingerprint matches the catalog, otherwise the table is rebuilt in memory (up to RANKING_TABLE_MAX_ROWS rows).
+    """
+    def __init__(self, file_path: str = RANKING_TABLE_FILE_PATH, max_rows: int = RANKING_TABLE_MAX_ROWS):
+        self.file_path = file_path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        # the catalog frame the table belongs to (kept referenced so identity checks stay valid)
+        self._catalog = None
+        self._table = None
+
+    def get(self, catalog: DataFrame) -> Optional[RankingTable]:
+        if self._catalog is catalog:
+            return self._table
+        with self._lock:
+            if self._catalog is not catalog:
+                self._table = self._load_or_build(catalog)
+                self._catalog = catalog
+            return self._table
+
+    def _load_or_build(self, catalog: DataFrame) -> Optional[RankingTable]:
+        required = [PRICE_VALUE_COLUMN] + list(MAPPED_LEVEL_COLUMNS.values())
+        if catalog.empty or any(column not in catalog.columns for column in required):
+            return None
+        if len(catalog) > self.max_rows:
+            logger.info(f"Catalog has {len(catalog)} rows, above RANKING_TABLE_MAX_ROWS; ranking on demand instead.")
+            return None
+        fingerprint = catalog_fingerprint(catalog)
+        try:
+            table = RankingTable.load(self.file_path)
+            if table is not None and table.fingerprint == fingerprint:
+                return table
+            if table is not None:
+                logger.info("Persisted RankingTable does not match the served catalog, rebuilding it in memory.")
+        except Exception as e:
+            logger.warning(f"Could not load RankingTable from {self.file_path}: {e}")
+        return RankingTable.build(catalog)
+
+
+ranking_table_store = RankingTableStore()
@@ -0,0 +1,63 @@
+from src.backend.catalog_features import normalize_price
+from src.constants import BUDGET_COLUMN, DESCRIPTION_COLUMN, PRICE_VALUE_COLUMN, SPECIFICATION_COLUMNS, SUMMARY_COLUMN
+from pandas import DataFrame, Series
+import pandas as pd
+
+NAME_COLUMNS = ['Brand', 'Model Name']
+
+
+def _present(value) -> bool:
+    return value is not None and not (isinstance(value, float) and pd.isna(value)) and str(value).strip() != ''
+
+
+def laptop_name(row: Series) -> str:
+    name = ' '.join(str(row[column]).strip() for column in NAME_COLUMNS if column in row.index and _present(row[column]))
+    return name or 'Laptop'
+
+
+def laptop_specifications(row: Series) -> str:
+    """
+    Major specifications from the catalog columns, the first sentence of the description for tables written without them.
+    """
+    specifications = [str(row[column]).strip() for column in SPECIFICATION_COLUMNS if column in row.index and _present(row[column])]
+    if specifications:
+        return ', '.join(specifications)
+    if DESCRIPTION_COLUMN in row.index and _present(row[DESCRIPTION_COLUMN]):
+        return str(row[DESCRIPTION_COLUMN]).strip().split('. ')[0].rstrip('.')
+    return 'specifications not listed'
+
+
+def laptop_summary(row: Series) -> str:
+    """
+    The summary blurb written at ingestion, the major specifications when the product has none.
+    """
+    if SUMMARY_COLUMN in row.index and _present(row[SUMMARY_COLUMN]):
+        return str(row[SUMMARY_COLUMN]).strip().rstrip('.')
+    return laptop_specifications(row)
+
+
+def render_recommendations(products: DataFrame, budget=None, above_budget: bool = False, use_summaries: bool = False) -> str:
+    """
+    Renders the recommended laptops in the list format of ProductRecommender.system_message,
+    most expensive first (equal prices in the order given):
+        1. <Laptop Name> : <Major specifications of the laptop>, <Price in Rs>
+    use_summaries describes each laptop with its stored summary blurb instead of the spec columns.
+    """
+    describe = laptop_summary if use_summaries else laptop_specifications
+    if products.empty:
+        return "Sorry, no laptop in the catalogue matches your requirements right now."
+    if PRICE_VALUE_COLUMN in products.columns:
+        prices = products[PRICE_VALUE_COLUMN].fillna(0).astype('int64')
+    else:
+        prices = normalize_price(products[BUDGET_COLUMN])
+    # equal prices keep the ranking order they came in
+    order = (-prices.to_numpy()).argsort(kind='stable')
+
+    if above_budget:
+        lines = [f"No laptop fits within the budget of {budget}. Here are the closest alternatives just above it:"]
+    else:
+        lines = ["Here are the laptops that best match your requirements:"]
+    for rank, position in enumerate(order, start=1):
+        row = products.iloc[position]
+        lines.append(f"{rank}. {laptop_name(row)} : {describe(row)}, Rs. {int(prices.iloc[position]):,}")
+    return '\n'.join(lines)
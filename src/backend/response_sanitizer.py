@@ -0,0 +1,76 @@
+from src.utils import ERROR_LINE_PATTERN
+from typing import List, Tuple
+import re
+
+FENCE = '```'
+# Lines left with nothing but quotes, backticks or punctuation once a dict/code block is cut out of them.
+RESIDUE_LINE_PATTERN = re.compile(r"^[\s\"'`.,:;]+$")
+BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+
+
+def scan_structured_spans(text: str) -> List[Tuple[int, int, str]]:
+    """
+    Single left-to-right pass returning the outermost (start, end, kind) spans of fenced code blocks
+    ('code') and balanced brace literals ('dict'). Open braces are kept on a stack; an unmatched one
+    is simply left as text while the scan carries on, so literals after (or inside) it are still found.
+    Quotes inside braces are honoured so a '}' inside a string value does not close the literal,
+    an unterminated code fence runs to the end of the text.
+    """
+    spans = []
+    opens = []
+    i, length, quote = 0, len(text), None
+
+    def keep(start: int, end: int, kind: str) -> None:
+        # spans close innermost first, so the ones starting inside this one were recorded just before it
+        while spans and spans[-1][0] >= start:
+            spans.pop()
+        spans.append((start, end, kind))
+
+    while i < length:
+        char = text[i]
+        if quote:
+            if char == '\\':
+                i += 2
+                continue
+            if char == quote or char == '\n':
+                quote = None
+        elif text.startswith(FENCE, i):
+            close = text.find(FENCE, i + len(FENCE))
+            end = length if close == -1 else close + len(FENCE)
+            keep(i, end, 'code')
+            i = end
+            continue
+        elif char == '{':
+            opens.append(i)
+        elif char == '}':
+            if opens:
+                keep(opens.pop(), i + 1, 'dict')
+        elif opens and (char == '"' or (char == "'" and (i == 0 or not text[i - 1].isalnum()))):
+            # an apostrophe inside a word ("it's") does not open a string
+            quote = char
+        i += 1
+    return spans
+
+
+def sanitize_assistant_response(text: str) -> str:
+    """
+    Local replacement for the FilterJson LLM call: removes dict/JSON literals and fenced code
+    blocks from the assistant response, drops the echoed dictionary error lines and tidies
+    the blank lines left behind.
+    """
+    if not text:
+        return ''
+
+    pieces, cursor = [], 0
+    for start, end, _ in scan_structured_spans(text):
+        pieces.append(text[cursor:start])
+        cursor = end
+    pieces.append(text[cursor:])
+    stripped = ''.join(pieces)
+
+    lines = []
+    for line in stripped.split('\n'):
+        if ERROR_LINE_PATTERN.search(line) or RESIDUE_LINE_PATTERN.match(line):
+            continue
+        lines.append(line.rstrip())
+    return BLANK_LINES_PATTERN.sub('\n\n', '\n'.join(lines)).strip()
@@ -0,0 +1,135 @@
+from src.constants import MAPPED_ATTRIBUTES
+from src.logging import logging
+from pandas import DataFrame, Series
+from typing import Dict, List, Tuple
+import pandas as pd
+import numpy as np
+
+logger = logging()
+
+# the structured catalog columns the ProductMapLayer rules are written against
+RULE_COLUMNS = {
+    'GPU intensity': ['Graphics Processor'],
+    'Display quality': ['Screen Resolution', 'Display Type'],
+    'Portability': ['Laptop Weight'],
+    'Multitasking': ['RAM Size'],
+    'Processing speed': ['Core']
+}
+
+# (pattern, level) pairs checked in order, the first match wins
+GPU_PATTERNS = [
+    (r"\brtx\b|quadro", 'high'),
+    (r"\bgtx\b|\bmx\s?\d|radeon|iris|apple m\d|^m\d\b", 'medium'),
+    (r"\buhd\b|\bhd graphics\b|integrated", 'low')
+]
+CORE_PATTERNS = [
+    (r"\bi[79]\b|ryzen [79]\b|xeon", 'high'),
+    (r"\bi5\b|ryzen 5\b", 'medium'),
+    (r"\bi3\b|ryzen 3\b|celeron|pentium|athlon", 'low')
+]
+FULL_HD_PIXELS = 1920 * 1080
+ULTRA_HD_PIXELS = 3840 * 2160
+HIGH_END_DISPLAY_TYPES = r"retina"
+
+
+def _column(data: DataFrame, column: str) -> Series:
+    if column in data.columns:
+        return data[column].astype('string').str.strip().str.lower()
+    return pd.Series(pd.NA, index=data.index, dtype='string')
+
+
+def _select(conditions: List[Series], levels: List[str], index) -> Series:
+    conditions = [np.asarray(condition, dtype=bool) for condition in conditions]
+    return pd.Series(np.select(conditions, levels, default=None), index=index, dtype=object)
+
+
+def _match_patterns(values: Series, patterns: List[Tuple[str, str]]) -> Series:
+    conditions = [values.str.contains(pattern, regex=True, na=False) for pattern, _ in patterns]
+    return _select(conditions, [level for _, level in patterns], values.index)
+
+
+def _number(values: Series, pattern: str) -> Series:
+    # plain float64, so comparisons with unparseable (NaN) values are simply False
+    return pd.to_numeric(values.str.extract(pattern, expand=False), errors='coerce').astype('float64')
+
+
+def gpu_levels(data: DataFrame) -> Series:
+    return _match_patterns(_column(data, 'Graphics Processor'), GPU_PATTERNS)
+
+
+def processing_levels(data: DataFrame) -> Series:
+    return _match_patterns(_column(data, 'Core'), CORE_PATTERNS)
+
+
+def multitasking_levels(data: DataFrame) -> Series:
+    ram = _number(_column(data, 'RAM Size'), r"(\d+(?:\.\d+)?)\s*gb")
+    return _select([ram >= 32, ram >= 16, ram > 0], ['high', 'medium', 'low'], data.index)
+
+
+def portability_levels(data: DataFrame) -> Series:
+    weight = _column(data, 'Laptop Weight')
+    kg = _number(weight, r"(\d+(?:\.\d+)?)\s*kg")
+    pounds = _number(weight, r"(\d+(?:\.\d+)?)\s*(?:lb|lbs|pounds)\b")
+    kg = kg.fillna(pounds * 0.4536)
+    return _select([kg < 1.51, kg <= 2.51, kg > 2.51], ['high', 'medium', 'low'], data.index)
+
+
+def display_levels(data: DataFrame) -> Series:
+    resolution = _column(data, 'Screen Resolution')
+    pixels = _number(resolution, r"(\d{3,5})\s*[x×*]\s*\d{3,5}") * _number(resolution, r"\d{3,5}\s*[x×*]\s*(\d{3,5})")
+    high_end_type = _column(data, 'Display Type').str.contains(HIGH_END_DISPLAY_TYPES, regex=True, na=False).astype(bool)
+    return _select(
+        [pixels >= ULTRA_HD_PIXELS, (pixels >= FULL_HD_PIXELS) & high_end_type, pixels >= FULL_HD_PIXELS, pixels > 0],
+        ['high', 'high', 'medium', 'low'],
+        data.index
+    )
+
+
+class RuleBasedMapper:
+    """
+    Local, vectorized version of the ProductMapLayer rules applied to the structured catalog columns
+    (Graphics Processor, Screen Resolution / Display Type, Laptop Weight, RAM Size, Core).
+    Rows with a missing or unrecognized value in any of them get no mapping and are left to the LLM.
+    """
+    def __init__(self):
+        logger.info("RuleBasedMapper instance created.")
+        self.rules = {
+            'GPU intensity': gpu_levels,
+            'Display quality': display_levels,
+            'Portability': portability_levels,
+            'Multitasking': multitasking_levels,
+            'Processing speed': processing_levels
+        }
+
+    def levels(self, data: DataFrame) -> DataFrame:
+        """
+        One column per mapped attribute with 'low' / 'medium' / 'high', None where no rule applies.
+        """
+        return DataFrame({attribute: self.rules[attribute](data) for attribute in MAPPED_ATTRIBUTES}, index=data.index)
+
+    def map_frame(self, data: DataFrame) -> Series:
+        """
+        Returns the mapped dictionary of every row the rules fully cover, None for the others.
+        """
+        levels = self.levels(data)
+        covered = levels.notna().all(axis=1)
+        mappings = pd.Series(None, index=data.index, dtype=object)
+        for index, mapping in zip(levels.index[covered], levels[covered].to_dict(orient='records')):
+            mappings.at[index] = mapping
+        logger.info(f"[RuleBasedMapper] {int(covered.sum())} of {len(data)} rows mapped by rules.")
+        return mappings
+
+    def unrecognized(self, data: DataFrame) -> Dict[str, List[str]]:
+        """
+        The distinct raw values no rule recognized, by attribute (for reporting).
+        """
+        levels = self.levels(data)
+        report = {}
+        for attribute, columns in RULE_COLUMNS.items():
+            missing = levels[attribute].isna()
+            if missing.any():
+                present = [column for column in columns if column in data.columns]
+                values = data.loc[missing, present].astype(str).agg(' / '.join, axis=1) if present else pd.Series(['<no column>'])
+                report[attribute] = sorted(values.unique().tolist())
+        return report
+
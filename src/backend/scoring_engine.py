@@ -0,0 +1,88 @@
+from src.backend.catalog_features import mapped_levels, normalize_price, PRICE_SORTED_ATTR
+from src.constants import BUDGET_COLUMN, MAPPED_COLUMN, PRICE_VALUE_COLUMN, MAPPED_LEVEL_COLUMNS, LEVEL_SCORES
+from src.logging import logging
+from pandas import DataFrame
+from typing import Dict, Union
+import numpy as np
+
+logger = logging()
+
+SCORE_COLUMN = 'score'
+# an unknown user level can never be met, like map_the_score scoring it 0
+UNMATCHABLE_LEVEL = np.iinfo(np.int8).max
+
+
+class ScoringEngine:
+    """
+    Vectorized replacement for ProductMapper.map_the_score + the per-row score write-back.
+    The five mapped attributes are an (n, 5) int8 level matrix (low/medium/high -> 1/2/3),
+    a user profile scores the whole catalog with one broadcast comparison and a row sum, and
+    the top-k rows are picked with argpartition (ties: higher score, then higher price first).
+    """
+    def __init__(self):
+        logger.info("ScoringEngine instance created.")
+        self.level_columns = list(MAPPED_LEVEL_COLUMNS.values())
+        self.attribute_tokens = {attribute.lower(): i for i, attribute in enumerate(MAPPED_LEVEL_COLUMNS)}
+
+    def user_levels(self, user_profile: Dict[str, Union[str, int, Dict]]) -> np.ndarray:
+        """
+        Returns the user profile as an int8 vector in MAPPED_ATTRIBUTES order.
+        """
+        user_pref = user_profile.get('user_req', user_profile)
+        levels = np.full(len(self.level_columns), UNMATCHABLE_LEVEL, dtype=np.int8)
+        for key, value in user_pref.items():
+            position = self.attribute_tokens.get(str(key).lower())
+            if position is not None and isinstance(value, str) and value.strip().lower() in LEVEL_SCORES:
+                levels[position] = LEVEL_SCORES[value.strip().lower()]
+        return levels
+
+    def level_matrix(self, data: DataFrame) -> np.ndarray:
+        """
+        Returns the (n, 5) int8 level matrix, from the precomputed catalog columns when present.
+        """
+        if all(column in data.columns for column in self.level_columns):
+            return data[self.level_columns].to_numpy(dtype=np.int8)
+        return mapped_levels(data[MAPPED_COLUMN]).to_numpy(dtype=np.int8)
+
+    @staticmethod
+    def score(levels: np.ndarray, user_levels: np.ndarray) -> np.ndarray:
+        """
+        Number of attributes where the laptop level meets or exceeds the user's level.
+        """
+        return (levels >= user_levels).sum(axis=1, dtype=np.int8)
+
+    @staticmethod
+    def top_k_indices(scores: np.ndarray, prices: np.ndarray, k: int) -> np.ndarray:
+        """
+        Positions of the k best rows ordered by score desc, then price desc.
+        """
+        count = len(scores)
+        if count == 0 or k <= 0:
+            return np.empty(0, dtype=np.intp)
+        prices = np.clip(prices.astype(np.int64), 0, None)
+        # one int64 key orders by score first and price second
+        key = scores.astype(np.int64) * (int(prices.max()) + 1) + prices
+        if k < count:
+            candidates = np.argpartition(-key, k - 1)[:k]
+        else:
+            candidates = np.arange(count)
+        return candidates[np.argsort(-key[candidates], kind='stable')]
+
+    def rank(self, data: DataFrame, user_profile: Dict[str, Union[str, int, Dict]], k: int = 10) -> DataFrame:
+        """
+        Returns the k best rows of data with a 'score' column added, best first. data is not modified.
+        """
+        if data.empty:
+            ranked = data.assign(**{SCORE_COLUMN: np.array([], dtype=np.int8)})
+            ranked.attrs.pop(PRICE_SORTED_ATTR, None)
+            return ranked
+        scores = self.score(self.level_matrix(data), self.user_levels(user_profile))
+        if PRICE_VALUE_COLUMN in data.columns:
+            prices = data[PRICE_VALUE_COLUMN].to_numpy()
+        else:
+            prices = normalize_price(data[BUDGET_COLUMN]).to_numpy()
+        positions = self.top_k_indices(scores, prices, k)
+        ranked = data.iloc[positions].assign(**{SCORE_COLUMN: scores[positions]})
+        # rows are in score order now, not price order
+        ranked.attrs.pop(PRICE_SORTED_ATTR, None)
+        return ranked
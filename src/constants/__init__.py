@@ -9,6 +9,33 @@ MODEL = "gpt-4o-mini"
 
 MODERATION_MODEL = "omni-moderation-latest"
 
+# Bounded worker pool used to fan out the independent LLM calls of a chat turn
+CHAT_TURN_MAX_WORKERS = int(os.getenv('CHAT_TURN_MAX_WORKERS', '8'))
+
+# LLM completion cache for the temperature 0 classification / extraction calls (in-process LRU in front of an on-disk
+# SQLite tier, empty path disables the disk tier); conversational replies are never cached, moderation verdicts only briefly
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '2048'))
+LLM_CACHE_DB_PATH = os.getenv('LLM_CACHE_DB_PATH', '/tmp/ai_shop_assistant_llm_cache.sqlite3')
+LLM_CACHE_TTL_SECONDS = int(os.getenv('LLM_CACHE_TTL_SECONDS', str(7 * 24 * 60 * 60)))
+MODERATION_CACHE_TTL_SECONDS = int(os.getenv('MODERATION_CACHE_TTL_SECONDS', str(60 * 60)))
+
+# Local greeting classifier answers on its own at or above this confidence, otherwise the LLM decides
+GREETING_CONFIDENCE_THRESHOLD = float(os.getenv('GREETING_CONFIDENCE_THRESHOLD', '0.75'))
+
+# 'local' strips dicts and code blocks with the local sanitizer, 'llm' uses the FilterJson prompt
+RESPONSE_FILTER_MODE = os.getenv('RESPONSE_FILTER_MODE', 'local').lower()
+
+# 'summary' renders the recommended laptops locally with the blurbs written at ingestion, 'template' with the
+# specification columns only, 'llm' formats them with the ProductRecommender prompt
+RECOMMENDATION_RENDER_MODE = os.getenv('RECOMMENDATION_RENDER_MODE', 'summary').lower()
+
+# Per-product summary blurbs, generated once at ingestion and reused across runs by description hash. Off until a deployment
+# opts in (one LLM call per new product); without blurbs the 'summary' render mode falls back to the spec columns
+PRODUCT_SUMMARY_ENABLED = os.getenv('PRODUCT_SUMMARY_ENABLED', 'false').lower() == 'true'
+PRODUCT_SUMMARY_DB_PATH = os.getenv('PRODUCT_SUMMARY_DB_PATH', '/tmp/ai_shop_assistant_product_summaries.sqlite3')
+PRODUCT_SUMMARY_MAX_WORKERS = int(os.getenv('PRODUCT_SUMMARY_MAX_WORKERS', '4'))
+
 
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 # GEMEINI_API_KEY = os.getenv('GEMINI_API_KEY')
@@ -17,8 +44,25 @@ PRODUCT_DETAIL_FILE = 'src/database/laptop_data_mapped.parquet', # 'src/database
 DESCRIPTION_COLUMN = 'Description'
 MAPPED_COLUMN = 'mapped_dictionary'
 MAPPED_DATA_FILE_PATH = 'src/database/laptop_data_mapped.parquet'
+# Orderings of the catalog for all 243 attribute profiles, built after ingestion into a runtime file (not part of the source tree).
+# The int32 table takes 243 x rows x 4 bytes per process, so catalogs above the row limit are ranked on demand by ScoringEngine
+RANKING_TABLE_FILE_PATH = os.getenv('RANKING_TABLE_FILE_PATH', '/tmp/ai_shop_assistant_rankings.npz')
+RANKING_TABLE_MAX_ROWS = int(os.getenv('RANKING_TABLE_MAX_ROWS', '1000'))
 BUDGET_COLUMN = 'Price'
 
+# 'rules' maps products from the structured catalog columns locally and sends only unrecognized rows to the LLM, 'llm' sends every row
+MAPPING_MODE = os.getenv('MAPPING_MODE', 'rules').lower()
+# Concurrent product mapping at ingestion: worker pool size, OpenAI rate limits of the key and retries on HTTP 429
+MAPPING_MAX_WORKERS = int(os.getenv('MAPPING_MAX_WORKERS', '8'))
+MAPPING_REQUESTS_PER_MINUTE = int(os.getenv('MAPPING_REQUESTS_PER_MINUTE', '500'))
+MAPPING_TOKENS_PER_MINUTE = int(os.getenv('MAPPING_TOKENS_PER_MINUTE', '200000'))
+MAPPING_MAX_RETRIES = int(os.getenv('MAPPING_MAX_RETRIES', '6'))
+MAPPING_BACKOFF_SECONDS = float(os.getenv('MAPPING_BACKOFF_SECONDS', '1.0'))
+# Descriptions packed into one mapping request (1 sends one request per product)
+MAPPING_BATCH_SIZE = int(os.getenv('MAPPING_BATCH_SIZE', '10'))
+# Mappings kept across ingestions by sha256(description + prompt version + model), empty path disables the cache
+MAPPING_CACHE_DB_PATH = os.getenv('MAPPING_CACHE_DB_PATH', '/tmp/ai_shop_assistant_mapping_cache.sqlite3')
+
 # Cloudflare D1 SQL Database Credentials
 CLOUDFLARE_ACCOUNT_ID = os.getenv('CLOUDFLARE_ACCOUNT_ID')
 D1_SQL_DATABASE_ID = os.getenv('D1_SQL_DATABASE_ID')
@@ -42,5 +86,52 @@ POSTGRES_HOST = os.getenv('POSTGRES_HOST')
 POSTGRES_PORT = os.getenv('POSTGRES_PORT')
 POSTGRES_TABLE_NAME = os.getenv('POSTGRES_TABLE_NAME')
 
+# PostgreSQL connection pool shared by the read and write paths
+POSTGRES_POOL_MIN_SIZE = int(os.getenv('POSTGRES_POOL_MIN_SIZE', '1'))
+POSTGRES_POOL_MAX_SIZE = int(os.getenv('POSTGRES_POOL_MAX_SIZE', '4'))
+POSTGRES_POOL_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv('POSTGRES_POOL_ACQUIRE_TIMEOUT_SECONDS', '10'))
+POSTGRES_POOL_IDLE_TIMEOUT_SECONDS = float(os.getenv('POSTGRES_POOL_IDLE_TIMEOUT_SECONDS', '300'))
+# borrowed connections idle for longer than this are pinged with SELECT 1 first
+POSTGRES_POOL_HEALTH_CHECK_IDLE_SECONDS = float(os.getenv('POSTGRES_POOL_HEALTH_CHECK_IDLE_SECONDS', '5'))
+POSTGRES_CONNECT_TIMEOUT_SECONDS = int(os.getenv('POSTGRES_CONNECT_TIMEOUT_SECONDS', '10'))
+POSTGRES_STATEMENT_TIMEOUT_MS = int(os.getenv('POSTGRES_STATEMENT_TIMEOUT_MS', '15000'))
+POSTGRES_WRITE_STATEMENT_TIMEOUT_MS = int(os.getenv('POSTGRES_WRITE_STATEMENT_TIMEOUT_MS', '300000'))
+# 'copy' streams catalog rows through COPY ... FROM STDIN in chunks of POSTGRES_COPY_CHUNK_ROWS, 'insert' uses executemany
+POSTGRES_WRITE_METHOD = os.getenv('POSTGRES_WRITE_METHOD', 'copy').lower()
+POSTGRES_COPY_CHUNK_ROWS = int(os.getenv('POSTGRES_COPY_CHUNK_ROWS', '50000'))
+# full loads fill a staging table and rename it over the live one; the replaced catalog is kept as <table>_previous for rollback
+CATALOG_PREVIOUS_SUFFIX = '_previous'
+POSTGRES_SWAP_LOCK_TIMEOUT_MS = int(os.getenv('POSTGRES_SWAP_LOCK_TIMEOUT_MS', '1000'))
+POSTGRES_SWAP_RETRIES = int(os.getenv('POSTGRES_SWAP_RETRIES', '5'))
+
+# Derived catalog columns: integer price (normalized once at ingestion) and the mapped low/medium/high attributes as 1/2/3 levels
+PRICE_VALUE_COLUMN = 'price_value'
+MAPPED_ATTRIBUTES = ['GPU intensity', 'Display quality', 'Portability', 'Multitasking', 'Processing speed']
+MAPPED_LEVEL_COLUMNS = {attribute: attribute.lower().replace(' ', '_') for attribute in MAPPED_ATTRIBUTES}
+LEVEL_SCORES = {'low': 1, 'medium': 2, 'high': 3}
+
+# 'memory' ranks the cached catalog in-process, 'sql' pushes the budget filter and the scoring down into PostgreSQL
+QUERY_MODE = os.getenv('QUERY_MODE', 'memory').lower()
+
+# Catalog columns listed as the major specifications of a laptop by the template renderer
+SPECIFICATION_COLUMNS = ['Core', 'RAM Size', 'Graphics Processor']
+SUMMARY_COLUMN = 'Summary'
+
 # Columns for Query Engine
-COLUMN_NAMES_FOR_QUERY_ENGINE = ['Brand', 'Model Name', 'Price', 'Description', MAPPED_COLUMN]
\ No newline at end of file
+# (MAPPED_COLUMN is only read from tables written before the typed level columns existed)
+COLUMN_NAMES_FOR_QUERY_ENGINE = ['Brand', 'Model Name', 'Price', 'Description', *SPECIFICATION_COLUMNS, SUMMARY_COLUMN, MAPPED_COLUMN, PRICE_VALUE_COLUMN, *MAPPED_LEVEL_COLUMNS.values()]
+
+# Catalog cache: the version stamp written on every database update, checked at most every N seconds
+CATALOG_VERSION_TABLE = 'catalog_version'
+CATALOG_VERSION_CHECK_SECONDS = int(os.getenv('CATALOG_VERSION_CHECK_SECONDS', '60'))
+
+# Incremental ingestion: products are identified by Brand + Model Name and compared by a hash of their source
+# columns, so only new / changed rows are mapped and written ('full' drops and reloads the table every time,
+# 'streaming' reloads it INGESTION_CHUNK_ROWS rows at a time: read, mapped and written chunk by chunk)
+INGESTION_MODE = os.getenv('INGESTION_MODE', 'incremental').lower()
+INGESTION_CHUNK_ROWS = int(os.getenv('INGESTION_CHUNK_ROWS', '50000'))
+# files at least this large are always streamed, whatever INGESTION_MODE says (0 disables the switch)
+INGESTION_STREAMING_MIN_BYTES = int(os.getenv('INGESTION_STREAMING_MIN_BYTES', str(512 * 1024 * 1024)))
+PRODUCT_KEY_COLUMN = 'product_key'
+CONTENT_HASH_COLUMN = 'content_hash'
+PRODUCT_KEY_SOURCE_COLUMNS = ['Brand', 'Model Name']
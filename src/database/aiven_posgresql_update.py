@@ -1,10 +1,18 @@
 import pandas as pd
-import psycopg2
-from psycopg2 import sql
+from psycopg2 import sql, errors
+from psycopg2.extras import Json
 from src.logging import logging
 from pandas.io.sql import get_schema
 from src.constants import POSTGRES_DB_NAME, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_TABLE_NAME
+from src.constants import CATALOG_VERSION_TABLE, POSTGRES_WRITE_STATEMENT_TIMEOUT_MS, PRICE_VALUE_COLUMN, MAPPED_COLUMN, MAPPED_LEVEL_COLUMNS
+from src.constants import PRODUCT_KEY_COLUMN, CONTENT_HASH_COLUMN, POSTGRES_WRITE_METHOD, POSTGRES_COPY_CHUNK_ROWS
+from src.constants import CATALOG_PREVIOUS_SUFFIX, POSTGRES_SWAP_LOCK_TIMEOUT_MS, POSTGRES_SWAP_RETRIES
+from src.database.postgres_pool import postgres_pool
+from typing import Iterable, List
 import json
+import uuid
+import time
+import io
 
 logger = logging()
 
@@ -12,12 +20,199 @@ class PostgresDataBaseUpdate:
     def __init__(self):
         logger.info('PostgresDataBaseUpdate instance created.')
 
-    def update_to_postgres_database(self, df: pd.DataFrame = None, table_name: str = POSTGRES_TABLE_NAME) -> None:
+    def write_catalog_version(self, cur, table_name: str) -> str:
         """
-        Updates the PostgreSQL database with the given DataFrame.
-        Drops the existing table, creates a new one based on the DataFrame's schema,
-        and inserts all data in a single batch transaction.
-        Fully handles column names with spaces or special characters.
+        Stamps the table with a new catalog version inside the caller's transaction,
+        so readers see the new version exactly when they can see the new rows.
+        """
+        version = uuid.uuid4().hex
+        cur.execute(sql.SQL(
+            "CREATE TABLE IF NOT EXISTS {} (table_name TEXT PRIMARY KEY, version TEXT NOT NULL, "
+            "updated_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+        ).format(sql.Identifier(CATALOG_VERSION_TABLE)))
+        cur.execute(sql.SQL(
+            "INSERT INTO {} (table_name, version, updated_at) VALUES (%s, %s, now()) "
+            "ON CONFLICT (table_name) DO UPDATE SET version = EXCLUDED.version, updated_at = EXCLUDED.updated_at"
+        ).format(sql.Identifier(CATALOG_VERSION_TABLE)), (table_name, version))
+        return version
+
+    def column_types(self, columns: list) -> dict:
+        """
+        Explicit PostgreSQL types for the mapped and derived columns, every other column keeps the type pandas infers.
+        The raw mapping is stored as JSONB and each attribute level as a SMALLINT (0 = invalid, 1/2/3 = low/medium/high).
+        """
+        types = {MAPPED_COLUMN: 'JSONB', PRICE_VALUE_COLUMN: 'BIGINT', PRODUCT_KEY_COLUMN: 'TEXT', CONTENT_HASH_COLUMN: 'TEXT'}
+        types.update({column: 'SMALLINT' for column in MAPPED_LEVEL_COLUMNS.values()})
+        return {column: sql_type for column, sql_type in types.items() if column in columns}
+
+    def add_level_constraints(self, cur, table_name: str, columns: list) -> None:
+        for column in MAPPED_LEVEL_COLUMNS.values():
+            if column in columns:
+                cur.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} CHECK ({} BETWEEN 0 AND 3)").format(
+                    sql.Identifier(table_name),
+                    sql.Identifier(f"{table_name}_{column}_level_check"),
+                    sql.Identifier(column)
+                ))
+
+    def create_query_indexes(self, cur, table_name: str, columns: list) -> None:
+        """
+        Creates the B-tree index on the integer price column that the SQL query mode filters on, and the
+        unique index on the product key that incremental ingestion upserts against.
+        Tables without the derived price column are left as they are.
+        """
+        if PRODUCT_KEY_COLUMN in columns:
+            cur.execute(sql.SQL("CREATE UNIQUE INDEX IF NOT EXISTS {} ON {} ({})").format(
+                sql.Identifier(f"{table_name}_{PRODUCT_KEY_COLUMN}_key"),
+                sql.Identifier(table_name),
+                sql.Identifier(PRODUCT_KEY_COLUMN)
+            ))
+        if PRICE_VALUE_COLUMN not in columns:
+            logger.warning(f"'{PRICE_VALUE_COLUMN}' is not in the DataFrame, no price index created for {table_name}.")
+            return
+        cur.execute(sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} USING btree ({})").format(
+            sql.Identifier(f"{table_name}_{PRICE_VALUE_COLUMN}_idx"),
+            sql.Identifier(table_name),
+            sql.Identifier(PRICE_VALUE_COLUMN)
+        ))
+        logger.info(f"B-tree index on '{PRICE_VALUE_COLUMN}' ensured for {table_name}.")
+
+    def row_values(self, df: pd.DataFrame) -> List[tuple]:
+        """
+        Row tuples for executemany: missing values become NULL and dicts / lists are sent as JSON.
+        """
+        def adapt_dicts(val):
+            if isinstance(val, (dict, list)):
+                return Json(val)
+            return val
+
+        return [
+            tuple(adapt_dicts(None if not isinstance(val, (dict, list)) and pd.isna(val) else val) for val in row)
+            for _, row in df.iterrows()
+        ]
+
+    def insert_rows(self, cur, table_name: str, df: pd.DataFrame) -> None:
+        """
+        Writes the rows with executemany, one statement per row.
+        """
+        insert_query = sql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
+            sql.Identifier(table_name),
+            sql.SQL(', ').join(sql.Identifier(col) for col in df.columns),
+            sql.SQL(', ').join(sql.Placeholder() * len(df.columns))
+        )
+        cur.executemany(insert_query, self.row_values(df))
+
+    def copy_rows(self, cur, table_name: str, df: pd.DataFrame, chunk_rows: int = POSTGRES_COPY_CHUNK_ROWS) -> None:
+        """
+        Streams the rows into COPY ... FROM STDIN as CSV, chunk_rows at a time through an in-memory buffer.
+        Dict / list cells are serialized to JSON column by column, missing values are sent as \\N (NULL).
+        """
+        copy_query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '\\N')").format(
+            sql.Identifier(table_name),
+            sql.SQL(', ').join(sql.Identifier(col) for col in df.columns)
+        )
+        json_columns = [
+            col for col in df.columns
+            if df[col].dtype == object and df[col].map(lambda val: isinstance(val, (dict, list))).any()
+        ]
+        # mapped dictionaries repeat a handful of level combinations, each is serialized once
+        serialized = {}
+
+        def to_json(val):
+            if not isinstance(val, (dict, list)):
+                return val
+            try:
+                key = json.dumps(val) if isinstance(val, list) else tuple(val.items())
+                if key not in serialized:
+                    serialized[key] = json.dumps(val)
+                return serialized[key]
+            except TypeError:
+                # raw mapper output with nested values is not hashable
+                return json.dumps(val)
+
+        for start in range(0, len(df), max(1, chunk_rows)):
+            chunk = df.iloc[start:start + chunk_rows]
+            if json_columns:
+                chunk = chunk.assign(**{col: chunk[col].map(to_json) for col in json_columns})
+            buffer = io.StringIO()
+            chunk.to_csv(buffer, index=False, header=False, na_rep='\\N')
+            buffer.seek(0)
+            cur.copy_expert(copy_query, buffer)
+
+    def write_rows(self, cur, table_name: str, df: pd.DataFrame) -> None:
+        if POSTGRES_WRITE_METHOD == 'insert':
+            self.insert_rows(cur, table_name, df)
+        else:
+            self.copy_rows(cur, table_name, df)
+
+    def swap_tables(self, cur, renames: List[tuple], drop_first: str = None) -> None:
+        """
+        Runs the given (old name, new name) table renames inside a savepoint of the caller's transaction.
+        The renames need an ACCESS EXCLUSIVE lock that waits for in-flight reads, so each attempt is bounded
+        by a short lock_timeout (readers queued behind it are never held longer) and retried if it expires.
+        """
+        for attempt in range(POSTGRES_SWAP_RETRIES + 1):
+            cur.execute("SAVEPOINT catalog_swap")
+            try:
+                cur.execute("SET LOCAL lock_timeout = %s", (POSTGRES_SWAP_LOCK_TIMEOUT_MS,))
+                if drop_first:
+                    cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(drop_first)))
+                for old_name, new_name in renames:
+                    cur.execute(sql.SQL("ALTER TABLE IF EXISTS {} RENAME TO {}").format(
+                        sql.Identifier(old_name), sql.Identifier(new_name)
+                    ))
+                cur.execute("RELEASE SAVEPOINT catalog_swap")
+                return
+            except errors.LockNotAvailable:
+                cur.execute("ROLLBACK TO SAVEPOINT catalog_swap")
+                if attempt == POSTGRES_SWAP_RETRIES:
+                    logger.error(f"[swap_tables] Table lock not granted after {POSTGRES_SWAP_RETRIES} retries.")
+                    raise
+                delay = POSTGRES_SWAP_LOCK_TIMEOUT_MS / 1000 * (attempt + 1)
+                logger.warning(f"[swap_tables] Reads still hold the table, retrying the swap in {delay:.1f}s.")
+                time.sleep(delay)
+
+    @staticmethod
+    def as_nullable_integers(df: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
+        """
+        Writes the given columns that came back as floats (a missing value turns an int64 column into float64,
+        which COPY would send as '55000.0') as nullable integers.
+        """
+        drifted = {
+            column: pd.to_numeric(df[column]).astype('Int64') for column in columns
+            if column in df.columns and not pd.api.types.is_integer_dtype(df[column].dtype)
+        }
+        return df.assign(**drifted) if drifted else df
+
+    def conform_chunk(self, chunk: pd.DataFrame, dtypes: pd.Series) -> pd.DataFrame:
+        """
+        Aligns a later chunk with the staging table created from the first one: same columns in the same order,
+        and integer columns that came back as floats (a missing value in this chunk) written as nullable integers.
+        """
+        if set(chunk.columns) != set(dtypes.index):
+            error_msg = f"Chunk columns {sorted(chunk.columns)} differ from the table columns {sorted(dtypes.index)}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
+        chunk = chunk[list(dtypes.index)]
+        return self.as_nullable_integers(chunk, [column for column, dtype in dtypes.items() if pd.api.types.is_integer_dtype(dtype)])
+
+    def integer_columns(self, cur, table_name: str) -> List[str]:
+        """
+        The SMALLINT / INTEGER / BIGINT columns of an existing table.
+        """
+        cur.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_schema = current_schema() "
+            "AND table_name = %s AND data_type IN ('smallint', 'integer', 'bigint')",
+            (table_name,)
+        )
+        return [column for column, in cur.fetchall()]
+
+    def stream_to_postgres_database(self, chunks: Iterable[pd.DataFrame], table_name: str = POSTGRES_TABLE_NAME) -> str:
+        """
+        Full load from an iterable of DataFrame chunks, holding one chunk in memory at a time.
+        The staging table is created from the first chunk and every chunk is committed into it as it arrives
+        (the staging table is invisible to readers, and no transaction stays open across the mapping of a
+        large feed); indexes, the catalog version and the swap over the live table follow in one final
+        transaction. A failed load drops its staging table. Returns the new catalog version.
         """
         # Validate credentials
         required_vars = [POSTGRES_DB_NAME, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT]
@@ -26,61 +221,178 @@ class PostgresDataBaseUpdate:
             logger.error(error_msg)
             raise ValueError(error_msg)
 
+        # index and constraint names derive from the staging name, a unique one keeps them clear of the live table's
+        staging_table = f"{table_name}_staging_{uuid.uuid4().hex[:8]}"
+        conn = None
+        try:
+            logger.info(f"Borrowing pooled connection to PostgreSQL database: {POSTGRES_DB_NAME}")
+            conn = postgres_pool.getconn()
+            cur = conn.cursor()
+            dtypes, rows = None, 0
+            for chunk in chunks:
+                if chunk is None or chunk.empty:
+                    continue
+                # the bulk write may take longer than the pool-wide statement timeout meant for reads
+                cur.execute("SET LOCAL statement_timeout = %s", (POSTGRES_WRITE_STATEMENT_TIMEOUT_MS,))
+                if dtypes is None:
+                    # 1. Create the staging table schema (leave all quotes as generated by pandas), with typed mapped/derived
+                    # columns; columns empty in the first chunk are TEXT, so later chunks can fill them with any value
+                    columns = list(chunk.columns)
+                    column_types = {column: 'TEXT' for column in columns if chunk[column].isna().all()}
+                    column_types.update(self.column_types(columns))
+                    cur.execute(get_schema(chunk, staging_table, con=conn, dtype=column_types))
+                    self.add_level_constraints(cur, staging_table, columns)
+                    dtypes = chunk.dtypes
+                else:
+                    chunk = self.conform_chunk(chunk, dtypes)
+
+                # 2. Bulk load the rows with all columns double-quoted, dicts as JSON (JSONB for the mapped column)
+                self.write_rows(cur, staging_table, chunk)
+                conn.commit()
+                rows += len(chunk)
+                logger.info(f"{len(chunk)} rows loaded into {staging_table} ({rows} so far).")
+
+            if dtypes is None:
+                error_msg = "No rows to load"
+                logger.error(error_msg)
+                raise ValueError(error_msg)
+
+            cur.execute("SET LOCAL statement_timeout = %s", (POSTGRES_WRITE_STATEMENT_TIMEOUT_MS,))
+            # 3. Index the price column for the SQL query mode and refresh the planner statistics
+            self.create_query_indexes(cur, staging_table, list(dtypes.index))
+            cur.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(staging_table)))
+
+            # 4. Stamp the new catalog version so serving processes reload their cached catalog
+            version = self.write_catalog_version(cur, table_name)
+
+            # 5. Swap the staging table in, the live one becomes the rollback copy (the older copy is dropped)
+            previous_table = f"{table_name}{CATALOG_PREVIOUS_SUFFIX}"
+            self.swap_tables(cur, [(table_name, previous_table), (staging_table, table_name)], drop_first=previous_table)
+
+            conn.commit()
+            logger.info(f"Successfully updated PostgreSQL table: {table_name} with {rows} rows (catalog version {version}), previous catalog kept as {previous_table}")
+            return version
+
+        except Exception as e:
+            logger.error(f"An error occurred while updating PostgreSQL database: {e}")
+            if conn:
+                conn.rollback()
+                self.drop_staging_table(conn, staging_table)
+            raise
+        finally:
+            if conn:
+                postgres_pool.putconn(conn)
+
+    def drop_staging_table(self, conn, staging_table: str) -> None:
+        try:
+            with conn.cursor() as cur:
+                cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(staging_table)))
+            conn.commit()
+        except Exception as e:
+            logger.warning(f"Could not drop the staging table {staging_table}: {e}")
+            conn.rollback()
+
+    def update_to_postgres_database(self, df: pd.DataFrame = None, table_name: str = POSTGRES_TABLE_NAME) -> str:
+        """
+        Updates the PostgreSQL database with the given DataFrame.
+        Loads the rows into a fresh staging table, builds its indexes, and then renames it over the live
+        table in one transaction; readers keep using the old table until the commit and never see
+        a missing or partial catalog. The replaced table is kept as <table>_previous (see rollback_catalog).
+        Fully handles column names with spaces or special characters.
+        Returns the catalog version stamped in the swap transaction.
+        """
         # Validate DataFrame
         if df is None or df.empty:
             error_msg = "DataFrame is None or empty"
             logger.error(error_msg)
             raise ValueError(error_msg)
+        return self.stream_to_postgres_database([df], table_name)
 
+    def rollback_catalog(self, table_name: str = POSTGRES_TABLE_NAME) -> str:
+        """
+        Swaps <table>_previous back in as the live catalog (the replaced table becomes <table>_previous,
+        so a second call undoes the rollback) and stamps a new catalog version. Returns that version.
+        """
+        previous_table = f"{table_name}{CATALOG_PREVIOUS_SUFFIX}"
         conn = None
         try:
-            logger.info(f"Connecting to PostgreSQL database: {POSTGRES_DB_NAME}")
-            conn = psycopg2.connect(
-                dbname=POSTGRES_DB_NAME,
-                user=POSTGRES_USER,
-                password=POSTGRES_PASSWORD,
-                host=POSTGRES_HOST,
-                port=POSTGRES_PORT
-            )
+            conn = postgres_pool.getconn()
             cur = conn.cursor()
+            cur.execute("SELECT to_regclass(%s)", (sql.Identifier(previous_table).as_string(cur),))
+            if cur.fetchone()[0] is None:
+                error_msg = f"No previous catalog ({previous_table}) to roll back to."
+                logger.error(error_msg)
+                raise ValueError(error_msg)
+            version = self.write_catalog_version(cur, table_name)
+            swapped_table = f"{table_name}_rollback_{uuid.uuid4().hex[:8]}"
+            self.swap_tables(cur, [(table_name, swapped_table), (previous_table, table_name), (swapped_table, previous_table)])
+            conn.commit()
+            logger.info(f"Rolled {table_name} back to the previous catalog (catalog version {version}).")
+            return version
+        except Exception as e:
+            logger.error(f"An error occurred while rolling back the catalog: {e}")
+            if conn:
+                conn.rollback()
+            raise
+        finally:
+            if conn:
+                postgres_pool.putconn(conn)
 
-            # 1. Drop the existing table
-            drop_table_sql = sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(table_name))
-            cur.execute(drop_table_sql)
+    def upsert_to_postgres_database(self, df: pd.DataFrame, deleted_keys: List[str], table_name: str = POSTGRES_TABLE_NAME) -> str:
+        """
+        Incremental update: inserts the new products of df, updates the changed ones (matched on the product key)
+        and deletes deleted_keys, all in one transaction that also stamps a new catalog version.
+        df must have the same columns as the table; returns the new catalog version.
+        """
+        conn = None
+        try:
+            logger.info(f"Upserting {len(df)} rows and deleting {len(deleted_keys)} rows in {table_name}.")
+            conn = postgres_pool.getconn()
+            cur = conn.cursor()
+            cur.execute("SET LOCAL statement_timeout = %s", (POSTGRES_WRITE_STATEMENT_TIMEOUT_MS,))
 
-            # 2. Create table schema (leave all quotes as generated by pandas)
-            create_table_sql = get_schema(df, table_name, con=conn)
-            cur.execute(create_table_sql)
+            if deleted_keys:
+                cur.execute(sql.SQL("DELETE FROM {} WHERE {} = ANY(%s)").format(
+                    sql.Identifier(table_name),
+                    sql.Identifier(PRODUCT_KEY_COLUMN)
+                ), (list(deleted_keys),))
 
-            # 3. Prepare batched INSERT statements with all columns double-quoted
-            columns = list(df.columns)
-            quoted_columns = [sql.Identifier(col) for col in columns]
-            insert_query = sql.SQL("INSERT INTO {} ({}) VALUES ({})").format(
-                sql.Identifier(table_name),
-                sql.SQL(', ').join(quoted_columns),
-                sql.SQL(', ').join(sql.Placeholder() * len(columns))
-            )
-
-            # 4. Convert dicts to JSON strings before insert
-            def adapt_dicts(val):
-                if isinstance(val, dict):
-                    return json.dumps(val)
-                return val
+            if not df.empty:
+                # the changed rows are bulk loaded into a staging table first and merged with one statement
+                columns = list(df.columns)
+                staging_table = f"{table_name}_upsert"
+                # the rows must match the live table's types, not the dtypes pandas inferred for this feed
+                df = self.as_nullable_integers(df, self.integer_columns(cur, table_name))
+                cur.execute(sql.SQL("CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP").format(
+                    sql.Identifier(staging_table),
+                    sql.Identifier(table_name)
+                ))
+                self.write_rows(cur, staging_table, df)
+                column_list = sql.SQL(', ').join(sql.Identifier(col) for col in columns)
+                cur.execute(sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT ({}) DO UPDATE SET {}").format(
+                    sql.Identifier(table_name),
+                    column_list,
+                    column_list,
+                    sql.Identifier(staging_table),
+                    sql.Identifier(PRODUCT_KEY_COLUMN),
+                    sql.SQL(', ').join(
+                        sql.SQL("{} = EXCLUDED.{}").format(sql.Identifier(col), sql.Identifier(col))
+                        for col in columns if col != PRODUCT_KEY_COLUMN
+                    )
+                ))
 
-            values = [
-                tuple(adapt_dicts(None if pd.isna(val) else val) for val in row)
-                for _, row in df.iterrows()
-            ]
-            cur.executemany(insert_query, values)
+            cur.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(table_name)))
+            version = self.write_catalog_version(cur, table_name)
 
             conn.commit()
-            logger.info(f"Successfully updated PostgreSQL table: {table_name}")
+            logger.info(f"Incremental update of {table_name} committed (catalog version {version})")
+            return version
 
         except Exception as e:
-            logger.error(f"An error occurred while updating PostgreSQL database: {e}")
+            logger.error(f"An error occurred while upserting into PostgreSQL database: {e}")
             if conn:
                 conn.rollback()
             raise
         finally:
             if conn:
-                conn.close()
\ No newline at end of file
+                postgres_pool.putconn(conn)
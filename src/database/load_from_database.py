@@ -1,14 +1,17 @@
 import pandas as pd
-import psycopg2
+from psycopg2 import sql
+from typing import Dict, List, Optional, Tuple
 from src.logging import logging
+from src.database.postgres_pool import postgres_pool
 from src.constants import (
-    POSTGRES_DB_NAME,
-    POSTGRES_USER,
-    POSTGRES_PASSWORD,
-    POSTGRES_HOST,
-    POSTGRES_PORT,
     POSTGRES_TABLE_NAME,
-    COLUMN_NAMES_FOR_QUERY_ENGINE
+    COLUMN_NAMES_FOR_QUERY_ENGINE,
+    CATALOG_VERSION_TABLE,
+    PRICE_VALUE_COLUMN,
+    MAPPED_COLUMN,
+    MAPPED_LEVEL_COLUMNS,
+    PRODUCT_KEY_COLUMN,
+    CONTENT_HASH_COLUMN
 )
 
 logger = logging()
@@ -17,24 +20,142 @@ class LoadFromDatabase():
     def __init__(self):
         logger.info("LoadFromDatabase class initialised.")
         
+    def fetch_table_columns(self, conn, table_name: str = POSTGRES_TABLE_NAME) -> List[str]:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("SELECT * FROM {} LIMIT 0").format(sql.Identifier(table_name)))
+            return [column.name for column in cur.description]
+
+    def query_columns(self, table_columns: List[str]) -> List[str]:
+        """
+        Query-engine columns present in the table. Tables written before a derived column existed
+        are still served, the column is derived in memory from the raw mapped dictionary.
+        """
+        missing = [col for col in COLUMN_NAMES_FOR_QUERY_ENGINE if col not in table_columns and col != MAPPED_COLUMN]
+        if missing:
+            logger.warning(f"Columns missing from '{POSTGRES_TABLE_NAME}', re-run the ingestion to add them: {missing}")
+        columns = [col for col in COLUMN_NAMES_FOR_QUERY_ENGINE if col in table_columns]
+        if all(col in table_columns for col in MAPPED_LEVEL_COLUMNS.values()):
+            # the typed level columns replace the raw JSONB, which would be decoded row by row
+            columns = [col for col in columns if col != MAPPED_COLUMN]
+        return columns
+
     def fetch_query_engine_data(self) -> pd.DataFrame:
         try:
-            conn = psycopg2.connect(
-                dbname=POSTGRES_DB_NAME,
-                user=POSTGRES_USER,
-                password=POSTGRES_PASSWORD,
-                host=POSTGRES_HOST,
-                port=POSTGRES_PORT
-            )
-            
-            col_str = ', '.join([f'"{col}"' for col in COLUMN_NAMES_FOR_QUERY_ENGINE])
-            query = f'SELECT {col_str} FROM "{POSTGRES_TABLE_NAME}"'
-            
-            df = pd.read_sql(query, conn)
-            conn.close()
+            with postgres_pool.connection() as conn:
+                columns = self.query_columns(self.fetch_table_columns(conn))
+                col_str = ', '.join([f'"{col}"' for col in columns])
+                query = f'SELECT {col_str} FROM "{POSTGRES_TABLE_NAME}"'
+                df = pd.read_sql(query, conn)
             logger.info("Successfully fetched data from database.")
             return df
         
         except Exception as e:
             logger.error(f"Error fetching data: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def fetch_top_matches(self, user_levels: Dict[str, Optional[int]], budget: Optional[int],
+                          k: int = 3, above_budget_count: Optional[int] = None) -> Optional[pd.DataFrame]:
+        """
+        SQL query mode: filters on the indexed integer price column, scores the typed attribute level
+        columns in SQL and returns only the k best rows (score desc, then price desc) with a 'score' column.
+        user_levels maps each level column to the requested 1/2/3 level (None never matches).
+        budget None uses the median price. With above_budget_count, the k best of the above_budget_count
+        cheapest laptops priced above the budget are returned instead.
+        Returns None when the table has no typed columns yet (written before the SQL query mode).
+        """
+        try:
+            with postgres_pool.connection() as conn:
+                table_columns = self.fetch_table_columns(conn)
+                typed_columns = [PRICE_VALUE_COLUMN] + list(MAPPED_LEVEL_COLUMNS.values())
+                if any(column not in table_columns for column in typed_columns):
+                    logger.warning(f"'{POSTGRES_TABLE_NAME}' has no typed price/level columns, SQL query mode unavailable.")
+                    return None
+
+                table = sql.Identifier(POSTGRES_TABLE_NAME)
+                price = sql.Identifier(PRICE_VALUE_COLUMN)
+                columns = self.query_columns(table_columns)
+                score = sql.SQL(' + ').join(
+                    sql.SQL("(CASE WHEN {} >= %(level_{})s THEN 1 ELSE 0 END)").format(sql.Identifier(column), sql.SQL(column))
+                    for column in MAPPED_LEVEL_COLUMNS.values()
+                )
+                budget_value = sql.SQL(
+                    "COALESCE(%(budget)s, (SELECT percentile_disc(0.5) WITHIN GROUP (ORDER BY {price}) FROM {table}))"
+                ).format(price=price, table=table)
+                if above_budget_count:
+                    # the nearest alternatives are the cheapest rows above the budget, found through the price index
+                    source = sql.SQL("(SELECT * FROM {table} WHERE {price} > {budget} ORDER BY {price} LIMIT %(above_budget_count)s) AS nearest").format(
+                        table=table, price=price, budget=budget_value
+                    )
+                    condition = sql.SQL("TRUE")
+                else:
+                    source = table
+                    condition = sql.SQL("{} <= {}").format(price, budget_value)
+
+                query = sql.SQL("SELECT {columns}, {score} AS score FROM {source} WHERE {condition} "
+                                "ORDER BY score DESC, {price} DESC LIMIT %(k)s").format(
+                    columns=sql.SQL(', ').join(sql.Identifier(col) for col in columns),
+                    score=score,
+                    source=source,
+                    condition=condition,
+                    price=price
+                )
+                params = {f"level_{column}": user_levels.get(column) for column in MAPPED_LEVEL_COLUMNS.values()}
+                params.update({'budget': budget, 'k': k, 'above_budget_count': above_budget_count})
+                with conn.cursor() as cur:
+                    cur.execute(query, params)
+                    rows = cur.fetchall()
+                    names = [column.name for column in cur.description]
+            df = pd.DataFrame(rows, columns=names)
+            logger.info(f"Fetched {len(df)} top matches from database (budget={budget}, above_budget={bool(above_budget_count)}).")
+            return df
+
+        except Exception as e:
+            logger.error(f"Error fetching top matches: {e}")
+            raise
+
+    def fetch_catalog_version(self, table_name: str = POSTGRES_TABLE_NAME) -> Optional[str]:
+        """
+        Returns the catalog version stamped by PostgresDataBaseUpdate, or None when the table was never stamped.
+        """
+        try:
+            with postgres_pool.connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT to_regclass(%s)", (CATALOG_VERSION_TABLE,))
+                if cur.fetchone()[0] is None:
+                    logger.info("Catalog version table does not exist yet.")
+                    return None
+                cur.execute(
+                    sql.SQL("SELECT version FROM {} WHERE table_name = %s").format(sql.Identifier(CATALOG_VERSION_TABLE)),
+                    (table_name,)
+                )
+                row = cur.fetchone()
+                return row[0] if row else None
+
+        except Exception as e:
+            logger.error(f"Error fetching catalog version: {e}")
+            raise
+
+    def fetch_product_hashes(self, table_name: str = POSTGRES_TABLE_NAME) -> Optional[Tuple[Dict[str, str], List[str]]]:
+        """
+        Returns the content hash of every product key in the table and the table columns, or None when the
+        table does not exist or was written before product keys existed (incremental ingestion then does a full load).
+        """
+        try:
+            with postgres_pool.connection() as conn, conn.cursor() as cur:
+                cur.execute("SELECT to_regclass(%s)", (sql.Identifier(table_name).as_string(conn),))
+                if cur.fetchone()[0] is None:
+                    logger.info(f"'{table_name}' does not exist yet.")
+                    return None
+                table_columns = self.fetch_table_columns(conn, table_name)
+                if PRODUCT_KEY_COLUMN not in table_columns or CONTENT_HASH_COLUMN not in table_columns:
+                    logger.info(f"'{table_name}' has no product keys yet.")
+                    return None
+                cur.execute(sql.SQL("SELECT {}, {} FROM {}").format(
+                    sql.Identifier(PRODUCT_KEY_COLUMN),
+                    sql.Identifier(CONTENT_HASH_COLUMN),
+                    sql.Identifier(table_name)
+                ))
+                return dict(cur.fetchall()), table_columns
+
+        except Exception as e:
+            logger.error(f"Error fetching product hashes: {e}")
+            raise
@@ -0,0 +1,249 @@
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Union
+from src.logging import logging
+from src.constants import (
+    POSTGRES_DB_NAME,
+    POSTGRES_USER,
+    POSTGRES_PASSWORD,
+    POSTGRES_HOST,
+    POSTGRES_PORT,
+    POSTGRES_POOL_MIN_SIZE,
+    POSTGRES_POOL_MAX_SIZE,
+    POSTGRES_POOL_ACQUIRE_TIMEOUT_SECONDS,
+    POSTGRES_POOL_IDLE_TIMEOUT_SECONDS,
+    POSTGRES_POOL_HEALTH_CHECK_IDLE_SECONDS,
+    POSTGRES_CONNECT_TIMEOUT_SECONDS,
+    POSTGRES_STATEMENT_TIMEOUT_MS
+)
+import threading
+import time
+
+logger = logging()
+
+class PostgresConnectionPool:
+    """
+    Process-wide pool of PostgreSQL connections shared by the read and write paths.
+    Wraps psycopg2's ThreadedConnectionPool, created lazily on first use, with:
+    - a semaphore so borrowers wait up to acquire_timeout instead of failing when the pool is exhausted,
+    - idle timeout: connections idle for longer than idle_timeout are closed and replaced on borrow,
+    - health check on borrow: closed or broken connections are discarded, connections idle for
+      longer than health_check_idle are pinged with SELECT 1 first,
+    - a server-side statement_timeout set on every connection,
+    - utilization metrics (metrics()) to size the pool against the worker count.
+    """
+    def __init__(self,
+                 min_size: int = POSTGRES_POOL_MIN_SIZE,
+                 max_size: int = POSTGRES_POOL_MAX_SIZE,
+                 acquire_timeout: float = POSTGRES_POOL_ACQUIRE_TIMEOUT_SECONDS,
+                 idle_timeout: float = POSTGRES_POOL_IDLE_TIMEOUT_SECONDS,
+                 health_check_idle: float = POSTGRES_POOL_HEALTH_CHECK_IDLE_SECONDS,
+                 statement_timeout_ms: int = POSTGRES_STATEMENT_TIMEOUT_MS):
+        logger.info(f"PostgresConnectionPool instance created (min={min_size}, max={max_size}).")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_idle = health_check_idle
+        self.statement_timeout_ms = statement_timeout_ms
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._metrics_lock = threading.Lock()
+        self._returned_at = {}
+        self._in_use = 0
+        self._waiting = 0
+        self._peak_in_use = 0
+        self._borrows = 0
+        self._timeouts = 0
+        self._idle_evictions = 0
+        self._health_check_failures = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _get_pool(self) -> ThreadedConnectionPool:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    required_vars = [POSTGRES_DB_NAME, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT]
+                    if not all(required_vars):
+                        error_msg = "PostgreSQL credentials (DB_NAME, USER, PASSWORD, HOST, PORT) are not set."
+                        logger.error(error_msg)
+                        raise ValueError(error_msg)
+                    logger.info(f"Opening PostgreSQL connection pool to {POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB_NAME}")
+                    self._pool = ThreadedConnectionPool(
+                        self.min_size,
+                        self.max_size,
+                        dbname=POSTGRES_DB_NAME,
+                        user=POSTGRES_USER,
+                        password=POSTGRES_PASSWORD,
+                        host=POSTGRES_HOST,
+                        port=POSTGRES_PORT,
+                        connect_timeout=POSTGRES_CONNECT_TIMEOUT_SECONDS,
+                        options=f"-c statement_timeout={self.statement_timeout_ms}",
+                        keepalives=1,
+                        keepalives_idle=30
+                    )
+        return self._pool
+
+    def _is_healthy(self, conn, idle_for: float) -> bool:
+        if conn.closed:
+            return False
+        if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if idle_for < self.health_check_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, pool: ThreadedConnectionPool, conn) -> None:
+        self._returned_at.pop(id(conn), None)
+        try:
+            pool.putconn(conn, close=True)
+        except PoolError as e:
+            logger.warning(f"[PostgresConnectionPool] Could not discard connection: {e}")
+
+    def getconn(self):
+        """
+        Borrows a healthy connection, waiting up to acquire_timeout seconds for a free slot.
+        Every connection borrowed here must be given back with putconn().
+        """
+        start = time.monotonic()
+        with self._metrics_lock:
+            self._waiting += 1
+        acquired = self._slots.acquire(timeout=self.acquire_timeout)
+        waited = time.monotonic() - start
+        with self._metrics_lock:
+            self._waiting -= 1
+            if not acquired:
+                self._timeouts += 1
+        if not acquired:
+            logger.error(f"[PostgresConnectionPool] No connection available after {self.acquire_timeout}s.")
+            raise PoolError(f"timed out after {self.acquire_timeout}s waiting for a PostgreSQL connection")
+
+        try:
+            pool = self._get_pool()
+            # one replacement per slot is enough, a second broken connection means the server is the problem
+            for attempt in range(2):
+                conn = pool.getconn()
+                returned_at = self._returned_at.pop(id(conn), None)
+                idle_for = time.monotonic() - returned_at if returned_at else 0.0
+                if returned_at and idle_for > self.idle_timeout:
+                    with self._metrics_lock:
+                        self._idle_evictions += 1
+                    logger.info(f"[PostgresConnectionPool] Closing connection idle for {idle_for:.0f}s.")
+                    self._discard(pool, conn)
+                    continue
+                if self._is_healthy(conn, idle_for):
+                    break
+                with self._metrics_lock:
+                    self._health_check_failures += 1
+                logger.warning("[PostgresConnectionPool] Discarding unhealthy connection.")
+                self._discard(pool, conn)
+            else:
+                # last try, pinged whatever its idle time: never hand out a connection nobody checked
+                conn = pool.getconn()
+                self._returned_at.pop(id(conn), None)
+                if not self._is_healthy(conn, float('inf')):
+                    with self._metrics_lock:
+                        self._health_check_failures += 1
+                    self._discard(pool, conn)
+                    logger.error("[PostgresConnectionPool] No healthy connection after 3 attempts.")
+                    raise psycopg2.OperationalError("no healthy PostgreSQL connection after 3 attempts")
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._metrics_lock:
+            self._borrows += 1
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return conn
+
+    def putconn(self, conn, close: bool = False) -> None:
+        """
+        Gives a borrowed connection back to the pool. Connections left in a failed or open
+        transaction are rolled back, broken ones are closed instead of being reused.
+        """
+        try:
+            if not conn.closed and not close:
+                try:
+                    if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                except psycopg2.Error:
+                    close = True
+            close = close or bool(conn.closed)
+            if close:
+                self._returned_at.pop(id(conn), None)
+            else:
+                self._returned_at[id(conn)] = time.monotonic()
+            self._get_pool().putconn(conn, close=close)
+        finally:
+            with self._metrics_lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, statement_timeout_ms: Optional[int] = None) -> Iterator:
+        """
+        Borrows a connection for the duration of the block. The transaction is rolled back if the
+        block raises; committing is left to the caller. statement_timeout_ms overrides the pool-wide
+        statement timeout for this transaction only (0 disables it).
+        """
+        conn = self.getconn()
+        try:
+            if statement_timeout_ms is not None:
+                with conn.cursor() as cur:
+                    cur.execute("SET LOCAL statement_timeout = %s", (int(statement_timeout_ms),))
+            yield conn
+        except Exception:
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+            raise
+        finally:
+            self.putconn(conn)
+
+    def metrics(self) -> Dict[str, Union[int, float]]:
+        """
+        Returns pool utilization counters: in_use / max_size over time tells whether the pool
+        is sized for the worker count, waiting and timeouts show when it is too small.
+        """
+        with self._metrics_lock:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._returned_at),
+                'waiting': self._waiting,
+                'peak_in_use': self._peak_in_use,
+                'utilization': round(self._in_use / self.max_size, 3) if self.max_size else 0.0,
+                'borrows': self._borrows,
+                'timeouts': self._timeouts,
+                'idle_evictions': self._idle_evictions,
+                'health_check_failures': self._health_check_failures,
+                'avg_wait_ms': round(1000 * self._total_wait / self._borrows, 3) if self._borrows else 0.0,
+                'max_wait_ms': round(1000 * self._max_wait, 3)
+            }
+
+    def closeall(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.closeall()
+                self._pool = None
+            self._returned_at.clear()
+        logger.info("[PostgresConnectionPool] All pooled connections closed.")
+
+
+postgres_pool = PostgresConnectionPool()
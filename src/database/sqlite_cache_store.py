@@ -0,0 +1,146 @@
+import sqlite3
+import threading
+import time
+import os
+from typing import Dict, List, Optional
+from src.logging import logging
+
+logger = logging()
+
+class SQLiteCacheStore:
+    """
+    Small on-disk key/value store backed by SQLite.
+    Values are text, entries optionally expire after ttl_seconds. Failures of the
+    store are logged and treated as misses so a broken cache never breaks a request.
+    """
+    def __init__(self, db_path: str, table_name: str = 'cache', ttl_seconds: Optional[int] = None):
+        self.db_path = db_path
+        self.table_name = table_name
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = None
+        logger.info(f"SQLiteCacheStore instance created for {db_path} (table={table_name}, ttl={ttl_seconds}).")
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            try:
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            except OSError as e:
+                # an unwritable or full cache directory is a store failure like any other, callers treat it as a miss
+                raise sqlite3.OperationalError(f"cannot open {self.db_path}: {e}") from e
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{self.table_name}" '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)'
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    f'SELECT value, created_at FROM "{self.table_name}" WHERE key = ?', (key,)
+                ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+                self.delete(key)
+                return None
+            return value
+        except sqlite3.Error as e:
+            logger.warning(f"[SQLiteCacheStore.get] Cache read failed for {self.db_path}: {e}")
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    f'INSERT OR REPLACE INTO "{self.table_name}" (key, value, created_at) VALUES (?, ?, ?)',
+                    (key, value, time.time())
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"[SQLiteCacheStore.set] Cache write failed for {self.db_path}: {e}")
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Returns the live entries among keys in one pass (expired entries are skipped, not deleted).
+        """
+        found = {}
+        try:
+            with self._lock:
+                conn = self._connection()
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ', '.join('?' * len(chunk))
+                    rows = conn.execute(
+                        f'SELECT key, value, created_at FROM "{self.table_name}" WHERE key IN ({placeholders})', chunk
+                    ).fetchall()
+                    for key, value, created_at in rows:
+                        if self.ttl_seconds is None or time.time() - created_at <= self.ttl_seconds:
+                            found[key] = value
+        except sqlite3.Error as e:
+            logger.warning(f"[SQLiteCacheStore.get_many] Cache read failed for {self.db_path}: {e}")
+        return found
+
+    def set_many(self, items: Dict[str, str]) -> None:
+        """
+        Writes all entries in a single transaction.
+        """
+        if not items:
+            return
+        try:
+            now = time.time()
+            with self._lock:
+                conn = self._connection()
+                conn.executemany(
+                    f'INSERT OR REPLACE INTO "{self.table_name}" (key, value, created_at) VALUES (?, ?, ?)',
+                    [(key, value, now) for key, value in items.items()]
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"[SQLiteCacheStore.set_many] Cache write failed for {self.db_path}: {e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(f'DELETE FROM "{self.table_name}" WHERE key = ?', (key,))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"[SQLiteCacheStore.delete] Cache delete failed for {self.db_path}: {e}")
+
+    def clear(self) -> None:
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(f'DELETE FROM "{self.table_name}"')
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"[SQLiteCacheStore.clear] Cache clear failed for {self.db_path}: {e}")
+
+    def purge_expired(self) -> int:
+        """
+        Removes every expired entry and returns how many were deleted.
+        """
+        if self.ttl_seconds is None:
+            return 0
+        try:
+            with self._lock:
+                conn = self._connection()
+                cursor = conn.execute(
+                    f'DELETE FROM "{self.table_name}" WHERE created_at < ?',
+                    (time.time() - self.ttl_seconds,)
+                )
+                conn.commit()
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"[SQLiteCacheStore.purge_expired] Purge failed for {self.db_path}: {e}")
+            return 0
@@ -54,14 +54,19 @@ class ChatApp {
                 endpoint = '/rate';
             }
 
-            const response = await fetch(endpoint, {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(body)
-            });
-            const data = await response.json();
-            this.hideTyping();
-            this.addMessage(data.message, 'bot');
+            let data;
+            if (endpoint === '/chat') {
+                data = await this.streamChat(body);
+            } else {
+                const response = await fetch(endpoint, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify(body)
+                });
+                data = await response.json();
+                this.hideTyping();
+                this.addMessage(data.message, 'bot');
+            }
             this.messages = data.messages || [];
             this.conversationState = data.state || 'normal';
 
@@ -77,6 +82,84 @@ class ChatApp {
         }
     }
 
+    // Consumes the /chat/stream Server-Sent-Events response. Tokens are rendered as they
+    // arrive; the trailing 'final' (or 'error') event replaces them with the filtered message
+    // and carries the conversation messages and state, exactly like the /chat JSON payload.
+    async streamChat(body) {
+        const response = await fetch('/chat/stream', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(body)
+        });
+        if (!response.ok || !response.body) {
+            throw new Error(`Stream request failed with status ${response.status}`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let streamedText = '';
+        let messageContent = null;
+        let result = null;
+
+        const render = (text) => {
+            if (!messageContent) {
+                this.hideTyping();
+                messageContent = this.addMessage(text, 'bot');
+            } else {
+                messageContent.innerHTML = this.formatContent(text);
+                this.scrollToBottom();
+            }
+        };
+
+        while (!result) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const { event, data } = this.parseEvent(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+
+                if (event === 'token') {
+                    streamedText += data.content;
+                    render(streamedText);
+                } else if (event === 'recommendation') {
+                    render(streamedText + '\n\n' + data.content);
+                } else if (event === 'final' || event === 'error') {
+                    render(data.message);
+                    result = data;
+                    break;
+                }
+            }
+        }
+
+        if (!result) {
+            throw new Error('Stream ended before the final event');
+        }
+        return result;
+    }
+
+    parseEvent(rawEvent) {
+        let event = 'message';
+        const dataLines = [];
+        rawEvent.split('\n').forEach((line) => {
+            if (line.startsWith('event:')) {
+                event = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trim());
+            }
+        });
+        return { event, data: dataLines.length ? JSON.parse(dataLines.join('\n')) : {} };
+    }
+
+    formatContent(content) {
+        return content
+            .replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>')
+            .replace(/\n/g, '<br>');
+    }
+
     addMessage(content, sender) {
         const messageDiv = document.createElement('div');
         messageDiv.className = `message ${sender}-message`;
@@ -84,11 +167,7 @@ class ChatApp {
         const messageContent = document.createElement('div');
         messageContent.className = 'message-content';
 
-        let formattedContent = content
-            .replace(/\*\*(.*?)\*\*/g, '<strong>$1</strong>')
-            .replace(/\n/g, '<br>');
-
-        messageContent.innerHTML = formattedContent;
+        messageContent.innerHTML = this.formatContent(content);
         messageDiv.appendChild(messageContent);
 
         if (sender === 'user') {
@@ -97,6 +176,7 @@ class ChatApp {
         }
         this.messagesContainer.appendChild(messageDiv);
         this.scrollToBottom();
+        return messageContent;
     }
 
     showTyping() {
@@ -1,6 +1,9 @@
 from pandas import DataFrame
+from typing import Iterator
 import pandas as pd
 import os
+import re
+import json
 
 from src.logging import logging
 logger = logging()
@@ -37,6 +40,48 @@ def read_structured_file(file_path: str = '') -> DataFrame:
         raise e
     
 
+def iter_structured_file(file_path: str = '', chunk_rows: int = 50000) -> Iterator[DataFrame]:
+    """
+    Yields the file as DataFrames of at most chunk_rows rows without loading it whole:
+    CSV through pandas' chunked reader, Parquet batch by batch from its row groups.
+    Excel cannot be read in parts, it is loaded once and yielded in slices.
+    """
+    logger.info(f"iter_structured_file called with file_path: {file_path}, chunk_rows: {chunk_rows}")
+    if not file_path:
+        logger.error("The file path provided is empty.")
+        raise ValueError("The file path must not be empty.")
+    ext = os.path.splitext(file_path)[1].lower()
+    chunk_rows = max(1, int(chunk_rows))
+    try:
+        if ext == '.csv':
+            with pd.read_csv(file_path, chunksize=chunk_rows) as reader:
+                yield from reader
+        elif ext == '.parquet':
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(file_path)
+            logger.info(f"Parquet file has {parquet_file.metadata.num_rows} rows in {parquet_file.num_row_groups} row groups.")
+            for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+                yield batch.to_pandas()
+        elif ext in ['.xlsx', '.xls']:
+            logger.warning(f"Excel files cannot be read in chunks, loading '{file_path}' whole.")
+            df = pd.read_excel(file_path)
+            for start in range(0, len(df), chunk_rows):
+                yield df.iloc[start:start + chunk_rows]
+        else:
+            logger.error(f"Unsupported file format: {ext}")
+            raise ValueError(f"Unsupported file format: {ext}")
+        logger.info(f"File streamed successfully: {file_path}")
+    except FileNotFoundError:
+        logger.error(f"File not found: {file_path}")
+        raise FileNotFoundError(f"The file '{file_path}' does not exist.")
+    except pd.errors.EmptyDataError:
+        logger.error(f"No data: The file '{file_path}' is empty.")
+        raise pd.errors.EmptyDataError(f"The file '{file_path}' is empty.")
+    except pd.errors.ParserError:
+        logger.error(f"Parsing error: The file '{file_path}' is malformed.")
+        raise pd.errors.ParserError(f"The file '{file_path}' is malformed and cannot be parsed.")
+
+
 def write_structured_data(data: DataFrame, file_path: str):
     """
     Write DataFrame to a file based on extension.
@@ -57,4 +102,76 @@ def write_structured_data(data: DataFrame, file_path: str):
         logger.info(f"File written successfully: {file_path}")
     except Exception as e:
         logger.error(f"Failed to write file '{file_path}': {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+# Internal dictionary validation errors the assistant sometimes echoes back to the user.
+ERROR_LINE_PATTERN = re.compile(
+    r"there was a problem with your input"
+    r"|missing required dictionary"
+    r"|missing dictionary with required keys"
+    r"|expected dictionary keys and values are not present"
+    r"|the required dictionary is not present in the input"
+    r"|required dictionary structure.*missing",
+    re.IGNORECASE
+)
+
+
+def filter_error_lines(text: str) -> str:
+    """
+    Removes lines of the assistant response that echo the internal dictionary validation errors.
+    """
+    return '\n'.join(
+        line for line in text.split('\n')
+        if not ERROR_LINE_PATTERN.search(line)
+    ).strip()
+
+
+def format_sse_event(event: str, data: dict) -> str:
+    """
+    Serializes a payload as a single Server-Sent-Events frame.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+JSON_SCHEMA_TYPES = {
+    'object': dict, 'array': list, 'string': str, 'boolean': bool,
+    'integer': int, 'number': (int, float), 'null': type(None)
+}
+
+
+def validate_json_schema(instance, schema: dict, path: str = '$') -> list:
+    """
+    Validates a parsed JSON value against the subset of JSON Schema used by strict
+    structured outputs (type, enum, properties, required, additionalProperties, items, anyOf).
+    Returns a list of error messages, empty when the value is valid.
+    """
+    if 'anyOf' in schema:
+        for option in schema['anyOf']:
+            if not validate_json_schema(instance, option, path):
+                return []
+        return [f"{path}: does not match any of the allowed schemas"]
+
+    expected = schema.get('type')
+    if expected:
+        python_type = JSON_SCHEMA_TYPES[expected]
+        # bool is a subclass of int, it must not pass as a number
+        if not isinstance(instance, python_type) or (expected in ('integer', 'number') and isinstance(instance, bool)):
+            return [f"{path}: expected {expected}, got {type(instance).__name__}"]
+
+    if 'enum' in schema and instance not in schema['enum']:
+        return [f"{path}: {instance!r} is not one of {schema['enum']}"]
+
+    errors = []
+    if isinstance(instance, dict):
+        properties = schema.get('properties', {})
+        errors.extend(f"{path}: missing required key '{key}'" for key in schema.get('required', []) if key not in instance)
+        for key, value in instance.items():
+            if key in properties:
+                errors.extend(validate_json_schema(value, properties[key], f"{path}.{key}"))
+            elif schema.get('additionalProperties') is False:
+                errors.append(f"{path}: unexpected key '{key}'")
+    elif isinstance(instance, list) and 'items' in schema:
+        for index, item in enumerate(instance):
+            errors.extend(validate_json_schema(item, schema['items'], f"{path}[{index}]"))
+    return errors
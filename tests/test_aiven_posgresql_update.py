@@ -0,0 +1,337 @@
+import uuid
+
+import pandas as pd
+import psycopg2
+import pytest
+from psycopg2 import sql
+
+from src.backend.catalog_features import add_derived_columns, add_product_keys
+from src.constants import CATALOG_VERSION_TABLE, MAPPED_COLUMN, PRODUCT_KEY_COLUMN, CONTENT_HASH_COLUMN
+from src.database import aiven_posgresql_update as module
+from src.database.aiven_posgresql_update import PostgresDataBaseUpdate
+from src.database.postgres_pool import postgres_pool
+
+
+def render(query) -> str:
+    """ Query text without a server connection: identifiers double-quoted, placeholders as %s. """
+    if isinstance(query, str):
+        return query
+    if isinstance(query, sql.Composed):
+        return ''.join(render(part) for part in query.seq)
+    if isinstance(query, sql.SQL):
+        return query.string
+    if isinstance(query, sql.Identifier):
+        return '.'.join(f'"{name}"' for name in query.strings)
+    if isinstance(query, sql.Placeholder):
+        return '%s'
+    raise TypeError(f"unexpected query part {query!r}")
+
+
+class FakeCursor:
+    """
+    Records every statement; raise_on maps a statement prefix to the errors to raise, one per call,
+    and results a statement prefix to the rows fetchall() returns after it.
+    """
+    def __init__(self, raise_on=None, results=None):
+        self.statements = []
+        self.copies = []
+        self.raise_on = {prefix: list(raised) for prefix, raised in (raise_on or {}).items()}
+        self.results = results or {}
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        text = render(query)
+        self.statements.append((text, params))
+        self.rows = next((rows for prefix, rows in self.results.items() if text.startswith(prefix)), [])
+        for prefix, raised in self.raise_on.items():
+            if text.startswith(prefix) and raised:
+                raise raised.pop(0)
+
+    def executemany(self, query, rows):
+        self.statements.append((render(query), list(rows)))
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def copy_expert(self, query, buffer):
+        self.copies.append((render(query), buffer.read()))
+
+    def texts(self):
+        return [text for text, _ in self.statements]
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.returned = []
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn, close=False):
+        self.returned.append(conn)
+
+
+@pytest.fixture
+def fake_database(monkeypatch):
+    cursor = FakeCursor()
+    conn = FakeConnection(cursor)
+    pool = FakePool(conn)
+    monkeypatch.setattr(module, 'postgres_pool', pool)
+    return cursor, conn, pool
+
+
+def catalog(models, prices, mapping=None):
+    mapping = mapping or {'GPU intensity': 'high', 'Display quality': 'medium', 'Portability': 'low',
+                          'Multitasking': 'high', 'Processing speed': 'medium'}
+    frame = pd.DataFrame({'Brand': 'Acme', 'Model Name': models, 'Price': prices})
+    frame[MAPPED_COLUMN] = [dict(mapping) for _ in models]
+    return add_product_keys(add_derived_columns(frame))
+
+
+def test_upsert_deletes_merges_and_stamps_in_one_transaction(fake_database):
+    cursor, conn, pool = fake_database
+    changed = catalog(['A1', 'B2'], ['1,000', '2,000'])
+
+    version = PostgresDataBaseUpdate().upsert_to_postgres_database(changed, ['acme|c3'], table_name='laptops')
+
+    texts = cursor.texts()
+    assert texts[0].startswith('SET LOCAL statement_timeout')
+    assert texts[1] == 'DELETE FROM "laptops" WHERE "product_key" = ANY(%s)'
+    assert cursor.statements[1][1] == (['acme|c3'],)
+    assert cursor.statements[2][1] == ('laptops',) and 'information_schema.columns' in texts[2]
+    assert texts[3].startswith('CREATE TEMP TABLE "laptops_upsert" (LIKE "laptops"')
+    merge = next(text for text in texts if text.startswith('INSERT INTO "laptops"'))
+    assert 'FROM "laptops_upsert" ON CONFLICT ("product_key") DO UPDATE SET' in merge
+    assert '"product_key" = EXCLUDED."product_key"' not in merge
+    assert f'"{CONTENT_HASH_COLUMN}" = EXCLUDED."{CONTENT_HASH_COLUMN}"' in merge
+    assert any(text.startswith(f'INSERT INTO "{CATALOG_VERSION_TABLE}"') for text in texts)
+    assert (conn.commits, conn.rollbacks, pool.returned) == (1, 0, [conn])
+    assert len(version) == 32
+
+
+def test_upsert_with_only_deletions_skips_the_merge(fake_database):
+    cursor, conn, _ = fake_database
+
+    PostgresDataBaseUpdate().upsert_to_postgres_database(catalog(['A1'], ['1']).iloc[:0], ['acme|a1'], table_name='laptops')
+
+    assert not any(text.startswith('CREATE TEMP TABLE') for text in cursor.texts())
+    assert conn.commits == 1
+
+
+def test_upsert_writes_floats_drifted_from_integer_columns_as_integers(fake_database):
+    cursor, _, _ = fake_database
+    cursor.results = {'SELECT column_name FROM information_schema.columns': [('Price',), ('price_value',)]}
+    changed = catalog(['A1', 'B2'], [55000, 60000]).assign(Price=[55000.0, None])
+
+    PostgresDataBaseUpdate().upsert_to_postgres_database(changed, [], table_name='laptops')
+
+    (_, data), = cursor.copies
+    assert [line.split(',')[2] for line in data.splitlines()] == ['55000', '\\N']
+
+
+def test_failed_upsert_rolls_back(fake_database):
+    cursor, conn, pool = fake_database
+    cursor.raise_on = {'INSERT INTO "laptops"': [psycopg2.errors.UniqueViolation()]}
+
+    with pytest.raises(psycopg2.errors.UniqueViolation):
+        PostgresDataBaseUpdate().upsert_to_postgres_database(catalog(['A1'], ['1']), [], table_name='laptops')
+
+    assert (conn.commits, conn.rollbacks, pool.returned) == (0, 1, [conn])
+
+
+@pytest.fixture
+def live_table():
+    """ A throwaway catalog table on the PostgreSQL server of the POSTGRES_* settings, skipped without one. """
+    try:
+        conn = postgres_pool.getconn()
+    except (ValueError, psycopg2.Error) as e:
+        pytest.skip(f"no PostgreSQL server available: {e}")
+    postgres_pool.putconn(conn)
+    table_name = f"test_catalog_{uuid.uuid4().hex[:8]}"
+    yield table_name
+    with postgres_pool.connection() as conn, conn.cursor() as cur:
+        for name in (table_name, f"{table_name}_previous"):
+            cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(name)))
+        cur.execute(sql.SQL("DELETE FROM {} WHERE table_name = %s").format(sql.Identifier(CATALOG_VERSION_TABLE)), (table_name,))
+        conn.commit()
+
+
+def fetch_catalog(table_name):
+    with postgres_pool.connection() as conn:
+        query = sql.SQL("SELECT * FROM {} ORDER BY {}").format(sql.Identifier(table_name), sql.Identifier(PRODUCT_KEY_COLUMN))
+        with conn.cursor() as cur:
+            cur.execute(query)
+            columns = [column.name for column in cur.description]
+            return pd.DataFrame(cur.fetchall(), columns=columns)
+
+
+def test_live_upsert_inserts_updates_and_deletes(live_table):
+    database = PostgresDataBaseUpdate()
+    database.update_to_postgres_database(catalog(['A1', 'B2', 'C3'], ['1,000', '2,000', '3,000']), table_name=live_table)
+
+    changed = catalog(['B2', 'D4'], ['2,500', '4,000'])
+    database.upsert_to_postgres_database(changed, ['acme|c3'], table_name=live_table)
+
+    stored = fetch_catalog(live_table)
+    assert stored[PRODUCT_KEY_COLUMN].tolist() == ['acme|a1', 'acme|b2', 'acme|d4']
+    assert stored['price_value'].tolist() == [1000, 2500, 4000]
+    assert stored[MAPPED_COLUMN].iloc[2] == changed[MAPPED_COLUMN].iloc[1]
+
+
+def test_live_upsert_of_a_missing_value_in_an_integer_column(live_table):
+    database = PostgresDataBaseUpdate()
+    database.update_to_postgres_database(catalog(['A1', 'B2'], [55000, 60000]), table_name=live_table)
+
+    # the NaN turns the new feed's Price column into floats, 61000 would be sent as '61000.0'
+    changed = catalog(['B2', 'C3'], [61000, 0]).assign(Price=[61000, None])
+    assert changed['Price'].dtype == float
+    database.upsert_to_postgres_database(changed, [], table_name=live_table)
+
+    stored = fetch_catalog(live_table)
+    assert stored['Price'].tolist()[:2] == [55000, 61000] and pd.isna(stored['Price'].iloc[2])
+
+
+def test_copy_streams_csv_chunks_with_json_and_nulls():
+    cursor = FakeCursor()
+    rows = pd.DataFrame({
+        'Model Name': ['A1', 'B2, "Pro"', None, 'D4', 'E5'],
+        MAPPED_COLUMN: [{'Portability': 'low'}, {'Portability': 'low'}, None, {'notes': ['x', 'y']}, None],
+    })
+
+    PostgresDataBaseUpdate().copy_rows(cursor, 'laptops', rows, chunk_rows=2)
+
+    assert [query for query, _ in cursor.copies] == [
+        f'COPY "laptops" ("Model Name", "{MAPPED_COLUMN}") FROM STDIN WITH (FORMAT csv, NULL \'\\N\')'
+    ] * 3
+    assert [data for _, data in cursor.copies] == [
+        'A1,"{""Portability"": ""low""}"\n"B2, ""Pro""","{""Portability"": ""low""}"\n',
+        '\\N,\\N\nD4,"{""notes"": [""x"", ""y""]}"\n',
+        'E5,\\N\n',
+    ]
+
+
+def test_insert_method_sends_the_same_rows(monkeypatch):
+    cursor = FakeCursor()
+    monkeypatch.setattr(module, 'POSTGRES_WRITE_METHOD', 'insert')
+    rows = pd.DataFrame({'Model Name': ['A1', None], MAPPED_COLUMN: [{'Portability': 'low'}, None]})
+
+    PostgresDataBaseUpdate().write_rows(cursor, 'laptops', rows)
+
+    query, values = cursor.statements[0]
+    assert query == f'INSERT INTO "laptops" ("Model Name", "{MAPPED_COLUMN}") VALUES (%s, %s)'
+    assert values[0][0] == 'A1' and values[0][1].adapted == {'Portability': 'low'}
+    assert values[1] == (None, None)
+    assert not cursor.copies
+
+
+@pytest.mark.parametrize('write_method', ['copy', 'insert'])
+def test_live_full_load_round_trips(live_table, monkeypatch, write_method):
+    monkeypatch.setattr(module, 'POSTGRES_WRITE_METHOD', write_method)
+    rows = catalog(['A1', 'B2, "Pro"', 'C3\nnew line'], ['1,000', '2,000', '3,000'])
+
+    PostgresDataBaseUpdate().update_to_postgres_database(rows, table_name=live_table)
+
+    stored = fetch_catalog(live_table)
+    assert stored['Model Name'].tolist() == ['A1', 'B2, "Pro"', 'C3\nnew line']
+    assert stored[MAPPED_COLUMN].tolist() == rows[MAPPED_COLUMN].tolist()
+    assert stored['gpu_intensity'].tolist() == [3, 3, 3]
+
+
+def test_swap_retries_when_the_table_lock_times_out(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(module.time, 'sleep', sleeps.append)
+    cursor = FakeCursor(raise_on={'ALTER TABLE': [psycopg2.errors.LockNotAvailable()] * 2})
+
+    PostgresDataBaseUpdate().swap_tables(cursor, [('laptops', 'laptops_previous'), ('laptops_staging', 'laptops')],
+                                         drop_first='laptops_previous')
+
+    texts = cursor.texts()
+    assert texts.count('ROLLBACK TO SAVEPOINT catalog_swap') == 2
+    assert texts[-4:] == [
+        'DROP TABLE IF EXISTS "laptops_previous"',
+        'ALTER TABLE IF EXISTS "laptops" RENAME TO "laptops_previous"',
+        'ALTER TABLE IF EXISTS "laptops_staging" RENAME TO "laptops"',
+        'RELEASE SAVEPOINT catalog_swap',
+    ]
+    assert len(sleeps) == 2 and sleeps[0] < sleeps[1]
+
+
+def test_swap_gives_up_after_the_retries(monkeypatch):
+    monkeypatch.setattr(module.time, 'sleep', lambda seconds: None)
+    attempts = module.POSTGRES_SWAP_RETRIES + 1
+    cursor = FakeCursor(raise_on={'ALTER TABLE': [psycopg2.errors.LockNotAvailable()] * attempts})
+
+    with pytest.raises(psycopg2.errors.LockNotAvailable):
+        PostgresDataBaseUpdate().swap_tables(cursor, [('laptops_staging', 'laptops')])
+
+    assert cursor.texts().count('SAVEPOINT catalog_swap') == attempts
+
+
+def table_names(prefix):
+    with postgres_pool.connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT tablename FROM pg_tables WHERE tablename LIKE %s ORDER BY tablename", (prefix + '%',))
+        return [name for name, in cur.fetchall()]
+
+
+def test_live_swap_keeps_the_previous_catalog_for_rollback(live_table):
+    database = PostgresDataBaseUpdate()
+    database.update_to_postgres_database(catalog(['A1'], ['1,000']), table_name=live_table)
+    database.update_to_postgres_database(catalog(['B2', 'C3'], ['2,000', '3,000']), table_name=live_table)
+
+    assert table_names(live_table) == [live_table, f"{live_table}_previous"]
+    assert fetch_catalog(live_table)['Model Name'].tolist() == ['B2', 'C3']
+
+    database.rollback_catalog(table_name=live_table)
+    assert fetch_catalog(live_table)['Model Name'].tolist() == ['A1']
+    database.rollback_catalog(table_name=live_table)
+    assert fetch_catalog(live_table)['Model Name'].tolist() == ['B2', 'C3']
+
+
+def test_live_failed_load_leaves_the_catalog_and_no_staging_table(live_table):
+    database = PostgresDataBaseUpdate()
+    database.update_to_postgres_database(catalog(['A1'], ['1,000']), table_name=live_table)
+
+    def chunks():
+        yield catalog(['B2'], ['2,000'])
+        raise IOError("supplier file truncated")
+
+    with pytest.raises(IOError):
+        database.stream_to_postgres_database(chunks(), table_name=live_table)
+
+    assert table_names(live_table) == [live_table]
+    assert fetch_catalog(live_table)['Model Name'].tolist() == ['A1']
+
+
+def test_live_stream_writes_every_chunk(live_table):
+    first = catalog(['A1', 'B2'], ['1,000', '2,000']).assign(**{'RAM Size': [16, 8], 'Weight': None})
+    second = catalog(['C3', 'D4'], ['3,000', '4,000']).assign(**{'RAM Size': [32, None], 'Weight': ['1.2 kg', None]})
+
+    PostgresDataBaseUpdate().stream_to_postgres_database(iter([first, second]), table_name=live_table)
+
+    stored = fetch_catalog(live_table)
+    assert stored['Model Name'].tolist() == ['A1', 'B2', 'C3', 'D4']
+    assert stored['RAM Size'].tolist()[:3] == [16, 8, 32] and pd.isna(stored['RAM Size'].iloc[3])
+    assert stored['Weight'].isna().tolist() == [True, True, False, True] and stored['Weight'].iloc[2] == '1.2 kg'
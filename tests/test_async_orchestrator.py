@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('boto3')
+
+from src.backend import async_orchestrator as module
+from src.backend.profile_detector import AMBIGUOUS
+
+
+class AmbiguousProfiles:
+    def detect(self, assistant_response):
+        return AMBIGUOUS, None
+
+
+def orchestrator(moderation, analysis):
+    # built without __init__, no OpenAI client or catalog is needed
+    instance = module.AsyncOrchestrator.__new__(module.AsyncOrchestrator)
+    instance.profile_detector = AmbiguousProfiles()
+    instance.moderation_check = moderation
+    instance.analyze_turn = analysis
+    return instance
+
+
+def test_flagged_reply_waits_for_the_cancelled_analysis():
+    analysis_state = {}
+
+    async def moderation(text):
+        await asyncio.sleep(0)
+        return 'flagged'
+
+    async def analysis(text):
+        analysis_state['task'] = asyncio.current_task()
+        await asyncio.sleep(10)
+
+    async def turn():
+        result = await orchestrator(moderation, analysis).run_turn_post_processing('reply')
+        # finished before the turn returns, not left for asyncio.run to clean up
+        return result, analysis_state['task'].cancelled()
+
+    result, cancelled = asyncio.run(turn())
+
+    assert result['flagged'] is True
+    assert cancelled
+
+
+def test_failed_analysis_is_retrieved_when_moderation_fails(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(module.logger, 'warning', warnings.append)
+
+    async def moderation(text):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("moderation unavailable")
+
+    async def analysis(text):
+        raise ValueError("analysis failed first")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(orchestrator(moderation, analysis).run_turn_post_processing('reply'))
+
+    # the analysis error is read (and logged) instead of surfacing later as "exception was never retrieved"
+    assert warnings == ["[cancel_task] Cancelled task had already failed: analysis failed first"]
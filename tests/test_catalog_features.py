@@ -0,0 +1,55 @@
+import json
+
+import pandas as pd
+
+from src.backend.catalog_features import validate_mapped_column, add_derived_columns, add_product_keys, raw_mapped_value
+from src.constants import MAPPED_COLUMN, MAPPED_LEVEL_COLUMNS, CONTENT_HASH_COLUMN
+
+
+RAW_MAPPING = {'GPU Intensity': 'High', 'display_quality': 'medium', 'Portability': 'LOW',
+               'Multitasking': 'ultra', 'Processing speed': 'high', 'notes': ['gaming', 'rgb']}
+
+
+def test_validated_column_keeps_the_raw_mapper_output():
+    mapped = pd.Series([RAW_MAPPING, json.dumps(RAW_MAPPING), None])
+
+    validated = validate_mapped_column(mapped)
+
+    assert validated[0] is RAW_MAPPING
+    assert validated[1] == RAW_MAPPING
+    assert validated[2] is None
+
+
+def test_level_columns_use_the_normalized_levels():
+    frame = pd.DataFrame({MAPPED_COLUMN: validate_mapped_column(pd.Series([RAW_MAPPING]))})
+
+    levels = add_derived_columns(frame, price_column=None).iloc[0]
+
+    assert levels[MAPPED_LEVEL_COLUMNS['GPU intensity']] == 3
+    assert levels[MAPPED_LEVEL_COLUMNS['Display quality']] == 2
+    assert levels[MAPPED_LEVEL_COLUMNS['Portability']] == 1
+    assert levels[MAPPED_LEVEL_COLUMNS['Multitasking']] == 0
+    assert levels[MAPPED_LEVEL_COLUMNS['Processing speed']] == 3
+
+
+def test_unparseable_text_is_kept_as_a_json_string():
+    assert json.loads(raw_mapped_value('not a mapping')) == 'not a mapping'
+
+
+def test_a_new_missing_value_changes_only_its_own_hash():
+    before = pd.DataFrame({'Brand': ['Acme'] * 3, 'Model Name': ['A1', 'B2', 'C3'], 'Price': [55000, 60000, 65000]})
+    after = before.assign(Price=[55000, None, 65000])
+
+    assert after['Price'].dtype == float
+    before_hashes = add_product_keys(before)[CONTENT_HASH_COLUMN].tolist()
+    after_hashes = add_product_keys(after)[CONTENT_HASH_COLUMN].tolist()
+
+    assert [old == new for old, new in zip(before_hashes, after_hashes)] == [True, False, True]
+
+
+def test_fractional_values_still_change_the_hash():
+    frame = pd.DataFrame({'Brand': ['Acme'], 'Model Name': ['A1'], 'Weight': [1.5]})
+
+    hashes = {add_product_keys(frame.assign(Weight=weight))[CONTENT_HASH_COLUMN].iloc[0] for weight in (1.5, 1.0, 1)}
+
+    assert len(hashes) == 2
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+from src.backend.completion_cache import CompletionCache, is_deterministic_request, moderation_cache_key
+from src.database.sqlite_cache_store import SQLiteCacheStore
+
+
+def test_only_temperature_zero_requests_are_cached():
+    assert is_deterministic_request({'model': 'm', 'messages': [], 'temperature': 0, 'seed': 1234})
+    # a seed alone does not make a sampled reply repeatable
+    assert not is_deterministic_request({'model': 'm', 'messages': [], 'seed': 2345})
+    assert not is_deterministic_request({'model': 'm', 'messages': []})
+
+
+def test_moderation_key_does_not_contain_the_text():
+    message = 'my phone number is 9876543210'
+    key = moderation_cache_key('omni-moderation-latest', message)
+    assert message not in key and '9876543210' not in key
+    assert key == moderation_cache_key('omni-moderation-latest', message)
+
+
+def test_clear_empties_the_sqlite_tier(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / 'cache.sqlite3'), table_name='llm_completions')
+    cache = CompletionCache(store=store)
+    cache.set('key', 'value')
+    cache.clear()
+    assert cache.get('key') is None
+    assert store.get('key') is None
+
+
+def test_memory_entries_expire(monkeypatch):
+    cache = CompletionCache(store=None, ttl_seconds=60)
+    clock = [1000.0]
+    monkeypatch.setattr('src.backend.completion_cache.time.time', lambda: clock[0])
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
+    clock[0] += 61
+    assert cache.get('key') is None
+
+
+class ThreadRecordingStore:
+    def __init__(self):
+        self.entries = {}
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return self.entries.get(key)
+
+    def set(self, key, value):
+        self.threads.append(threading.get_ident())
+        self.entries[key] = value
+
+
+def test_async_lookups_keep_the_store_off_the_event_loop():
+    store = ThreadRecordingStore()
+    cache = CompletionCache(store=store, enabled=True)
+
+    async def lookups():
+        loop_thread = threading.get_ident()
+        assert await cache.aget('key') is None
+        await cache.aset('key', 'value')
+        assert await cache.aget('key') == 'value'
+        return loop_thread
+
+    loop_thread = asyncio.run(lookups())
+
+    # the miss and the write went to the store, the second lookup was an LRU hit
+    assert len(store.threads) == 2
+    assert loop_thread not in store.threads
+    assert store.entries == {'key': 'value'}
+    assert cache.stats()['memory_hits'] == 1
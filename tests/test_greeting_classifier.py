@@ -0,0 +1,27 @@
+from benchmarks.greeting_classifier_benchmark import LABELLED_MESSAGES, training_overlap
+from src.backend.greeting_classifier import GreetingClassifier
+
+classifier = GreetingClassifier()
+
+
+def test_held_out_messages_are_not_training_examples():
+    assert training_overlap() == []
+
+
+def test_held_out_accuracy_of_confident_answers():
+    confident = [(classifier.classify(message), label) for message, label in LABELLED_MESSAGES]
+    confident = [(predicted, label) for (predicted, confidence), label in confident if classifier.is_confident(confidence)]
+    assert len(confident) >= 0.6 * len(LABELLED_MESSAGES)
+    assert sum(predicted == label for predicted, label in confident) / len(confident) >= 0.95
+
+
+def test_exact_greetings_are_answered_locally():
+    for message in ['hi', 'hello', 'good morning', 'can you help me']:
+        label, confidence = classifier.classify(message)
+        assert label == 'yes' and classifier.is_confident(confidence), message
+
+
+def test_fuzzy_only_matches_fall_back_to_the_llm():
+    for message in ['hell', 'namste', 'good evning', 'hellp']:
+        _, confidence = classifier.classify(message)
+        assert not classifier.is_confident(confidence), message
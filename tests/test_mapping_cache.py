@@ -0,0 +1,55 @@
+import json
+import os
+import subprocess
+import sys
+
+from src.backend.mapping_cache import MappingCache
+
+REPOSITORY_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# prints everything a cache key is derived from, in a fresh interpreter
+KEYS_SCRIPT = """
+import hashlib, json
+from src.backend.mapping_cache import MappingCache, MAPPING_PROMPT_VERSION
+from src.backend.prompts import IntentConfirmation
+print(json.dumps({
+    'prompt_version': MAPPING_PROMPT_VERSION,
+    'mapping_key': MappingCache(store=None).key('Dell Inspiron, i5, 16GB RAM'),
+    'intent_prompt': hashlib.sha256(IntentConfirmation.intent_confirmation.encode('utf-8')).hexdigest(),
+}))
+"""
+
+
+def keys_with_hash_seed(seed):
+    environment = {**os.environ, 'PYTHONHASHSEED': str(seed)}
+    output = subprocess.run([sys.executable, '-c', KEYS_SCRIPT], cwd=REPOSITORY_ROOT, env=environment,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_cache_keys_do_not_depend_on_the_hash_seed():
+    results = [keys_with_hash_seed(seed) for seed in (0, 1, 12345)]
+
+    assert results[0] == results[1] == results[2]
+
+
+class DictStore:
+    def __init__(self):
+        self.entries = {}
+
+    def get_many(self, keys):
+        return {key: self.entries[key] for key in keys if key in self.entries}
+
+    def set_many(self, entries):
+        self.entries.update(entries)
+
+
+def test_only_valid_mappings_are_stored_and_come_back_unchanged():
+    cache = MappingCache(DictStore())
+    valid = {'GPU Intensity': 'High', 'Display quality': 'medium', 'Portability': 'low',
+             'Multitasking': 'high', 'Processing speed': 'medium'}
+    invalid = {'GPU intensity': 'extreme'}
+
+    cache.store_mappings(['laptop a', 'laptop b'], [valid, invalid])
+
+    assert cache.lookup(['laptop b', 'laptop a']) == {1: valid}
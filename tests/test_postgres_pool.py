@@ -0,0 +1,87 @@
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+from src.database.postgres_pool import PostgresConnectionPool
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+
+class FakeInfo:
+    transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeConnection:
+    def __init__(self, broken=False, closed=False):
+        self.broken = broken
+        self.closed = int(closed)
+        self.info = FakeInfo()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    """ Hands out the given connections in order, like ThreadedConnectionPool.getconn. """
+    def __init__(self, connections):
+        self.connections = list(connections)
+        self.discarded = []
+
+    def getconn(self):
+        return self.connections.pop(0)
+
+    def putconn(self, conn, close=False):
+        if close:
+            self.discarded.append(conn)
+
+
+def pool_with(connections):
+    pool = PostgresConnectionPool(min_size=1, max_size=2, acquire_timeout=1, health_check_idle=60)
+    pool._pool = FakePool(connections)
+    return pool
+
+
+def test_broken_connection_is_replaced():
+    healthy = FakeConnection()
+    pool = pool_with([FakeConnection(closed=True), healthy])
+
+    assert pool.getconn() is healthy
+    assert pool.metrics()['health_check_failures'] == 1
+
+
+def test_third_connection_is_checked_too():
+    healthy = FakeConnection()
+    pool = pool_with([FakeConnection(closed=True), FakeConnection(closed=True), healthy])
+
+    assert pool.getconn() is healthy
+    assert pool.metrics()['health_check_failures'] == 2
+
+
+def test_raises_when_every_connection_is_broken():
+    broken = [FakeConnection(closed=True), FakeConnection(closed=True), FakeConnection(broken=True)]
+    pool = pool_with(broken)
+
+    with pytest.raises(psycopg2.OperationalError):
+        pool.getconn()
+    assert pool._pool.discarded == broken
+    metrics = pool.metrics()
+    assert metrics['health_check_failures'] == 3
+    assert metrics['in_use'] == 0
+    # the slot is given back, a later borrow does not wait for it
+    assert pool._slots.acquire(timeout=0) and pool._slots.acquire(timeout=0)
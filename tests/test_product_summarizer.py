@@ -0,0 +1,32 @@
+import openai
+import pandas as pd
+import pytest
+
+from src.backend import product_summarizer as module
+from src.backend.product_summarizer import ProductSummarizer
+
+
+def api_error(error_class, code=None):
+    # built without an HTTP response, the client library is not called
+    error = Exception.__new__(error_class)
+    error.code = code
+    return error
+
+
+def failing_create(error):
+    def create(**request):
+        raise error
+    return create
+
+
+def test_transient_failures_leave_the_summary_empty_and_are_counted(monkeypatch):
+    monkeypatch.setattr(module.openai.chat.completions, 'create', failing_create(api_error(openai.RateLimitError)))
+    frame = ProductSummarizer(max_workers=1).add_summaries(pd.DataFrame({'Description': ['A light laptop.', '']}))
+    assert frame['Summary'].tolist() == ['', '']
+
+
+@pytest.mark.parametrize('error', [api_error(openai.AuthenticationError), api_error(openai.RateLimitError, code='insufficient_quota')])
+def test_auth_and_quota_errors_fail_the_ingestion(monkeypatch, error):
+    monkeypatch.setattr(module.openai.chat.completions, 'create', failing_create(error))
+    with pytest.raises(type(error)):
+        ProductSummarizer(max_workers=1).add_summaries(pd.DataFrame({'Description': ['A light laptop.']}))
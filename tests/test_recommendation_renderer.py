@@ -0,0 +1,55 @@
+import pandas as pd
+
+from src.backend.recommendation_renderer import render_recommendations
+from src.constants import PRICE_VALUE_COLUMN, SUMMARY_COLUMN
+
+
+def catalog(**columns):
+    base = {
+        'Brand': ['Dell', 'HP', 'Asus'],
+        'Model Name': ['Inspiron', 'Pavilion', 'ROG'],
+        'Core': ['i5', 'i7', 'Ryzen 9'],
+    }
+    base.update(columns)
+    return pd.DataFrame(base)
+
+
+def test_most_expensive_first():
+    products = catalog(Price=['55,000', 'Rs. 1,20,000', '95000'])
+
+    lines = render_recommendations(products).splitlines()
+
+    assert lines[0] == "Here are the laptops that best match your requirements:"
+    assert lines[1] == "1. HP Pavilion : i7, Rs. 120,000"
+    assert lines[2] == "2. Asus ROG : Ryzen 9, Rs. 95,000"
+    assert lines[3] == "3. Dell Inspiron : i5, Rs. 55,000"
+
+
+def test_price_value_column_wins_and_ties_keep_the_ranking_order():
+    products = catalog(**{PRICE_VALUE_COLUMN: [70000, 90000, 70000], 'Price': ['1', '2', '3']})
+
+    lines = render_recommendations(products).splitlines()
+
+    assert [line.split(' : ')[0] for line in lines[1:]] == ['1. HP Pavilion', '2. Dell Inspiron', '3. Asus ROG']
+
+
+def test_above_budget_header():
+    products = catalog(**{PRICE_VALUE_COLUMN: [81000, 83000, 82000]})
+
+    lines = render_recommendations(products, budget=80000, above_budget=True).splitlines()
+
+    assert lines[0] == "No laptop fits within the budget of 80000. Here are the closest alternatives just above it:"
+    assert lines[1].startswith("1. HP Pavilion")
+
+
+def test_summaries_fall_back_to_specifications():
+    products = catalog(**{PRICE_VALUE_COLUMN: [1000, 2000, 3000], SUMMARY_COLUMN: ['Light office laptop.', None, '']})
+
+    lines = render_recommendations(products, use_summaries=True).splitlines()
+
+    assert lines[1] == "1. Asus ROG : Ryzen 9, Rs. 3,000"
+    assert lines[3] == "3. Dell Inspiron : Light office laptop, Rs. 1,000"
+
+
+def test_empty_catalog():
+    assert render_recommendations(pd.DataFrame()).startswith("Sorry")
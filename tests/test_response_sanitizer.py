@@ -0,0 +1,35 @@
+from src.backend.response_sanitizer import scan_structured_spans, sanitize_assistant_response
+
+
+def test_removes_profile_dict_and_keeps_the_text():
+    text = "Here is your profile:\n{'GPU intensity': 'high', 'Budget': '50000'}\nThanks!"
+    assert sanitize_assistant_response(text) == "Here is your profile:\n\nThanks!"
+
+
+def test_nested_braces_form_one_outer_span():
+    assert scan_structured_spans("x {a {b} c} y") == [(2, 11, 'dict')]
+
+
+def test_brace_inside_a_string_value_does_not_close_the_literal():
+    assert scan_structured_spans("{'k': \"}\"} ok") == [(0, 10, 'dict')]
+
+
+def test_apostrophe_inside_a_word_is_not_a_quote():
+    assert scan_structured_spans("{it's fine} ok") == [(0, 11, 'dict')]
+
+
+def test_unbalanced_open_brace_is_kept_and_later_literals_are_found():
+    assert scan_structured_spans("{ unbalanced {b} tail") == [(13, 16, 'dict')]
+    assert scan_structured_spans("a {b} {c") == [(2, 5, 'dict')]
+    assert sanitize_assistant_response("Budget { is 50000 {'a': 1}") == "Budget { is 50000"
+
+
+def test_code_fences_inside_an_unbalanced_brace_are_removed():
+    assert scan_structured_spans("open { then ```code``` end") == [(12, 22, 'code')]
+    assert scan_structured_spans("```unterminated {x}") == [(0, 19, 'code')]
+
+
+def test_long_unbalanced_input_is_scanned_without_recursion():
+    text = '{ ' * 200000
+    assert scan_structured_spans(text) == []
+    assert sanitize_assistant_response('{ ' * 1500) == ('{ ' * 1500).strip()
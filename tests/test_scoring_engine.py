@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from benchmarks.scoring_engine_benchmark import USER_PROFILE, synthetic_catalog
+from src.backend.product_mapper import ProductMapper
+from src.backend.scoring_engine import ScoringEngine
+from src.constants import MAPPED_ATTRIBUTES, PRICE_VALUE_COLUMN
+
+
+def reference_scores(catalog, user_profile):
+    records = catalog[MAPPED_ATTRIBUTES].to_dict(orient='records')
+    scored_records = ProductMapper().map_the_score(records, user_profile)
+    return np.array([sum(v for v in record.values() if isinstance(v, int)) for record in scored_records])
+
+
+def reference_order(catalog, user_profile):
+    """ Rows of the reference scorer sorted by score, then price, both descending. """
+    scored = catalog.assign(score=reference_scores(catalog, user_profile))
+    return scored.sort_values(['score', PRICE_VALUE_COLUMN], ascending=False, kind='stable')
+
+
+@pytest.mark.parametrize('rows, k', [(50, 10), (2000, 25), (300, 300)])
+def test_rank_matches_the_reference_scorer(rows, k):
+    catalog = synthetic_catalog(rows, seed=rows)
+
+    ranked = ScoringEngine().rank(catalog, USER_PROFILE, k=k)
+    expected = reference_order(catalog, USER_PROFILE).head(k)
+
+    assert ranked['score'].tolist() == expected['score'].tolist()
+    assert ranked[PRICE_VALUE_COLUMN].tolist() == expected[PRICE_VALUE_COLUMN].tolist()
+
+
+def test_scores_match_for_every_row():
+    catalog = synthetic_catalog(500)
+    engine = ScoringEngine()
+
+    scores = engine.score(engine.level_matrix(catalog), engine.user_levels(USER_PROFILE))
+
+    assert scores.tolist() == reference_scores(catalog, USER_PROFILE).tolist()
+
+
+def test_unknown_user_level_never_matches():
+    catalog = synthetic_catalog(100)
+    profile = {'user_req': {**USER_PROFILE['user_req'], 'GPU intensity': 'extreme'}}
+    engine = ScoringEngine()
+
+    scores = engine.score(engine.level_matrix(catalog), engine.user_levels(profile))
+
+    assert scores.tolist() == reference_scores(catalog, profile).tolist()
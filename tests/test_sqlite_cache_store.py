@@ -0,0 +1,43 @@
+from src.backend.completion_cache import CompletionCache
+from src.database.sqlite_cache_store import SQLiteCacheStore
+
+
+def unwritable_store(tmp_path, **kwargs):
+    # the cache directory would have to be created inside a regular file (root ignores permission bits)
+    blocker = tmp_path / 'blocker'
+    blocker.write_text('')
+    return SQLiteCacheStore(str(blocker / 'cache' / 'cache.sqlite3'), table_name='llm_completions', **kwargs)
+
+
+def test_unwritable_path_behaves_as_an_empty_cache(tmp_path):
+    store = unwritable_store(tmp_path, ttl_seconds=60)
+
+    store.set('key', 'value')
+    store.set_many({'a': '1', 'b': '2'})
+    store.delete('key')
+    store.clear()
+
+    assert store.get('key') is None
+    assert store.get_many(['a', 'b']) == {}
+    assert store.purge_expired() == 0
+
+
+def test_completion_cache_survives_an_unwritable_store(tmp_path):
+    cache = CompletionCache(store=unwritable_store(tmp_path), enabled=True)
+
+    cache.set('key', 'value')
+
+    assert cache.get('key') == 'value'
+    assert cache.get('other') is None
+
+
+def test_round_trip_and_expiry(tmp_path, monkeypatch):
+    store = SQLiteCacheStore(str(tmp_path / 'nested' / 'cache.sqlite3'), ttl_seconds=60)
+    clock = [1000.0]
+    monkeypatch.setattr('src.database.sqlite_cache_store.time.time', lambda: clock[0])
+
+    store.set_many({'a': '1', 'b': '2'})
+    assert store.get_many(['a', 'b', 'c']) == {'a': '1', 'b': '2'}
+    clock[0] += 61
+    assert store.get('a') is None
+    assert store.purge_expired() == 1
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backend.catalog_features import add_product_keys
+from src.constants import MAPPED_COLUMN, PRODUCT_KEY_COLUMN, CONTENT_HASH_COLUMN
+from src.database.aiven_posgresql_update import PostgresDataBaseUpdate
+from src.utils import iter_structured_file, read_structured_file
+
+
+def supplier_file(rows=23):
+    # every model appears three times, so repeats straddle the chunk boundaries
+    return pd.DataFrame({
+        'Brand': ['Acme'] * rows,
+        'Model Name': [f"M{i % (rows // 3 + 1)}" for i in range(rows)],
+        'Price': [f"{1000 + i:,}" for i in range(rows)],
+        'RAM Size': [16 if i % 5 else None for i in range(rows)],
+    })
+
+
+@pytest.mark.parametrize('extension', ['.csv', '.parquet'])
+def test_chunks_add_up_to_the_whole_file(tmp_path, extension):
+    path = str(tmp_path / f"catalog{extension}")
+    frame = supplier_file()
+    frame.to_csv(path, index=False) if extension == '.csv' else frame.to_parquet(path, index=False)
+
+    chunks = list(iter_structured_file(path, chunk_rows=5))
+
+    assert [len(chunk) for chunk in chunks] == [5, 5, 5, 5, 3]
+    streamed = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(streamed, read_structured_file(path).reset_index(drop=True))
+
+
+def test_unsupported_file_is_rejected():
+    with pytest.raises(ValueError):
+        next(iter_structured_file('catalog.json'))
+
+
+def test_chunked_product_keys_match_the_whole_file():
+    frame = supplier_file()
+    whole = add_product_keys(frame)
+
+    seen_keys = {}
+    chunked = pd.concat([add_product_keys(frame.iloc[start:start + 4], seen_keys) for start in range(0, len(frame), 4)],
+                        ignore_index=True)
+
+    assert chunked[PRODUCT_KEY_COLUMN].tolist() == whole[PRODUCT_KEY_COLUMN].tolist()
+    assert chunked[CONTENT_HASH_COLUMN].tolist() == whole[CONTENT_HASH_COLUMN].tolist()
+    assert whole[PRODUCT_KEY_COLUMN].is_unique
+
+
+def test_later_chunks_are_conformed_to_the_first():
+    first = pd.DataFrame({'Model Name': ['A1'], 'RAM Size': np.array([16], dtype=np.int64)})
+    later = pd.DataFrame({'RAM Size': [8.0, np.nan], 'Model Name': ['B2', 'C3']})
+
+    conformed = PostgresDataBaseUpdate().conform_chunk(later, first.dtypes)
+
+    assert list(conformed.columns) == ['Model Name', 'RAM Size']
+    assert conformed['RAM Size'].dtype == 'Int64'
+    assert conformed['RAM Size'].tolist()[0] == 8 and conformed['RAM Size'].isna().tolist() == [False, True]
+    with pytest.raises(ValueError):
+        PostgresDataBaseUpdate().conform_chunk(later.drop(columns='RAM Size'), first.dtypes)
+
+
+class FakeMapper:
+    def start_dataframe_product_mapping(self, df):
+        return df.assign(**{MAPPED_COLUMN: [{'GPU intensity': 'high', 'Portability': 'low'} for _ in range(len(df))]})
+
+
+class FakeDatabaseUpdate:
+    def __init__(self):
+        self.chunk_sizes = []
+
+    def stream_to_postgres_database(self, chunks):
+        # consumes the generator as the real writer does, one chunk at a time
+        self.frames = []
+        for chunk in chunks:
+            self.chunk_sizes.append(len(chunk))
+            self.frames.append(chunk)
+        return 'version'
+
+
+def test_streaming_ingestion_prepares_every_chunk(tmp_path, monkeypatch):
+    pytest.importorskip('boto3')
+    from src.backend import data_ingestion as module
+
+    path = str(tmp_path / 'catalog.csv')
+    supplier_file().to_csv(path, index=False)
+    monkeypatch.setattr(module, 'INGESTION_CHUNK_ROWS', 10)
+    monkeypatch.setattr(module, 'RANKING_TABLE_MAX_ROWS', 0)
+    ingestion = module.DataIngestion.__new__(module.DataIngestion)
+    ingestion.product_mapper = FakeMapper()
+    ingestion.update_postgres_database = FakeDatabaseUpdate()
+
+    ingestion.streaming_ingestion(path)
+
+    written = pd.concat(ingestion.update_postgres_database.frames, ignore_index=True)
+    assert ingestion.update_postgres_database.chunk_sizes == [10, 10, 3]
+    assert written[PRODUCT_KEY_COLUMN].tolist() == add_product_keys(read_structured_file(path))[PRODUCT_KEY_COLUMN].tolist()
+    assert written['gpu_intensity'].tolist() == [3] * 23